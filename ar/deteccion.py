@@ -1,30 +1,113 @@
 import cv2
 import numpy as np
 
+# Criterio del algoritmo iterativo que quita la distorsión a las esquinas
+CRITERIO_ESQUINAS = (cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS, 30, 1e-6)
+
+class CorrectorDistorsion:
+    """
+    Quita la distorsión una vez por frame para estimar la pose con coordenadas ideales y
+    distorsión cero (con el modelo de 14 coeficientes de la calibración actual, solvePnP lo
+    evalúa en cada iteración de cada marcador). Modos:
+      "puntos": solo se corrigen las esquinas detectadas, todas en una llamada
+      "mapa": se corrige el frame entero con cv2.remap y mapas precalculados por resolución;
+              la imagen que se muestra queda sin distorsión y casa con el render 3D, pero cuesta más.
+              Con alpha se usa la matriz óptima de cv2.getOptimalNewCameraMatrix (0 recorta los
+              bordes curvos, 1 conserva todos los píxeles); con None, la misma matriz de cámara
+    """
+
+    def __init__(self, cameraMatrix, distCoeffs, modo="puntos", calibracion=None, alpha=None):
+        if modo not in ("puntos", "mapa"):
+            raise ValueError(f"Modo de corrección de distorsión desconocido: {modo}")
+        self.cameraMatrix = cameraMatrix
+        self.distCoeffs = distCoeffs
+        self.modo = modo
+        self.alpha = alpha if modo == "mapa" else None
+        self.sin_distorsion = np.zeros((5, 1))
+        # Con una config.calibracion.Calibracion los mapas salen de su caché por resolución
+        self.calibracion = calibracion
+        self._mapas = {}  # (ancho, alto) -> (mapa1, mapa2, matriz de la imagen corregida)
+
+    def _mapas_para(self, ancho, alto):
+        mapas = self._mapas.get((ancho, alto))
+        if mapas is None:
+            if self.calibracion is not None:
+                calibracion = self.calibracion.para(ancho, alto)
+                mapas = (*calibracion.mapas_undistort(self.alpha), calibracion.matriz_corregida(self.alpha))
+            else:
+                matriz = self.cameraMatrix
+                if self.alpha is not None:
+                    matriz, _ = cv2.getOptimalNewCameraMatrix(self.cameraMatrix, self.distCoeffs, (ancho, alto), self.alpha)
+                mapas = (*cv2.initUndistortRectifyMap(self.cameraMatrix, self.distCoeffs, None, matriz,
+                                                      (ancho, alto), cv2.CV_16SC2), matriz)
+            self._mapas[(ancho, alto)] = mapas
+        return mapas
+
+    def corregir_frame(self, frame):
+        """Frame sin distorsión en modo "mapa"; en modo "puntos" el mismo frame"""
+        if self.modo != "mapa":
+            return frame
+        alto, ancho = frame.shape[:2]
+        mapa1, mapa2, _ = self._mapas_para(ancho, alto)
+        return cv2.remap(frame, mapa1, mapa2, cv2.INTER_LINEAR)
+
+    def matriz_pose(self, ancho, alto):
+        """Matriz de cámara de las esquinas que devuelve corregir_esquinas (cambia con alpha)"""
+        if self.alpha is None:
+            return self.cameraMatrix
+        return self._mapas_para(ancho, alto)[2]
+
+    def corregir_esquinas(self, bboxs):
+        """Esquinas de todos los marcadores en coordenadas ideales, como array Nx4x2"""
+        esquinas = np.concatenate([np.asarray(bbox, dtype=np.float64).reshape(-1, 1, 2) for bbox in bboxs])
+        if self.modo == "puntos":
+            esquinas = cv2.undistortImagePoints(esquinas, self.cameraMatrix, self.distCoeffs, arg1=CRITERIO_ESQUINAS)
+        # En modo "mapa" la detección ya se ha hecho sobre el frame corregido
+        return esquinas.reshape(-1, 4, 2)
+
 def crear_detector():
     diccionario = cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_5X5_50)
     return cv2.aruco.ArucoDetector(diccionario)
 
-def detectar_pose(frame, tam, detector, cameraMatrix, distCoeffs):
+def detectar_marcadores(frame, detector):
+    """Esquinas e IDs de los marcadores, para reutilizarlos en detectar_pose y ocultar_marcadores_visualmente"""
     bboxs, ids, _ = detector.detectMarkers(frame)
+    return bboxs, ids
+
+def detectar_pose(frame, tam, detector, cameraMatrix, distCoeffs, deteccion=None, corrector=None):
+    """
+    Pose de cada marcador. Con un CorrectorDistorsion las esquinas se pasan a coordenadas
+    ideales y se usa SOLVEPNP_IPPE_SQUARE (analítico, para marcadores cuadrados) sin distorsión.
+    En modo "mapa" el frame tiene que venir ya de corrector.corregir_frame
+    """
+    bboxs, ids = deteccion if deteccion is not None else detectar_marcadores(frame, detector)
     #print("ids: ", ids)
     if ids is not None:
+        # Este orden de las esquinas es el que exige SOLVEPNP_IPPE_SQUARE
         objPoints = np.array([[-tam/2.0, tam/2.0, 0.0],
                               [tam/2.0, tam/2.0, 0.0],
                               [tam/2.0, -tam/2.0, 0.0],
                               [-tam/2.0, -tam/2.0, 0.0]])
+        if corrector is not None:
+            esquinas = corrector.corregir_esquinas(bboxs)
+            cameraMatrix = corrector.matriz_pose(frame.shape[1], frame.shape[0])
+            distCoeffs = corrector.sin_distorsion
+            metodo = cv2.SOLVEPNP_IPPE_SQUARE
+        else:
+            esquinas = [bbox.reshape((4, 2)) for bbox in bboxs]
+            metodo = cv2.SOLVEPNP_ITERATIVE
         resultado = {}
         ids = ids.flatten()
         for i in range(len(ids)):
-            imagePoints = bboxs[i].reshape((4, 2)) 
-            ret, rvec, tvec = cv2.solvePnP(objPoints, imagePoints, cameraMatrix, distCoeffs)
+            imagePoints = esquinas[i]
+            ret, rvec, tvec = cv2.solvePnP(objPoints, imagePoints, cameraMatrix, distCoeffs, flags=metodo)
             if ret:
                 resultado[ids[i]] = (rvec, tvec)
         return (True, resultado)
     return (False, None)
 
-def ocultar_marcadores_visualmente(frame, detector):
-    bboxs, ids, _ = detector.detectMarkers(frame)
+def ocultar_marcadores_visualmente(frame, detector, deteccion=None):
+    bboxs, ids = deteccion if deteccion is not None else detectar_marcadores(frame, detector)
 
     if ids is not None:
         for i in range(len(ids)):
@@ -1,12 +1,148 @@
+import os
+import re
+import glob
 import numpy as np
+import cv2
 
-def cargar_calibracion(ancho, alto):
-    try:
-        import config.camara as camara
-        return camara.cameraMatrix, camara.distCoeffs
-    except ImportError:
-        cameraMatrix = np.array([[1000, 0, ancho / 2],
-                                 [0, 1000, alto / 2],
-                                 [0, 0, 1]])
-        distCoeffs = np.zeros((5, 1))
-        return cameraMatrix, distCoeffs
+# Calibraciones guardadas como config/calibraciones/<camara>_<ancho>x<alto>.npz con
+# cameraMatrix, distCoeffs y el tamaño de imagen con el que se calibró. <camara> es el nombre
+# del dispositivo (ver clave_camara); "default" se usa para cualquier cámara sin calibración propia.
+# Se crean con utils/migrar_calibracion.py a partir de los valores de config/camara.py.
+DIRECTORIO_CALIBRACIONES = "config/calibraciones"
+CAMARA_POR_DEFECTO = "default"
+# Diferencia de proporción (ancho/alto) a partir de la cual escalar los intrínsecos es solo una aproximación
+TOLERANCIA_PROPORCION = 0.01
+
+def calcular_fov(cameraMatrix, ancho, alto):
+    """Campo de visión vertical (horizontal si la imagen es vertical) en grados, para la cámara de pygfx"""
+    if ancho > alto:
+        f = cameraMatrix[1, 1]
+        fov_rad = 2 * np.arctan(alto / (2 * f))
+    else:
+        f = cameraMatrix[0, 0]
+        fov_rad = 2 * np.arctan(ancho / (2 * f))
+    return np.rad2deg(fov_rad)
+
+def clave_camara(nombre):
+    """Nombre de dispositivo convertido en algo válido para el nombre de fichero"""
+    return re.sub(r"[^a-z0-9]+", "_", str(nombre).lower()).strip("_") or CAMARA_POR_DEFECTO
+
+def ruta_calibracion(camara, ancho, alto):
+    return os.path.join(DIRECTORIO_CALIBRACIONES, f"{clave_camara(camara)}_{ancho}x{alto}.npz")
+
+class Calibracion:
+    """
+    Intrínsecos de una cámara a una resolución. Los productos derivados (FOV para las escenas
+    de pygfx, matriz óptima sin distorsión, mapas para cv2.remap) se calculan la primera vez
+    que se piden, y las versiones a otras resoluciones se guardan para no reescalar en cada frame
+    """
+
+    def __init__(self, cameraMatrix, distCoeffs, ancho, alto, origen=None):
+        self.cameraMatrix = np.asarray(cameraMatrix, dtype=np.float64)
+        self.distCoeffs = np.asarray(distCoeffs, dtype=np.float64).reshape(-1, 1)
+        self.ancho = int(ancho)
+        self.alto = int(alto)
+        self.origen = origen
+        self._fov = None
+        self._matrices_optimas = {}  # alpha -> (matriz, roi)
+        self._mapas = {}             # alpha -> mapas de cv2.remap
+        self._corregidas = {}        # alpha -> Calibracion de la imagen sin distorsión
+        self._escaladas = {}
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            ancho, alto = (int(v) for v in datos["tam"])
+            return cls(datos["cameraMatrix"], datos["distCoeffs"], ancho, alto, origen=ruta)
+
+    def guardar(self, ruta):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        np.savez(ruta, cameraMatrix=self.cameraMatrix, distCoeffs=self.distCoeffs,
+                 tam=np.array([self.ancho, self.alto]))
+
+    def para(self, ancho, alto):
+        """
+        La calibración para otra resolución del mismo sensor: la focal y el centro óptico se
+        escalan con la imagen y los coeficientes de distorsión (normalizados) no cambian
+        """
+        if (ancho, alto) == (self.ancho, self.alto):
+            return self
+        escalada = self._escaladas.get((ancho, alto))
+        if escalada is None:
+            sx, sy = ancho / self.ancho, alto / self.alto
+            if abs(sx / sy - 1) > TOLERANCIA_PROPORCION:
+                print(f" Calibracion de {self.ancho}x{self.alto} usada a {ancho}x{alto}: "
+                      f"distinta proporcion, los intrinsecos son aproximados")
+            matriz = self.cameraMatrix.copy()
+            matriz[0] *= sx
+            matriz[1] *= sy
+            escalada = self._escaladas[(ancho, alto)] = Calibracion(matriz, self.distCoeffs, ancho, alto, self.origen)
+        return escalada
+
+    @property
+    def fov(self):
+        if self._fov is None:
+            self._fov = calcular_fov(self.cameraMatrix, self.ancho, self.alto)
+        return self._fov
+
+    def matriz_optima(self, alpha=0.0):
+        """(matriz, roi) de cv2.getOptimalNewCameraMatrix: alpha=0 solo deja píxeles válidos, 1 los conserva todos"""
+        if alpha not in self._matrices_optimas:
+            self._matrices_optimas[alpha] = cv2.getOptimalNewCameraMatrix(self.cameraMatrix, self.distCoeffs,
+                                                                          (self.ancho, self.alto), alpha)
+        return self._matrices_optimas[alpha]
+
+    def matriz_corregida(self, alpha=None):
+        """Matriz de cámara de la imagen sin distorsión: la misma con alpha=None, la óptima si no"""
+        return self.cameraMatrix if alpha is None else self.matriz_optima(alpha)[0]
+
+    def corregida(self, alpha=None):
+        """Calibración de la imagen que dan mapas_undistort(alpha): su matriz y distorsión cero"""
+        if alpha not in self._corregidas:
+            self._corregidas[alpha] = Calibracion(self.matriz_corregida(alpha), np.zeros((5, 1)),
+                                                  self.ancho, self.alto, self.origen)
+        return self._corregidas[alpha]
+
+    def mapas_undistort(self, alpha=None):
+        """Mapas de cv2.remap que quitan la distorsión hacia matriz_corregida(alpha)"""
+        if alpha not in self._mapas:
+            self._mapas[alpha] = cv2.initUndistortRectifyMap(self.cameraMatrix, self.distCoeffs, None,
+                                                             self.matriz_corregida(alpha),
+                                                             (self.ancho, self.alto), cv2.CV_16SC2)
+        return self._mapas[alpha]
+
+def _buscar_calibracion(camara, ancho, alto):
+    """Ruta de la calibración exacta o, si no hay, la de mayor resolución con la misma proporción"""
+    exacta = ruta_calibracion(camara, ancho, alto)
+    if os.path.exists(exacta):
+        return exacta
+    candidatas = []
+    for ruta in glob.glob(os.path.join(DIRECTORIO_CALIBRACIONES, f"{clave_camara(camara)}_*x*.npz")):
+        tam = re.search(r"_(\d+)x(\d+)\.npz$", ruta)
+        if tam:
+            a, h = int(tam.group(1)), int(tam.group(2))
+            # Primero las de la misma proporción, luego la de más resolución
+            candidatas.append((abs(a / h - ancho / alto) <= TOLERANCIA_PROPORCION, a * h, ruta))
+    return max(candidatas)[2] if candidatas else None
+
+def cargar_calibracion(ancho, alto, camara=CAMARA_POR_DEFECTO):
+    """
+    Calibración de la cámara a la resolución de captura. Busca primero la de esa cámara y
+    después la genérica; si solo existe a otra resolución se reescala. Sin ninguna se usa
+    una matriz aproximada (f=1000, sin distorsión)
+    """
+    for nombre in dict.fromkeys([camara, CAMARA_POR_DEFECTO]):
+        ruta = _buscar_calibracion(nombre, ancho, alto)
+        if ruta is not None:
+            calibracion = Calibracion.cargar(ruta)
+            print(f" Calibracion: {ruta} ({calibracion.ancho}x{calibracion.alto})")
+            return calibracion.para(ancho, alto)
+
+    print(f" No hay calibracion en {DIRECTORIO_CALIBRACIONES}, se usa una matriz aproximada")
+    cameraMatrix = np.array([[1000, 0, ancho / 2],
+                             [0, 1000, alto / 2],
+                             [0, 0, 1]])
+    distCoeffs = np.zeros((5, 1))
+    return Calibracion(cameraMatrix, distCoeffs, ancho, alto)
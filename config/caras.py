@@ -0,0 +1,26 @@
+# Detector de caras: "haar" (resolución completa), "haar_reducido" o "yunet"
+DETECTOR = "haar_reducido"
+
+# Factor de escala del frame antes de pasar el cascade en "haar_reducido"
+ESCALA_HAAR = 0.5
+
+# Modelo YuNet para cv2.FaceDetectorYN. No viene dentro de opencv-python: se descarga de opencv_zoo
+# https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx
+# y se deja en esta ruta. Si no existe se usa el detector Haar reducido.
+MODELO_YUNET = "config/face_detection_yunet_2023mar.onnx"
+UMBRAL_YUNET = 0.8
+
+# Cada cuántos frames se hace una detección sobre el frame completo.
+# Entre medias solo se busca la cara en una región alrededor de la última caja.
+INTERVALO_DETECCION = 5
+# Margen de la región de búsqueda, en proporción al tamaño de la caja
+MARGEN_ROI = 0.5
+
+# Procesos que codifican caras con dlib (cada uno carga los modelos una vez al arrancar).
+# 0 = codificar en el propio proceso, como antes
+TRABAJADORES_CODIFICACION = 2
+# Frames que pueden estar a la vez en memoria compartida esperando a un trabajador
+HUECOS_MEMORIA_COMPARTIDA = 4
+# Segundos que se espera a un trabajador antes de darlo por colgado y codificar en el propio proceso
+# (la primera llamada incluye arrancar el proceso y cargar los modelos de dlib)
+TIMEOUT_CODIFICACION = 10.0
@@ -0,0 +1,15 @@
+# Fuentes TrueType para los textos de la interfaz, en orden de preferencia. Con Pillow
+# instalado se usa la primera que exista (las tildes y la ñ salen bien); si no hay
+# ninguna se dibuja con la fuente Hershey de OpenCV, que no tiene tildes.
+FUENTES_TTF = [
+    "media/fuentes/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",
+]
+# Píxeles de la fuente TrueType por unidad de font_scale de OpenCV (mismo tamaño aparente)
+PIXELES_POR_ESCALA = 32
+
+# Etiquetas rasterizadas que se guardan; al llenarse se descartan las menos usadas
+MAX_SPRITES_TEXTO = 512
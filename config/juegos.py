@@ -0,0 +1,199 @@
+# Definición de los juegos AR. Cada entrada la interpreta el motor JuegoAR de modules/juegos.py,
+# así que un juego nuevo se añade aquí sin escribir otra máquina de estados.
+#
+#   modo, titulo_menu, descripcion, comando: cómo aparece en el menú de juegos
+#   nombre: título que se muestra durante la partida
+#   escaneo: duración (s), segundos tras los que se reinicia si faltan marcadores,
+#            mínimo de marcadores, tipos admitidos (None = todos) e instrucciones
+#   seleccion: cuántos marcadores escaneados entran en la partida (None = todos)
+#              y, opcionalmente, cuántos de cada tipo como máximo
+#   fases: se juegan en orden. Tipos de fase:
+#     "secuencia"  muestra los elementos de uno en uno (duracion_elemento s cada uno)
+#     "preguntar"  pregunta por cada elemento cuando su marcador está a la vista
+#     "nombrar"    el jugador dice los nombres de todos los elementos
+#     "categorias" el jugador dice los elementos de cada categoría
+#     timeout: segundos para responder. requiere_presentes: la fase se pausa mientras
+#     falte algún elemento delante de la cámara. mostrar_elementos: renderizar los modelos
+#   puntuacion: regla de puntuación ("por_pregunta", "secuencia", "aciertos", "categorias")
+#   resultado: primeros mensajes de la pantalla final si la partida es correcta o no
+#
+# En los textos se pueden usar {nombres}, {n}, {timeout}, {restante}, {dados} y {presentes}.
+
+COMANDOS_REPETIR = ["otra vez", "repetir", "nuevo", "again"]
+COMANDOS_SALIR = ["salir", "terminar", "exit", "quit"]
+
+JUEGOS = {
+    "descubre": {
+        "modo": "entrenamiento",
+        "titulo_menu": "Descubre y Nombra",
+        "descripcion": "Aprende el nombre de frutas y verduras",
+        "comando": "descubre",
+        "nombre": "DESCUBRE Y NOMBRA",
+        "escaneo": {
+            "duracion": 10,
+            "reintento": 15,
+            "minimo": 1,
+            "tipos": None,
+            "etiqueta": "Marcadores encontrados",
+            "elemento": "marcadores",
+            "instrucciones": [
+                "Muestra todos los marcadores que quieres incluir",
+                "Colocalos uno por uno frente a la camara",
+            ],
+        },
+        "seleccion": {"cantidad": None},
+        "fases": [
+            {
+                "tipo": "preguntar",
+                "timeout": 15,
+                "preguntas": [
+                    "¿Que {tipo} es esta?",
+                    "Dime el nombre de esta {tipo}",
+                    "¿Como se llama lo que ves?",
+                    "Identifica esta {tipo}",
+                    "Nombra esta {tipo}",
+                ],
+            },
+        ],
+        "puntuacion": "por_pregunta",
+        "resultado": {"correcto": [" ¡JUEGO COMPLETADO!"], "incorrecto": [" ¡JUEGO COMPLETADO!"]},
+    },
+    "frutas": {
+        "modo": "entrenamiento",
+        "titulo_menu": "Encuentra las Frutas",
+        "descripcion": "Identifica solo las frutas",
+        "comando": "frutas",
+        "nombre": "ENCUENTRA LAS FRUTAS",
+        "escaneo": {
+            "duracion": 10,
+            "reintento": 15,
+            "minimo": 3,
+            "tipos": ["fruta"],
+            "etiqueta": "Frutas encontradas",
+            "elemento": "frutas",
+            "instrucciones": [
+                "Muestra al menos 3 marcadores de frutas diferentes",
+                "Colocalos uno por uno frente a la camara",
+            ],
+        },
+        "seleccion": {"cantidad": 3},
+        "fases": [
+            {
+                "tipo": "nombrar",
+                "timeout": 30,
+                "requiere_presentes": True,
+                "mostrar_elementos": True,
+                "intro": [
+                    "¡ENCUENTRA ESTAS FRUTAS!",
+                    "Busca y coloca: {nombres}",
+                    "Cuando las veas, di sus nombres en voz alta",
+                ],
+                "colocar": [
+                    "Coloca estas frutas: {nombres}",
+                    "Tienes {presentes}/{n} frutas",
+                ],
+                "mensajes": [
+                    "DI LOS NOMBRES DE LAS FRUTAS",
+                    "Frutas objetivo: {nombres}",
+                    "Tiempo restante: {restante}s",
+                ],
+            },
+        ],
+        "puntuacion": "aciertos",
+        "resultado": {"correcto": ["¡EXCELENTE!", "¡Has encontrado todas las frutas!"]},
+    },
+    "categorias": {
+        "modo": "evaluacion",
+        "titulo_menu": "Agrupa por Categorias",
+        "descripcion": "Separa frutas de verduras",
+        "comando": "categorias",
+        "nombre": "AGRUPA POR CATEGORIAS",
+        "escaneo": {
+            "duracion": 12,
+            "reintento": 17,
+            "minimo": 6,
+            "tipos": None,
+            "etiqueta": "Elementos encontrados",
+            "elemento": "elementos",
+            "contar_tipos": True,
+            "instrucciones": [
+                "Muestra al menos 6 marcadores diferentes",
+                "Mezcla de frutas y verduras",
+            ],
+        },
+        "seleccion": {"cantidad": 6, "por_tipo": 3},
+        "fases": [
+            {
+                "tipo": "categorias",
+                "timeout": 30,
+                "requiere_presentes": True,
+                "mostrar_elementos": True,
+                "categorias": [
+                    {"clave": "frutas", "tipo": "fruta", "titulo": "FRUTAS", "icono": "[FRUTA]"},
+                    {"clave": "verduras", "tipo": "verdura", "titulo": "VERDURAS", "icono": "[VERDURA]"},
+                ],
+                "comandos_siguiente": ["siguiente", "verduras", "cambiar"],
+                "comandos_terminar": ["listo", "terminar", "acabar", "finalizar"],
+                "intro": [
+                    "CLASIFICA EN FRUTAS Y VERDURAS!",
+                    "Coloca estos {n} elementos",
+                    "Te preguntare por cada categoria",
+                ],
+                "colocar": [
+                    "Coloca todos los elementos escaneados",
+                    "Tienes {presentes}/{n} elementos",
+                ],
+            },
+        ],
+        "puntuacion": "categorias",
+        "umbral_correcto": 0.8,
+        "mostrar_al_terminar": True,
+        "resultado": {"correcto": ["¡EXCELENTE CLASIFICACION!"], "incorrecto": ["¡Buen intento!"]},
+    },
+    "memoria": {
+        "modo": "evaluacion",
+        "titulo_menu": "Juego de Memoria",
+        "descripcion": "Recuerda la secuencia",
+        "comando": "memoria",
+        "nombre": "MEMORIA AR",
+        "escaneo": {
+            "duracion": 10,
+            "reintento": 15,
+            "minimo": 3,
+            "tipos": None,
+            "etiqueta": "Marcadores encontrados",
+            "elemento": "marcadores",
+            "instrucciones": [
+                "Muestra exactamente 3 marcadores diferentes",
+                "Colocalos uno por uno frente a la camara",
+            ],
+        },
+        "seleccion": {"cantidad": 3},
+        "fases": [
+            {
+                "tipo": "secuencia",
+                "duracion_elemento": 3,
+                "titulo": " MEMORIZA LA SECUENCIA",
+            },
+            {
+                "tipo": "nombrar",
+                "timeout": 30,
+                # En orden y de uno en uno: de cada frase solo cuenta el primer elemento
+                "una_por_frase": True,
+                "intro": [
+                    " AHORA REPITE LA SECUENCIA",
+                    "Di los nombres EN ORDEN, uno por uno",
+                    "Ejemplo: 'pera', 'limón', 'lechuga'",
+                    "Tienes {timeout} segundos",
+                ],
+                "mensajes": [
+                    "REPITE LA SECUENCIA",
+                    "Elementos dados: {dados}/{n}",
+                    "Tiempo restante: {restante}s",
+                ],
+            },
+        ],
+        "puntuacion": "secuencia",
+        "resultado": {"correcto": ["¡CORRECTO!", "¡Tienes una excelente memoria!"]},
+    },
+}
@@ -0,0 +1,20 @@
+# Motor de reconocimiento de voz: "vosk" (local, sin red) o "google" (Web Speech API)
+MOTOR = "vosk"
+
+# Modelo de Vosk para español (https://alphacephei.com/vosk/models, vosk-model-small-es-0.42).
+# Si no existe o no está instalado el paquete vosk se usa Google.
+MODELO_VOSK = "config/vosk-model-small-es-0.42"
+FRECUENCIA_VOSK = 16000
+
+IDIOMA_GOOGLE = "es-ES"
+
+# Captura continua con detección de voz (VAD por energía y cruces por cero)
+PREROLL_VOZ = 0.5            # segundos de audio anteriores al inicio de la voz que se añaden a la frase
+PAUSA_FIN_FRASE = 0.8        # segundos de silencio que cierran una frase
+MAX_DURACION_FRASE = 6.0
+UMBRAL_ENERGIA_MINIMO = 300  # RMS mínimo (muestras int16) para considerar que hay voz
+FACTOR_RUIDO = 3.0           # la voz debe superar el ruido de fondo medido en este factor
+MAX_CRUCES_CERO = 0.35       # proporción de cruces por cero por encima de la cual es ruido (siseo, ventilador)
+ANTIGUEDAD_MAX_FRASE = 3.0   # frases oídas antes de empezar a escuchar que todavía se aceptan
+ESPERA_MIN_MICROFONO = 0.1   # segundos antes de reabrir el micrófono tras un error (se duplica en cada fallo)
+ESPERA_MAX_MICROFONO = 5.0
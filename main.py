@@ -3,14 +3,19 @@ import speech_recognition as sr
 import threading
 import time
 import modules.cuia as cuia
-import face_recognition
 from config.calibracion import cargar_calibracion
 from models.modelos import MODELOS_FRUTAS_VERDURAS, crear_modelo_por_id, obtener_info_modelo
 from ar.escena import crear_escena
-from ar.deteccion import crear_detector, detectar_pose, ocultar_marcadores_visualmente
+from ar.deteccion import CorrectorDistorsion, crear_detector, detectar_marcadores, detectar_pose, ocultar_marcadores_visualmente
 from utils.conversiones import from_opencv_to_pygfx
-from modules.usuarios import buscar_usuario_por_cara, guardar_puntuacion_juego, obtener_progreso_usuario, registrar_usuario, obtener_datos_visibles_usuario, verificar_usuario_existe, actualizar_nombre_usuario, actualizar_idioma_usuario
-from modules.juegos import GestorJuegosAR, JuegoDescubreAR, JuegoEncuentraFrutasAR, JuegoCategoriasAR, JuegoMemoriaAR
+from modules.usuarios import buscar_usuario_por_cara, encolar_puntuacion, vaciar_cola_puntuaciones, obtener_progreso_usuario, registrar_usuario, obtener_datos_visibles_usuario, verificar_usuario_existe, actualizar_nombre_usuario, actualizar_idioma_usuario
+from modules.juegos import GestorJuegosAR, JuegoAR, JuegoDescubreAR, JuegoCategoriasAR
+from modules.caras import PipelineFacial, RecolectorMuestras, obtener_servicio_codificacion, cerrar_servicio_codificacion
+from modules.respuestas import menciona
+from modules.voz import crear_reconocedor, gramatica_para_fase, escuchar_palabras_clave, CapturaAudio
+from modules.texto import dibujar_texto, dibujar_capa, etiqueta
+from modules.planificador import PlanificadorFrames, CRITICA, NORMAL, BAJA
+from modules.pipeline import PipelineFrames, PROFUNDIDAD_PIPELINE, POLITICA_PIPELINE
 
 # ----- ESTADOS DE LA APLICACION -----
 class GameState:
@@ -39,6 +44,7 @@ class GameState:
         self.nombre_cambiado = None
         self.contador_nombre = 0
         self.vector_facial_actual = None
+        self.vectores_faciales = []  # Vectores de todas las caras visibles (cara principal primero)
 
         # Variables del sistema de progreso
         self.marcadores_detectados = set()  # IDs de marcadores que se han detectado
@@ -54,33 +60,58 @@ class GameState:
         self.mensaje_temporal = ""
 
 # ----- CONFIGURACIÓN RECONOCIMIENTO FACIAL -----
-FACE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-
+# Se crean en main(): los procesos de codificación facial (spawn) vuelven a importar este
+# módulo y no deben construir detectores, juegos ni estado que no van a usar
+pipeline_facial = None
+# Recoge varias muestras de la cara en segundo plano mientras el usuario se registra
+recolector_muestras = None
+
+
+# ----- CONFIGURACIÓN CÁMARA -----
+# Backend y formato negociado por dispositivo, para no sondear todos los backends en cada arranque
+CACHE_CAMARA = "config/camara_cache.json"
+# Perfil de captura del kiosko (ver cuia.PERFILES_CAPTURA); si la calibración es de otra resolución se reescala
+PERFIL_CAPTURA = "mjpg_1080p30"
+# Corrección de la distorsión para la pose (ver ar.deteccion.CorrectorDistorsion):
+# "puntos" corrige solo las esquinas, "mapa" el frame entero, None usa solvePnP con distorsión
+MODO_DISTORSION = "puntos"
+# Solo en modo "mapa": None conserva la matriz de cámara; 0..1 usa la matriz óptima cacheada en la
+# calibración (0 recorta los bordes curvos de la imagen corregida, 1 conserva todos los píxeles)
+ALPHA_MAPA = None
+# Captura, caras y detección ArUco en hilos propios (ver modules/pipeline.py); con False
+# todo se hace en el bucle principal. Render, interfaz e imshow siguen en el hilo principal
+USAR_PIPELINE = True
+# Frames de la cámara en memoria compartida (cuia.busFrames) para que los procesos de
+# codificación facial los lean sin copias; solo se usa si hay TRABAJADORES_CODIFICACION
+USAR_BUS_FRAMES = True
+HUECOS_BUS_FRAMES = 8
 
 # ----- VARIABLES GLOBALES -----
 JUEGO_ACTUAL = "juego_1"  
-state = GameState()
+state = None
 voice_thread_active = False
 recognizer = None
 microphone = None
+reconocedor_voz = None
+captura_audio = None
 # Diccionario para almacenar las escenas de cada modelo
 escenas = {}  
 
 # ----- FUNCIONES RELACIONADAS CON EL RECONOCIMIENTO DE VOZ -----
 def inicializar_microfono():
     #Inicializa el micrófono de forma no bloqueante
-    global recognizer, microphone, state
+    global recognizer, microphone, reconocedor_voz, captura_audio, state
     
     try:
         print(" Inicializando micrófono...")
         recognizer = sr.Recognizer()
         microphone = sr.Microphone()
+        reconocedor_voz = crear_reconocedor(recognizer)
+        print(f" Reconocimiento de voz: {reconocedor_voz.nombre}")
         
-        # Configuración micrófono
-        recognizer.energy_threshold = 4000
-        recognizer.dynamic_energy_threshold = True
-        recognizer.pause_threshold = 0.8
-        recognizer.phrase_threshold = 0.3
+        # El micrófono queda abierto en un hilo que separa las frases con VAD
+        captura_audio = CapturaAudio(microphone)
+        captura_audio.iniciar()
         
         state.microfono_listo = True
         print("***** Micrófono listo *****")
@@ -89,93 +120,29 @@ def inicializar_microfono():
         print(f"xxxxxx Error configurando micrófono: {e} xxxxxxx")
         state.microfono_listo = False
 
-def verificar_respuesta(texto, respuesta_correcta):
-    """Verificar si la respuesta del usuario es correcta"""
-    texto = texto.lower().strip()
-    respuesta_correcta = respuesta_correcta.lower().strip()
-    
-    print(f" Verificando: '{texto}' == '{respuesta_correcta}'")
-    
-    # Verificación directa
-    if respuesta_correcta in texto:
-        print(" Coincidencia directa encontrada")
-        return True
-    
-    # Verificación inversa (por si el usuario dice más palabras)
-    if texto in respuesta_correcta:
-        print(" Coincidencia inversa encontrada")
-        return True
-    
-    # Verificaciones con variaciones y sinónimos
-    variaciones = {
-        'pera': ['pera', 'peras'],
-        'cebolleta': ['cebolleta', 'cebolletas', 'cebollín', 'cebollino'],
-        'cebolla': ['cebolla', 'cebollas'],
-        'lechuga': ['lechuga', 'lechugas'],
-        'limon': ['limón', 'limon', 'limones'],
-        'limón': ['limón', 'limon', 'limones'],
-        'pimiento rojo': ['pimiento rojo', 'pimiento', 'pimientos rojos', 'pimientos'],
-        'pimiento verde': ['pimiento verde', 'pimiento', 'pimientos verdes', 'pimientos'],
-        'pimiento': ['pimiento', 'pimientos', 'pimiento rojo', 'pimiento verde'],
-        'uvas': ['uvas', 'uva', 'racimo', 'racimo de uvas'],
-        'uva': ['uvas', 'uva', 'racimo', 'racimo de uvas'],
-        'zanahoria': ['zanahoria', 'zanahorias'],
-    }
-    
-    # Buscar en variaciones para la respuesta correcta
-    if respuesta_correcta in variaciones:
-        for variacion in variaciones[respuesta_correcta]:
-            if variacion in texto:
-                print(f" Variación encontrada: '{variacion}' en '{texto}'")
-                return True
-    
-    # Buscar si alguna clave de variaciones está en el texto del usuario
-    for clave, lista_variaciones in variaciones.items():
-        if clave == respuesta_correcta:
-            continue
-        for variacion in lista_variaciones:
-            if variacion in texto and clave == respuesta_correcta:
-                print(f" Variación de clave encontrada: '{variacion}' -> '{clave}'")
-                return True
-    
-    # Verificación de palabras individuales (para casos complejos)
-    palabras_texto = texto.split()
-    palabras_respuesta = respuesta_correcta.split()
-    
-    # Si la respuesta correcta es una sola palabra
-    if len(palabras_respuesta) == 1:
-        palabra_correcta = palabras_respuesta[0]
-        for palabra in palabras_texto:
-            if palabra == palabra_correcta:
-                print(f" Palabra individual encontrada: '{palabra}'")
-                return True
-            # Verificar en variaciones también
-            if palabra_correcta in variaciones:
-                if palabra in variaciones[palabra_correcta]:
-                    print(f" Variación de palabra encontrada: '{palabra}' -> '{palabra_correcta}'")
-                    return True
-    
-    print(f" No se encontró coincidencia para '{texto}' vs '{respuesta_correcta}'")
-    return False
-
 def reconocimiento_voz():
     global state, recognizer, microphone, voice_thread_active
     
     voice_thread_active = True
     
     while voice_thread_active:
-        if state.esperando_voz and state.microfono_listo and recognizer and microphone:
+        if state.esperando_voz and state.microfono_listo and captura_audio and reconocedor_voz:
             try:
                 print(f" Escuchando en fase: {state.fase}")
                 
                 # Ajustar tiempo según la fase
                 timeout = 5 if "nombre" in state.fase else 3
-                phrase_limit = 6 if "nombre" in state.fase else 4
                 
-                with microphone as source:
-                    audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_limit)
+                # Siguiente frase detectada por el hilo de captura (incluye lo dicho justo antes)
+                frase = captura_audio.siguiente_frase(timeout)
                 
-                texto = recognizer.recognize_google(audio, language="es-ES").lower().strip()
+                gramatica = gramatica_para_fase(state.fase)
+                if gramatica and hasattr(reconocedor_voz, "iniciar_flujo"):
+                    # Palabras clave: la respuesta cuenta en cuanto se oye, sin esperar al final de la frase
+                    texto = escuchar_palabras_clave(frase, reconocedor_voz, gramatica)
+                else:
+                    texto = reconocedor_voz.reconocer(frase.audio(), gramatica=gramatica,
+                                                      al_parcial=lambda parcial: print(f"   ... {parcial}"))
                 print(f" Detectado: '{texto}'")
                 
                 # Limpiar mensaje de error previo
@@ -202,7 +169,7 @@ def reconocimiento_voz():
                 # ===== INICIO DE SESIÓN =====
                 elif state.fase == "intentando_iniciar_sesion":
                     if hasattr(state, 'vector_facial_actual'):
-                        nombre_encontrado, datos_usuario = buscar_usuario_por_cara(state.vector_facial_actual)
+                        nombre_encontrado, datos_usuario = buscar_usuario_entre_caras(state.vectores_faciales or [state.vector_facial_actual])
                         if nombre_encontrado:
                             state.usuario_nombre = nombre_encontrado
                             state.usuario_data = datos_usuario
@@ -253,11 +220,15 @@ def reconocimiento_voz():
                     if idioma_codigo:
                         # Registrar usuario con vector facial
                         if hasattr(state, 'vector_facial_actual'):
+                            muestras = recolector_muestras.muestras()
+                            print(f" Registrando con {len(muestras) + 1} muestras faciales")
                             datos = registrar_usuario(
                                 state.usuario_nombre, 
                                 idioma_codigo, 
-                                state.vector_facial_actual
+                                state.vector_facial_actual,
+                                vectores_ejemplo=muestras
                             )
+                            recolector_muestras.detener()
                             
                             if datos:
                                 print(f" Usuario {state.usuario_nombre} registrado correctamente")
@@ -527,14 +498,12 @@ def reconocimiento_voz():
                     
                     else:
                         # Usar método interno del juego
-                        if (hasattr(state.gestor_juegos, 'juego_activo') and
-                            hasattr(state.gestor_juegos.juego_activo, 'procesar_comando')):
+                        if state.gestor_juegos.juego_activo:
                             
-                            resultado = state.gestor_juegos.juego_activo.procesar_comando(texto)
+                            resultado = state.gestor_juegos.procesar_voz_juego(texto)
                             
                             if resultado:
                                 print(" Comando de voz procesado por el juego")
-                                state.gestor_juegos.procesar_resultado_juego(resultado)
                                 state.esperando_voz = False
                             else:
                                 print(" Comando no reconocido por el juego")
@@ -543,7 +512,7 @@ def reconocimiento_voz():
                 elif state.fase == "esperando_respuesta" and hasattr(state, 'info_modelo_actual') and state.info_modelo_actual:
                     respuesta_correcta = state.info_modelo_actual['respuesta_correcta']
                     
-                    if verificar_respuesta(texto, respuesta_correcta):
+                    if menciona(texto, respuesta_correcta):
                         state.respuesta_recibida = texto
                         state.respuesta_correcta = True
                         state.puntuacion += 1
@@ -627,23 +596,15 @@ def iniciar_juego(juego_id):
     print(f" Juego {juego_id} iniciado con progreso cargado")
 
 # ----- FUNCION DE PROCESAMIENTO FACIAL -----
-def extraer_vector_facial(frame, face_box):
-    """Extrae el vector de características faciales usando face_recognition"""
-    try:
-        x, y, w, h = face_box
-        # Convertir de BGR a RGB para face_recognition
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Obtener encodings faciales
-        face_locations = [(y, x+w, y+h, x)]  # formato: (top, right, bottom, left)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        if len(face_encodings) > 0:
-            return face_encodings[0].tolist()  # Convertir a lista para JSON
-        return None
-    except Exception as e:
-        print(f"Error extrayendo vector facial: {e}")
-        return None
+def buscar_usuario_entre_caras(vectores_faciales):
+    """Busca un usuario registrado entre todas las caras visibles (login con varios niños)"""
+    for vector_facial in vectores_faciales:
+        if vector_facial is None:
+            continue
+        nombre_encontrado, datos_usuario = buscar_usuario_por_cara(vector_facial)
+        if nombre_encontrado:
+            return nombre_encontrado, datos_usuario
+    return None, None
            
 # ----- FUNCION PARA DETECTAR MARCADORES DISPONIBLES -----
 def detectar_marcadores_disponibles(frame, detector, cameraMatrix, distCoeffs):
@@ -657,9 +618,98 @@ def detectar_marcadores_disponibles(frame, detector, cameraMatrix, distCoeffs):
     
     return marcadores_encontrados
 
+# ----- FUNCIONES DEL BUCLE DE JUEGO -----
+def detectar_marcadores_y_pose(frame, detector, cameraMatrix, distCoeffs, corrector=None):
+    """
+    Una sola detección ArUco por frame: las esquinas sirven para ocultar los marcadores,
+    la pose para renderizar y los IDs para el juego
+    """
+    deteccion = detectar_marcadores(frame, detector)
+    ret, pose = detectar_pose(frame, 0.19, detector, cameraMatrix, distCoeffs, deteccion, corrector)
+    pose = pose if ret and pose is not None else {}
+    marcadores = {marker_id for marker_id in pose if marker_id in MODELOS_FRUTAS_VERDURAS}
+    return deteccion, pose, marcadores
+
+def renderizar_modelos(frame_visual, pose, marcadores, calibracion, escala=1.0):
+    """
+    Dibuja los modelos 3D de los marcadores indicados. Con escala < 1 el modelo se
+    renderiza a menor resolución y se amplía (lo usa el planificador para mantener los FPS)
+    """
+    alto, ancho = frame_visual.shape[:2]
+    for marker_id in marcadores:
+        if marker_id not in pose:
+            continue
+        clave = (marker_id, escala)
+        if clave not in escenas:
+            # La escena reducida usa la calibración escalada para conservar el encuadre
+            escenas[clave] = crear_escena(crear_modelo_por_id(marker_id),
+                                          calibracion.para(int(ancho * escala), int(alto * escala)))
+        M = from_opencv_to_pygfx(pose[marker_id][0], pose[marker_id][1])
+        escenas[clave].actualizar_camara(M)
+        imagen_render = escenas[clave].render()
+        if escala != 1.0:
+            imagen_render = cv2.resize(imagen_render, (ancho, alto), interpolation=cv2.INTER_LINEAR)
+        imagen_render_bgr = cv2.cvtColor(imagen_render, cv2.COLOR_RGBA2BGRA)
+        frame_visual = cuia.alphaBlending(imagen_render_bgr, frame_visual)
+    return frame_visual
+
+def guardar_puntuacion_partida(juego_actual):
+    """Encola la puntuación de una partida terminada (una sola vez por partida)"""
+    if juego_actual.puntuacion_guardada or not juego_actual.resultado_final:
+        return
+    modo = state.gestor_juegos.modo_actual
+    nombre_juego = juego_actual.obtener_nombre()
+    # Todas las reglas de puntuación dejan el porcentaje en resultado_final
+    puntuacion = int(juego_actual.resultado_final.get('porcentaje', 0))
+    
+    duracion = time.time() - getattr(juego_actual, 'tiempo_inicio', time.time())
+    marcadores = juego_actual.marcadores_detectados_inicial
+    exito = encolar_puntuacion(state.usuario_nombre, modo, nombre_juego, puntuacion, duracion, marcadores)
+    if exito:
+        juego_actual.puntuacion_guardada = True
+        print(f"[OK] Puntuacion en cola: {puntuacion}% para {nombre_juego}")
+
+def crear_planificador():
+    planificador = PlanificadorFrames()
+    planificador.registrar("deteccion", NORMAL, presupuesto_ms=8)
+    planificador.registrar("caras", NORMAL, presupuesto_ms=40)
+    planificador.registrar("juego", NORMAL, presupuesto_ms=2)
+    planificador.registrar("render", CRITICA, presupuesto_ms=12)
+    planificador.registrar("interfaz", CRITICA, presupuesto_ms=3)
+    planificador.registrar("muestras", BAJA, presupuesto_ms=2)
+    planificador.registrar("persistencia", BAJA, presupuesto_ms=2, max_aplazamientos=30)
+    return planificador
+
+def crear_pipeline(ar, cameraMatrix, distCoeffs, corrector=None):
+    """
+    Pipeline captura -> caras -> deteccion. Cada etapa solo trabaja en la fase que la usa;
+    la detección tiene su propio detector para no compartirlo con el hilo principal
+    """
+    detector_pipeline = crear_detector()
+
+    def etapa_caras(paquete):
+        if state.fase == "reconocimiento_facial":
+            paquete.datos["caras"] = pipeline_facial.procesar(paquete.frame, paquete.secuencia)
+
+    def etapa_deteccion(paquete):
+        if state.fase == "jugando":
+            if corrector:
+                paquete.frame = corrector.corregir_frame(paquete.frame)
+            paquete.datos["deteccion"] = detectar_marcadores_y_pose(paquete.frame, detector_pipeline, cameraMatrix,
+                                                                    distCoeffs, corrector)
+
+    return PipelineFrames(ar.read, [("caras", etapa_caras), ("deteccion", etapa_deteccion)],
+                          profundidad=PROFUNDIDAD_PIPELINE, politica=POLITICA_PIPELINE,
+                          secuencia=lambda: ar.secuencia)
+
 # ----- FUNCION DE REALIDAD AUMENTADA -----
-def realidad_mixta(frame, detector, cameraMatrix, distCoeffs):
+def realidad_mixta(frame, detector, calibracion):
     global state, escenas
+    cameraMatrix, distCoeffs = calibracion.cameraMatrix, calibracion.distCoeffs
+
+    # Fuera de estas fases nadie usa el resultado: no gastar una detección por frame
+    if state.fase not in ("escaneo_inicial", "pregunta", "esperando_respuesta", "resultado"):
+        return frame
 
     # Detectar marcadores disponibles en cada frame
     marcadores_actuales = detectar_marcadores_disponibles(frame, detector, cameraMatrix, distCoeffs)
@@ -697,8 +747,8 @@ def realidad_mixta(frame, detector, cameraMatrix, distCoeffs):
                     # Crear escena si no existe
                     if marker_id not in escenas:
                         modelo = crear_modelo_por_id(marker_id)
-                        escenas[marker_id] = crear_escena(modelo, cameraMatrix,
-                                                          int(frame.shape[1]), int(frame.shape[0]))
+                        escenas[marker_id] = crear_escena(modelo, calibracion.para(int(frame.shape[1]),
+                                                                                   int(frame.shape[0])))
 
                     print(f" Mostrando: {state.info_modelo_actual['nombre']} (ID: {marker_id})")
                 
@@ -718,41 +768,57 @@ def realidad_mixta(frame, detector, cameraMatrix, distCoeffs):
 
 # ----- FUNCION PARA DIBUJAR TEXTO EN EL FRAME -----
 def draw_text_with_background(img, text, pos, font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0)):
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    thickness = 2
-    
-    # Obtener tamaño del texto
-    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
-    
-    # Dibujar rectángulo de fondo
-    cv2.rectangle(img, 
-                  (pos[0] - 5, pos[1] - text_height - 5),
-                  (pos[0] + text_width + 5, pos[1] + baseline + 5),
-                  bg_color, -1)
-    
-    # Dibujar texto
-    cv2.putText(img, text, pos, font, font_scale, color, thickness)
+    # Rasterizado una vez y cacheado (ver modules/texto.py)
+    dibujar_texto(img, text, pos, font_scale, color, bg_color)
 
 # ----- FUNCION PRINCIPAL -----
 def main():
-    global state, voice_thread_active, escenas
-    
+    global state, voice_thread_active, escenas, pipeline_facial, recolector_muestras
+
+    state = GameState()
+    pipeline_facial = PipelineFacial()
+    recolector_muestras = RecolectorMuestras()
+
     cam = 0
-    bk = cuia.bestBackend(cam)
+    bk = cuia.bestBackend(cam, cache=CACHE_CAMARA)
     
-    # Configurar cámara y parámetros AR
-    webcam = cv2.VideoCapture(cam, bk)
-    ancho = int(webcam.get(cv2.CAP_PROP_FRAME_WIDTH))
-    alto = int(webcam.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    webcam.release()
+    # Configurar cámara y parámetros AR (una sola apertura de la cámara)
+    ar = cuia.myVideo(cam, bk, perfil=PERFIL_CAPTURA)
+    formato = ar.formato()
+    cuia.guardarCacheCamara(CACHE_CAMARA, cam, bk, formato)
+    print(f" Captura: {formato['fourcc']} {formato['ancho']}x{formato['alto']} @ {formato['fps']:.0f} FPS (buffer {formato['buffer']})")
+    if ar.perfil and (formato["ancho"], formato["alto"]) != (ar.perfil["ancho"], ar.perfil["alto"]):
+        print(f" El driver no concedio {ar.perfil['ancho']}x{ar.perfil['alto']}, se usara {formato['ancho']}x{formato['alto']}")
+    ancho = formato["ancho"]
+    alto = formato["alto"]
     
-    cameraMatrix, distCoeffs = cargar_calibracion(ancho, alto)
+    # Calibración de esta cámara a la resolución concedida (reescalada si se calibró a otra)
+    calibracion = cargar_calibracion(ancho, alto, cuia.firmaCamara(cam).get("nombre", f"camara{cam}"))
+    cameraMatrix, distCoeffs = calibracion.cameraMatrix, calibracion.distCoeffs
     detector = crear_detector()
-
-    ar = cuia.myVideo(cam, bk)
-    #ar.process = lambda frame: realidad_mixta(frame, detector, cameraMatrix, distCoeffs)
-    ar.process = lambda frame: realidad_mixta(frame.copy(), detector, cameraMatrix, distCoeffs)
+    corrector = None
+    # El render 3D usa los intrínsecos de la imagen que se muestra (la corregida en modo "mapa")
+    calibracion_render = calibracion
+    if MODO_DISTORSION:
+        corrector = CorrectorDistorsion(cameraMatrix, distCoeffs, MODO_DISTORSION, calibracion, ALPHA_MAPA)
+        if corrector.alpha is not None:
+            calibracion_render = calibracion.corregida(corrector.alpha)
+
+    #ar.process = lambda frame: realidad_mixta(frame, detector, calibracion)
+    procesar_frame = lambda frame: realidad_mixta(frame.copy(), detector, calibracion)
+    pipeline = None
+    if USAR_PIPELINE:
+        # realidad_mixta renderiza con pygfx: se aplica en el hilo principal, no en el de captura
+        pipeline = crear_pipeline(ar, cameraMatrix, distCoeffs, corrector)
+        pipeline.iniciar()
+    else:
+        ar.process = procesar_frame
  
+    # Arrancar ya los procesos de codificación facial: cargan los modelos de dlib mientras
+    # el usuario se acerca a la cámara
+    if obtener_servicio_codificacion() and USAR_BUS_FRAMES:
+        pipeline_facial.bus = ar.publicar(HUECOS_BUS_FRAMES)
+
     # Inicializar micrófono en hilo separado
     hilo_microfono = threading.Thread(target=inicializar_microfono, daemon=True)
     hilo_microfono.start()
@@ -761,6 +827,9 @@ def main():
     hilo_voz = threading.Thread(target=reconocimiento_voz, daemon=True)
     hilo_voz.start()
 
+    # Reparto del tiempo de cada frame entre detección, caras, render, interfaz y guardado
+    planificador = crear_planificador()
+
     print("🎮 Kids&Veggies iniciado - Mira a la camara para comenzar")
     print(" Marcadores disponibles:")
     for marker_id, info in MODELOS_FRUTAS_VERDURAS.items():
@@ -768,31 +837,57 @@ def main():
 
     try:
         while True:
-            ret, frame = ar.read()
+            paquete = None
+            if pipeline:
+                paquete = pipeline.siguiente()
+                if paquete is None or not paquete.ret:
+                    # Cámara parada o desconectada: la ventana tiene que seguir atendiendo
+                    # a ESC y a la orden de voz "salir" aunque no lleguen frames
+                    if state.fase == "salir" or cv2.waitKey(1) == 27:
+                        break
+                    continue
+                frame = procesar_frame(paquete.frame)
+            else:
+                ret, frame = ar.read()
+            planificador.empezar_frame()
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             current_time = time.time()
 
             alto = frame.shape[0]  # Altura del frame
             
+            # Muestras faciales adicionales durante el registro (en segundo plano)
+            if state.fase in ("esperando_nombre_registro", "esperando_idioma_registro"):
+                if not recolector_muestras.activo:
+                    recolector_muestras.iniciar()
+                # Copia el frame para el hilo de muestras: solo si sobra tiempo en este frame
+                planificador.ejecutar("muestras", recolector_muestras.ofrecer, frame)
+            elif recolector_muestras.activo:
+                recolector_muestras.detener()
+            
             # ----- FASE 1: Reconocimiento Facial inicial -----
             if state.fase == "reconocimiento_facial":
-                faces = FACE_CASCADE.detectMultiScale(gray, 1.3, 5)
+                # Detectar y codificar todas las caras (la más grande primero).
+                # Si el bucle va lento se reutilizan las caras del frame anterior
+                if pipeline:
+                    # Calculadas en la etapa de caras; vacío en el frame en que se entra en la fase
+                    caras = paquete.datos.get("caras", [])
+                else:
+                    _, caras = planificador.ejecutar("caras", pipeline_facial.procesar, frame, ar.secuencia)
                 
-                if len(faces) > 0:
-                    # Detectar rostro más grande
-                    faces = sorted(faces, key=lambda f: f[2]*f[3], reverse=True)
-                    (x, y, w, h) = faces[0]
+                if len(caras) > 0:
+                    (x, y, w, h) = caras[0]["caja"]
                     
-                    # Dibujar rectángulo
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 3)
+                    # Dibujar rectángulos: la cara principal más gruesa
+                    for cara in caras:
+                        (cx, cy, cw, ch) = cara["caja"]
+                        cv2.rectangle(frame, (cx, cy), (cx+cw, cy+ch), (0, 255, 0), 3 if cara["id"] == 0 else 1)
                     
-                    # Extraer vector facial
-                    vector_facial = extraer_vector_facial(frame, (x, y, w, h))
+                    vector_facial = caras[0]["vector"]
                     
                     if vector_facial is not None:
-                        # Guardar vector actual para uso posterior
+                        # Guardar vectores actuales para uso posterior
                         state.vector_facial_actual = vector_facial
+                        state.vectores_faciales = [cara["vector"] for cara in caras if cara["vector"] is not None]
                         state.cara_detectada = True
                         
                         draw_text_with_background(frame, "¡Cara detectada!", (x, y-15), 
@@ -821,12 +916,11 @@ def main():
 
             # ----- FASE 2: Esperar comando de voz -----
             elif state.fase == "esperando_comando":
-                draw_text_with_background(frame, "BIENVENIDO A LA PLATAFORMA EDUCATIVA DE Kids&Veggies", (50, 60),
-                    color=(255, 255, 255), bg_color=(56,118, 29))
-                draw_text_with_background(frame, "Di: 'iniciar sesion' o 'registrarme'", (50, 100),
-                    color=(255, 255, 255), bg_color=(0, 0, 100))
-                draw_text_with_background(frame, "Esperando comando de voz...", (50, 140),
-                    color=(255, 255, 0), bg_color=(100, 100, 0))
+                dibujar_capa(frame, [
+                    etiqueta("BIENVENIDO A LA PLATAFORMA EDUCATIVA DE Kids&Veggies", (50, 60), bg_color=(56, 118, 29)),
+                    etiqueta("Di: 'iniciar sesion' o 'registrarme'", (50, 100), bg_color=(0, 0, 100)),
+                    etiqueta("Esperando comando de voz...", (50, 140), color=(255, 255, 0), bg_color=(100, 100, 0)),
+                ])
                 
                 if not state.esperando_voz:
                     state.esperando_voz = True
@@ -836,9 +930,9 @@ def main():
                 draw_text_with_background(frame, "Verificando identidad...", (50, alto - 100),
                                         color=(255, 255, 255), bg_color=(0, 100, 100))
                 
-                # Buscar usuario por cara
+                # Buscar usuario por cara (cualquiera de las caras visibles)
                 if hasattr(state, 'vector_facial_actual'):
-                    nombre_encontrado, datos_usuario = buscar_usuario_por_cara(state.vector_facial_actual)
+                    nombre_encontrado, datos_usuario = buscar_usuario_entre_caras(state.vectores_faciales or [state.vector_facial_actual])
                     
                     if nombre_encontrado:
                         # Usuario encontrado - iniciar sesión
@@ -956,22 +1050,16 @@ def main():
                         if hasattr(state, 'idioma_seleccionado'):
                             delattr(state, 'idioma_seleccionado')
                 
-                # Menú principal
-                draw_text_with_background(frame, "MENU PRINCIPAL", (50, 40),
-                                color=(255, 255, 255), bg_color=(0, 100, 0))
-                
+                # Menú principal (capa fija: se compone una vez y se reutiliza mientras no cambie)
                 nombre = state.usuario_nombre or "Usuario"
-                draw_text_with_background(frame, f"Bienvenido, {nombre}", (50, 80),
-                                font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 100))
-                
-                draw_text_with_background(frame, "Di 'cuenta' para administrar tus datos", (50, 120),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
-                draw_text_with_background(frame, "Di 'progreso' para ver tus estadisticas", (50, 160),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
-                draw_text_with_background(frame, "Di 'comenzar' para jugar", (50, 200),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
-                draw_text_with_background(frame, "Di 'salir' para cerrar", (50, 240),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
+                dibujar_capa(frame, [
+                    etiqueta("MENU PRINCIPAL", (50, 40), bg_color=(0, 100, 0)),
+                    etiqueta(f"Bienvenido, {nombre}", (50, 80), bg_color=(0, 0, 100)),
+                    etiqueta("Di 'cuenta' para administrar tus datos", (50, 120), bg_color=(100, 0, 100)),
+                    etiqueta("Di 'progreso' para ver tus estadisticas", (50, 160), bg_color=(100, 0, 100)),
+                    etiqueta("Di 'comenzar' para jugar", (50, 200), bg_color=(100, 0, 100)),
+                    etiqueta("Di 'salir' para cerrar", (50, 240), bg_color=(100, 0, 100)),
+                ])
                 
                 # Activar reconocimiento de voz
                 state.esperando_voz = True
@@ -997,16 +1085,17 @@ def main():
                         draw_text_with_background(frame, f"  Promedio: {stats['promedio_general']:.1f}%", (50, y)); y += 25
 
                         for juego, info in stats["juegos"].items():
-                            draw_text_with_background(frame, f"{juego}: {info['puntuacion_media']:.1f}% ({info['partidas_jugadas']} partidas)", (50, y)); y += 30
+                            texto = f"{juego}: {info['puntuacion_media']:.1f}% ({info['partidas_jugadas']} partidas)"
+                            tendencia = stats.get("tendencias", {}).get(juego)
+                            if tendencia and tendencia["tendencia"] is not None:
+                                texto += f" ultimas: {tendencia['media_reciente']:.0f}% ({tendencia['tendencia']:+.0f})"
+                            draw_text_with_background(frame, texto, (50, y)); y += 30
 
                 draw_text_with_background(frame, "Di 'volver' para regresar al menu", (50, alto - 60), bg_color=(0, 0, 100))
                 state.esperando_voz = True
 
             # ----- FASE 6.2: Acceder a la configuración de la cuenta -----
             elif state.fase == "configuracion_cuenta":
-                draw_text_with_background(frame, "CONFIGURACION DE LA CUENTA", (50, 40),
-                                color=(255, 255, 255), bg_color=(0, 100, 0))
-                
                 nombre = state.usuario_nombre or "Usuario"
                 idioma = state.usuario_data.get("idioma")
                 if idioma == "es":
@@ -1014,17 +1103,14 @@ def main():
                 else: 
                     idioma = "Inglés"
                 
-                draw_text_with_background(frame, f"Nombre: {nombre}", (50, 80),
-                                font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 100))
-                draw_text_with_background(frame, f"Idioma: {idioma}", (50, 120),
-                                font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 120))
-                
-                draw_text_with_background(frame, "Di 'cambiar nombre' para modificar tu nombre", (50, 160),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
-                draw_text_with_background(frame, "Di 'cambiar idioma' para seleccionar un nuevo idioma", (50, 200),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
-                draw_text_with_background(frame, "Di 'volver' para regresar al menu principal", (50, 240),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
+                dibujar_capa(frame, [
+                    etiqueta("CONFIGURACION DE LA CUENTA", (50, 40), bg_color=(0, 100, 0)),
+                    etiqueta(f"Nombre: {nombre}", (50, 80), bg_color=(0, 0, 100)),
+                    etiqueta(f"Idioma: {idioma}", (50, 120), bg_color=(0, 0, 120)),
+                    etiqueta("Di 'cambiar nombre' para modificar tu nombre", (50, 160), bg_color=(100, 0, 100)),
+                    etiqueta("Di 'cambiar idioma' para seleccionar un nuevo idioma", (50, 200), bg_color=(100, 0, 100)),
+                    etiqueta("Di 'volver' para regresar al menu principal", (50, 240), bg_color=(100, 0, 100)),
+                ])
                
                 if hasattr(state, 'error_mensaje'):
                     draw_text_with_background(frame, state.error_mensaje, (50, alto - 190),
@@ -1086,18 +1172,14 @@ def main():
             # ----- FASE 7: Menú para seleccionar modo de juego -----
             elif state.fase == "seleccion_modo":
                 nombre = state.usuario_nombre or "Desconocido"
-                draw_text_with_background(frame, f"Hola, {nombre}", (50, 80),
-                        font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0))
-
-                # Opciones de modo
-                draw_text_with_background(frame, "SELECCIONA MODO DE JUEGO:", (50, 120),
-                                        color=(255, 255, 255), bg_color=(0, 100, 0))
-                draw_text_with_background(frame, "Di 'entrenamiento' para practicar", (50, 160),
-                                        color=(255, 255, 255), bg_color=(0, 0, 100))
-                draw_text_with_background(frame, "Di 'evaluacion' para ser evaluado", (50, 200),
-                                        color=(255, 255, 255), bg_color=(100, 0, 0))
-                draw_text_with_background(frame, "Di 'volver' para regresar al menu principal", (50, 240),
-                                color=(255, 255, 255), bg_color=(100, 0, 100))
+                dibujar_capa(frame, [
+                    etiqueta(f"Hola, {nombre}", (50, 80)),
+                    # Opciones de modo
+                    etiqueta("SELECCIONA MODO DE JUEGO:", (50, 120), bg_color=(0, 100, 0)),
+                    etiqueta("Di 'entrenamiento' para practicar", (50, 160), bg_color=(0, 0, 100)),
+                    etiqueta("Di 'evaluacion' para ser evaluado", (50, 200), bg_color=(100, 0, 0)),
+                    etiqueta("Di 'volver' para regresar al menu principal", (50, 240), bg_color=(100, 0, 100)),
+                ])
                 
                 # Activar reconocimiento de voz
                 state.esperando_voz = True
@@ -1106,76 +1188,68 @@ def main():
             elif state.fase == "seleccion_juego":
                 # Mostrar el modo seleccionado
                 modo = getattr(state, 'modo_juego', 'desconocido')
-                draw_text_with_background(frame, f"MODO: {modo.upper()}", (50, 50),
-                                        color=(255, 255, 255), bg_color=(100, 0, 100))
                 state.gestor_juegos.establecer_modo(modo)
                 
                 # Usar el gestor de juegos para mostrar juegos disponibles
                 juegos_disponibles = state.gestor_juegos.obtener_juegos_disponibles()
                 
-                draw_text_with_background(frame, "SELECCIONA UN JUEGO:", (50, 100),
-                                        color=(255, 255, 255), bg_color=(0, 100, 0))
-                
+                etiquetas = [
+                    etiqueta(f"MODO: {modo.upper()}", (50, 50), bg_color=(100, 0, 100)),
+                    etiqueta("SELECCIONA UN JUEGO:", (50, 100), bg_color=(0, 100, 0)),
+                ]
                 y_pos = 140
                 for key, juego in juegos_disponibles.items():
-                    draw_text_with_background(frame, f"Di '{juego['comando']}' - {juego['nombre']}", 
-                                            (50, y_pos), font_scale=0.7,
-                                            color=(255, 255, 255), bg_color=(0, 0, 100))
+                    etiquetas.append(etiqueta(f"Di '{juego['comando']}' - {juego['nombre']}", (50, y_pos),
+                                              bg_color=(0, 0, 100)))
                     y_pos += 30
-                    draw_text_with_background(frame, f"  {juego['descripcion']}", 
-                                            (70, y_pos), font_scale=0.5,
-                                            color=(200, 200, 200), bg_color=(50, 50, 50))
+                    etiquetas.append(etiqueta(f"  {juego['descripcion']}", (70, y_pos), font_scale=0.5,
+                                              color=(200, 200, 200), bg_color=(50, 50, 50)))
                     y_pos += 40
-                
-                draw_text_with_background(frame, "Di 'volver' para cambiar modo", (50, y_pos),
-                                        font_scale=0.6, color=(255, 255, 0), bg_color=(100, 100, 0))
+                etiquetas.append(etiqueta("Di 'volver' para cambiar modo", (50, y_pos),
+                                          font_scale=0.6, color=(255, 255, 0), bg_color=(100, 100, 0)))
+                dibujar_capa(frame, etiquetas)
                 
                 # Activar reconocimiento de voz
                 state.esperando_voz = True
             
             # ----- FASE 9: Jugando al juego -----
             elif state.fase == "jugando":
+                detectado = paquete is not None and "deteccion" in paquete.datos
+                if corrector and not detectado:
+                    # En modo "mapa" se detecta y se muestra la imagen sin distorsión
+                    # (con pipeline, el hilo de detección ya ha corregido el frame)
+                    frame = corrector.corregir_frame(frame)
+
                 # --- 1. Crear dos frames: uno para deteccion, otro para visualizacion ---
                 frame_limpio = frame.copy()   # Sin modificar, para deteccion y pose
                 frame_visual = frame.copy()   # Aqui ocultaremos marcadores visualmente para mostrar al usuario
 
-                # --- 2. Detectar marcadores sobre frame limpio ---
-                marcadores_actuales = detectar_marcadores_disponibles(frame_limpio, detector, cameraMatrix, distCoeffs)
+                # --- 2. Detectar marcadores sobre frame limpio (una vez; se reutiliza si el bucle va lento) ---
+                if detectado:
+                    # Ya detectado en el hilo de detección mientras se mostraba el frame anterior
+                    deteccion, pose, marcadores_actuales = paquete.datos["deteccion"]
+                else:
+                    _, (deteccion, pose, marcadores_actuales) = planificador.ejecutar(
+                        "deteccion", detectar_marcadores_y_pose, frame_limpio, detector, cameraMatrix, distCoeffs, corrector)
                 state.marcadores_detectados.update(marcadores_actuales)
 
                 # --- 3. Ocultar visualmente los marcadores solo en el frame_visual ---
-                ocultar_marcadores_visualmente(frame_visual, detector)
+                ocultar_marcadores_visualmente(frame_visual, detector, deteccion)
 
                 # --- 4. Renderizar modelos 3D usando poses calculadas en frame_limpio ---
                 juego_actual = getattr(state.gestor_juegos, 'juego_activo', None)
 
-                if juego_actual and (isinstance(juego_actual, JuegoDescubreAR) or 
-                                    isinstance(juego_actual, JuegoMemoriaAR) or 
-                                    isinstance(juego_actual, JuegoEncuentraFrutasAR) or 
-                                    isinstance(juego_actual, JuegoCategoriasAR)):
-                    
-                    marcadores_a_renderizar = []
-                    if hasattr(juego_actual, 'obtener_marcadores_renderizado'):
-                        marcadores_a_renderizar = juego_actual.obtener_marcadores_renderizado()
-
-                    ret_pose, pose = detectar_pose(frame_limpio, 0.19, detector, cameraMatrix, distCoeffs)
-
-                    if ret_pose and pose:
-                        for marker_id in marcadores_a_renderizar:
-                            if marker_id in marcadores_actuales and marker_id in pose:
-                                if marker_id not in escenas:
-                                    modelo = crear_modelo_por_id(marker_id)
-                                    escenas[marker_id] = crear_escena(modelo, cameraMatrix,
-                                                                    int(frame.shape[1]), int(frame.shape[0]))
-                                M = from_opencv_to_pygfx(pose[marker_id][0], pose[marker_id][1])
-                                escenas[marker_id].actualizar_camara(M)
-                                imagen_render = escenas[marker_id].render()
-                                imagen_render_bgr = cv2.cvtColor(imagen_render, cv2.COLOR_RGBA2BGRA)
-                                frame_visual = cuia.alphaBlending(imagen_render_bgr, frame_visual)
+                if isinstance(juego_actual, JuegoAR) and pose:
+                    # Calculado por el gestor en el último evento del juego
+                    marcadores_a_renderizar = [marker_id for marker_id in state.gestor_juegos.descripcion_render.get("marcadores", [])
+                                               if marker_id in marcadores_actuales]
+                    _, frame_visual = planificador.ejecutar("render", renderizar_modelos, frame_visual, pose,
+                                                            marcadores_a_renderizar, calibracion_render,
+                                                            planificador.escala_render)
 
                 # --- 5. Actualizar juego con marcadores detectados ---
                 if state.gestor_juegos and state.gestor_juegos.juego_activo:
-                    state.gestor_juegos.actualizar_marcadores_detectados(marcadores_actuales)
+                    planificador.ejecutar("juego", state.gestor_juegos.actualizar_marcadores_detectados, marcadores_actuales)
 
                 # --- 6. Estado de escucha de voz ---
                 esperando_voz = False
@@ -1301,7 +1375,8 @@ def main():
 
                 # --- 9. Dibujar interfaz del juego ---
                 if state.gestor_juegos:
-                    state.gestor_juegos.dibujar_interfaz(frame_visual)
+                    with planificador.medir("interfaz"):
+                        state.gestor_juegos.dibujar_interfaz(frame_visual)
 
                 # --- 10. Mostrar estado de escucha activo ---
                 if state.esperando_voz:
@@ -1309,79 +1384,11 @@ def main():
                                             (frame_visual.shape[1] - 200, 30), font_scale=0.5,
                                             color=(0, 255, 0), bg_color=(0, 100, 0))
 
-                # --- 11. Guardar puntuacion para JuegoDescubreAR ---
-                if isinstance(juego_actual, JuegoDescubreAR) and juego_actual.juego_terminado:
-                    if not getattr(juego_actual, "puntuacion_guardada", False):
-                        modo = state.gestor_juegos.modo_actual
-                        nombre_juego = juego_actual.obtener_nombre()
-                        
-                        if hasattr(juego_actual, 'resultado_final') and juego_actual.resultado_final:
-                            puntuacion = int(juego_actual.resultado_final.get('precision', 0))
-                        else:
-                            puntuacion_raw = getattr(juego_actual, 'puntuacion', 0)
-                            intentos = getattr(juego_actual, 'intentos', 1)
-                            puntuacion = int((puntuacion_raw / intentos) * 100) if intentos > 0 else 0
-                        
-                        exito = guardar_puntuacion_juego(nombre, modo, nombre_juego, puntuacion)
-                        if exito:
-                            juego_actual.puntuacion_guardada = True
-                            print(f"[OK] Puntuacion guardada: {puntuacion}% para {nombre_juego}")
-
-                # --- 12. Guardar puntuacion para JuegoCategoriasAR ---
-                if isinstance(juego_actual, JuegoCategoriasAR) and juego_actual.juego_terminado:
-                    if not getattr(juego_actual, "puntuacion_guardada", False):
-                        modo = state.gestor_juegos.modo_actual
-                        nombre_juego = juego_actual.obtener_nombre()
-                        
-                        if hasattr(juego_actual, 'resultado_final') and juego_actual.resultado_final:
-                            puntuacion = int(juego_actual.resultado_final.get('porcentaje', 0))
-                        else:
-                            puntuacion_raw = getattr(juego_actual, 'puntuacion', 0)
-                            intentos = getattr(juego_actual, 'intentos', 1)
-                            puntuacion = int((puntuacion_raw / intentos) * 100) if intentos > 0 else 0
-                        
-                        exito = guardar_puntuacion_juego(nombre, modo, nombre_juego, puntuacion)
-                        if exito:
-                            juego_actual.puntuacion_guardada = True
-                            print(f"[OK] Puntuacion guardada: {puntuacion}% para {nombre_juego}")
-                
-                # --- 13. Guardar puntuacion para JuegoEncuentraFrutasAR ---
-                if isinstance(juego_actual, JuegoEncuentraFrutasAR) and juego_actual.juego_terminado:
-                    if not getattr(juego_actual, "puntuacion_guardada", False):
-                        modo = state.gestor_juegos.modo_actual
-                        nombre_juego = juego_actual.obtener_nombre()
-                        
-                        if hasattr(juego_actual, 'resultado_final') and juego_actual.resultado_final:
-                            puntuacion = int(juego_actual.resultado_final.get('precision', 0))
-                        else:
-                            puntuacion_raw = getattr(juego_actual, 'puntuacion', 0)
-                            intentos = getattr(juego_actual, 'intentos', 1)
-                            puntuacion = int((puntuacion_raw / intentos) * 100) if intentos > 0 else 0
-                        
-                        exito = guardar_puntuacion_juego(nombre, modo, nombre_juego, puntuacion)
-                        if exito:
-                            juego_actual.puntuacion_guardada = True
-                            print(f"[OK] Puntuacion guardada: {puntuacion}% para {nombre_juego}")
-
-                # --- 14. Guardar puntuacion para JuegoMemoriaAR ---
-                if isinstance(juego_actual, JuegoMemoriaAR) and juego_actual.juego_terminado:
-                    if not getattr(juego_actual, "puntuacion_guardada", False):
-                        modo = state.gestor_juegos.modo_actual
-                        nombre_juego = juego_actual.obtener_nombre()
-                        
-                        if hasattr(juego_actual, 'resultado_final') and juego_actual.resultado_final:
-                            puntuacion = int(juego_actual.resultado_final.get('porcentaje', 0))
-                        else:
-                            puntuacion_raw = getattr(juego_actual, 'puntuacion', 0)
-                            intentos = getattr(juego_actual, 'intentos', 1)
-                            puntuacion = int((puntuacion_raw / intentos) * 100) if intentos > 0 else 0
-                        
-                        exito = guardar_puntuacion_juego(nombre, modo, nombre_juego, puntuacion)
-                        if exito:
-                            juego_actual.puntuacion_guardada = True
-                            print(f"[OK] Puntuacion guardada: {puntuacion}% para {nombre_juego}")
+                # --- 11. Guardar puntuacion al terminar la partida (baja prioridad) ---
+                if isinstance(juego_actual, JuegoAR) and juego_actual.juego_terminado:
+                    planificador.ejecutar("persistencia", guardar_puntuacion_partida, juego_actual)
 
-                # --- 15. Instrucciones generales ---
+                # --- 12. Instrucciones generales ---
                 instrucciones = []
                 
                 if isinstance(juego_actual, JuegoDescubreAR):
@@ -1418,6 +1425,9 @@ def main():
                 frame = frame_visual
             
             cv2.imshow("Kids&Veggies - AR Learning Game", frame)
+            planificador.terminar_frame()
+            if paquete is not None:
+                pipeline.entregado(paquete)
             
             if state.fase == "salir" or cv2.waitKey(1) == 27:
                 break
@@ -1427,6 +1437,15 @@ def main():
     
     finally:
         voice_thread_active = False
+        if captura_audio:
+            captura_audio.detener()
+        # Escribir las puntuaciones que queden en la cola antes de salir
+        vaciar_cola_puntuaciones()
+        planificador.imprimir_estadisticas()
+        if pipeline:
+            pipeline.detener()
+            pipeline.imprimir_estadisticas()
+        cerrar_servicio_codificacion()
         ar.release()
         cv2.destroyAllWindows()
 
@@ -92,60 +92,70 @@ def crear_modelo_zanahoria():
         modelo.animar(animaciones[0])
     return modelo
 
-# Diccionario de modelos con sus nombres y respuestas correctas
+# Diccionario de modelos con sus nombres, respuestas correctas y otras formas de decirlo
+# (los plurales y las tildes se tienen en cuenta en modules/respuestas.py)
 MODELOS_FRUTAS_VERDURAS = {
     0: {
         'crear_modelo': crear_modelo_pera,
         'nombre': 'pera',
         'respuesta_correcta': 'pera',
+        'sinonimos': [],
         'tipo': 'fruta'
     },
     1: {
         'crear_modelo': crear_modelo_cebolleta,
         'nombre': 'cebolleta',
         'respuesta_correcta': 'cebolleta',
+        'sinonimos': ['cebollino', 'cebollín', 'cebolla verde'],
         'tipo': 'verdura'
     },
     2: {
         'crear_modelo': crear_modelo_cebolla,
         'nombre': 'cebolla',
         'respuesta_correcta': 'cebolla',
+        'sinonimos': [],
         'tipo': 'verdura'
     },
     3: {
         'crear_modelo': crear_modelo_lechuga,
         'nombre': 'lechuga',
         'respuesta_correcta': 'lechuga',
+        'sinonimos': [],
         'tipo': 'verdura'
     },
     4: {
         'crear_modelo': crear_modelo_limon,
         'nombre': 'limón',
         'respuesta_correcta': 'limon',
+        'sinonimos': [],
         'tipo': 'fruta'
     },
     5: {
         'crear_modelo': crear_modelo_pimiento_rojo,
         'nombre': 'pimiento rojo',
         'respuesta_correcta': 'pimiento rojo',
+        'sinonimos': ['pimiento', 'pimentón rojo', 'chile rojo'],
         'tipo': 'verdura'
     },
     6: {
         'crear_modelo': crear_modelo_pimiento_verde,
         'nombre': 'pimiento verde',
         'respuesta_correcta': 'pimiento verde',
+        'sinonimos': ['pimiento', 'pimentón verde', 'chile verde'],
         'tipo': 'verdura'
     },
     7: {
         'crear_modelo': crear_modelo_uvas,
         'nombre': 'uvas',
         'respuesta_correcta': 'uvas',
+        'sinonimos': ['uva', 'racimo', 'racimo de uvas'],
         'tipo': 'fruta'
     },
     8: {
         'crear_modelo': crear_modelo_zanahoria,
         'nombre': 'zanahoria',
         'respuesta_correcta': 'zanahoria',
+        'sinonimos': [],
         'tipo': 'verdura'
     }
 }
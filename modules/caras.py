@@ -0,0 +1,387 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+import face_recognition
+import modules.cuia as cuia
+import config.caras as config_caras
+
+# Clasificador Haar de OpenCV para la detección de caras
+RUTA_CASCADE = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+class DetectorHaar:
+    """Detector Haar, opcionalmente sobre una copia reducida del frame"""
+
+    def __init__(self, escala=1.0):
+        self.cascade = cv2.CascadeClassifier(RUTA_CASCADE)
+        self.escala = escala
+
+    def detectar(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.escala != 1.0:
+            gray = cv2.resize(gray, None, fx=self.escala, fy=self.escala, interpolation=cv2.INTER_AREA)
+        caras = self.cascade.detectMultiScale(gray, 1.3, 5)
+        return [tuple(int(v / self.escala) for v in cara) for cara in caras]
+
+class DetectorYuNet:
+    """Detector DNN YuNet de OpenCV (cv2.FaceDetectorYN)"""
+
+    def __init__(self, ruta_modelo, umbral=0.8):
+        self.detector = cv2.FaceDetectorYN.create(ruta_modelo, "", (320, 320), umbral)
+        self.tam_entrada = None
+
+    def detectar(self, frame):
+        alto, ancho = frame.shape[:2]
+        if self.tam_entrada != (ancho, alto):
+            self.detector.setInputSize((ancho, alto))
+            self.tam_entrada = (ancho, alto)
+        _, caras = self.detector.detect(frame)
+        if caras is None:
+            return []
+        cajas = []
+        for cara in caras:
+            x, y, w, h = (int(v) for v in cara[:4])
+            # YuNet puede devolver cajas que se salen un poco de la imagen
+            x, y = max(x, 0), max(y, 0)
+            w, h = min(w, ancho - x), min(h, alto - y)
+            if w > 0 and h > 0:
+                cajas.append((x, y, w, h))
+        return cajas
+
+class SeguidorCaras:
+    """
+    Detección completa cada cierto número de frames y, entre medias,
+    búsqueda solo en una región alrededor de las últimas caras
+    """
+
+    def __init__(self, detector, intervalo=5, margen=0.5):
+        self.detector = detector
+        self.intervalo = intervalo
+        self.margen = margen
+        self.cajas = []
+        self.frames_desde_deteccion = 0
+
+    def detectar(self, frame):
+        self.frames_desde_deteccion += 1
+        if not self.cajas or self.frames_desde_deteccion >= self.intervalo:
+            return self._deteccion_completa(frame)
+
+        alto, ancho = frame.shape[:2]
+        cajas_seguidas = []
+        for (x, y, w, h) in self.cajas:
+            mx, my = int(w * self.margen), int(h * self.margen)
+            x1, y1 = max(x - mx, 0), max(y - my, 0)
+            x2, y2 = min(x + w + mx, ancho), min(y + h + my, alto)
+            encontradas = self.detector.detectar(frame[y1:y2, x1:x2])
+            if encontradas:
+                cx, cy, cw, ch = max(encontradas, key=lambda c: c[2] * c[3])
+                cajas_seguidas.append((cx + x1, cy + y1, cw, ch))
+
+        if len(cajas_seguidas) < len(self.cajas):
+            # Alguna cara se ha perdido: volvemos a buscar en el frame completo
+            return self._deteccion_completa(frame)
+        self.cajas = cajas_seguidas
+        return self.cajas
+
+    def _deteccion_completa(self, frame):
+        self.cajas = self.detector.detectar(frame)
+        self.frames_desde_deteccion = 0
+        return self.cajas
+
+def crear_detector_caras(nombre=None, seguimiento=True):
+    """Crea el detector de caras indicado (por defecto el de config/caras.py)"""
+    nombre = nombre or config_caras.DETECTOR
+
+    if nombre == "yunet":
+        if os.path.exists(config_caras.MODELO_YUNET):
+            detector = DetectorYuNet(config_caras.MODELO_YUNET, config_caras.UMBRAL_YUNET)
+        else:
+            print(f" No se encuentra el modelo YuNet ({config_caras.MODELO_YUNET}), se usa Haar reducido")
+            detector = DetectorHaar(config_caras.ESCALA_HAAR)
+    elif nombre == "haar_reducido":
+        detector = DetectorHaar(config_caras.ESCALA_HAAR)
+    elif nombre == "haar":
+        detector = DetectorHaar()
+    else:
+        raise ValueError(f"Detector de caras desconocido: {nombre}")
+
+    if seguimiento and config_caras.INTERVALO_DETECCION > 1:
+        return SeguidorCaras(detector, config_caras.INTERVALO_DETECCION, config_caras.MARGEN_ROI)
+    return detector
+
+# ----- SERVICIO DE CODIFICACIÓN EN OTROS PROCESOS -----
+# face_encodings (la ResNet de dlib) compite por la CPU con el bucle de vídeo aunque vaya en
+# un hilo. Se reparte en un pool de procesos; el frame RGB se copia una vez a memoria
+# compartida y a los trabajadores solo les llega su nombre, la forma y las cajas.
+
+# Memorias compartidas y buses de frames ya abiertos por el proceso trabajador (por nombre)
+_memorias_trabajador = {}
+_buses_trabajador = {}
+
+def _iniciar_trabajador():
+    """Arranque de cada proceso: los modelos de dlib se cargan al importar face_recognition"""
+    cv2.setNumThreads(1)
+    face_recognition.face_encodings(np.zeros((8, 8, 3), dtype=np.uint8), [(0, 8, 8, 0)])
+
+def _abrir_memoria(nombre):
+    memoria = _memorias_trabajador.get(nombre)
+    if memoria is None:
+        try:
+            # Python 3.13+: sin registrar en el resource tracker, la memoria es del proceso principal
+            memoria = shared_memory.SharedMemory(name=nombre, track=False)
+        except TypeError:
+            memoria = shared_memory.SharedMemory(name=nombre)
+        _memorias_trabajador[nombre] = memoria
+    return memoria
+
+def _codificar_en_trabajador(nombre, forma, face_locations):
+    memoria = _abrir_memoria(nombre)
+    rgb_frame = np.ndarray(forma, dtype=np.uint8, buffer=memoria.buf)
+    return [encoding.tolist() for encoding in face_recognition.face_encodings(rgb_frame, face_locations)]
+
+def _codificar_desde_bus(descriptor, secuencia, face_locations):
+    """Codifica leyendo el frame directamente del bus de la cámara; None si ya se ha sobrescrito"""
+    bus = _buses_trabajador.get(descriptor["nombre"])
+    if bus is None:
+        bus = _buses_trabajador[descriptor["nombre"]] = cuia.busFrames.conectar(descriptor)
+    _, frame = bus.leer(secuencia)
+    if frame is None:
+        return None
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    # El hueco se ha podido reutilizar mientras se convertía
+    if not bus.vigente(secuencia):
+        return None
+    return [encoding.tolist() for encoding in face_recognition.face_encodings(rgb_frame, face_locations)]
+
+class ServicioCodificacion:
+    """
+    Pool de procesos que codifican caras. Cada llamada ocupa un hueco de memoria compartida
+    hasta que el trabajador termina; si no queda ninguno libre, espera a que se libere
+    """
+
+    def __init__(self, trabajadores=None, huecos=None):
+        self.trabajadores = trabajadores if trabajadores is not None else config_caras.TRABAJADORES_CODIFICACION
+        num_huecos = huecos or config_caras.HUECOS_MEMORIA_COMPARTIDA
+        self._lock_pool = threading.Lock()
+        self.pool = self._crear_pool()
+        self.huecos = [None] * num_huecos
+        self.libres = queue.Queue()
+        for i in range(num_huecos):
+            self.libres.put(i)
+
+    def _crear_pool(self):
+        # spawn: los procesos no heredan los hilos de cámara y voz del proceso principal
+        return ProcessPoolExecutor(max_workers=self.trabajadores,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_iniciar_trabajador)
+
+    def _hueco(self, i, tam):
+        """Memoria del hueco i con al menos tam bytes (se recrea si el frame ha crecido)"""
+        memoria = self.huecos[i]
+        if memoria is None or memoria.size < tam:
+            if memoria is not None:
+                memoria.close()
+                memoria.unlink()
+            memoria = self.huecos[i] = shared_memory.SharedMemory(create=True, size=tam)
+        return memoria
+
+    def codificar(self, frame, face_locations):
+        """Vectores (listas) de las caras de un frame BGR; face_locations en formato de face_recognition"""
+        i = self.libres.get()
+        try:
+            memoria = self._hueco(i, frame.size)
+            rgb_frame = np.ndarray(frame.shape, dtype=np.uint8, buffer=memoria.buf)
+            # La conversión escribe directamente en la memoria compartida
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+            del rgb_frame
+            pool = self.pool
+            return self._resultado(pool, pool.submit(_codificar_en_trabajador, memoria.name, frame.shape, face_locations))
+        finally:
+            self.libres.put(i)
+
+    def codificar_desde_bus(self, bus, secuencia, face_locations):
+        """
+        Como codificar, pero el trabajador lee el frame del bus de la cámara sin copiarlo.
+        None si el frame ya no está en el bus (el llamador usa entonces codificar)
+        """
+        pool = self.pool
+        return self._resultado(pool, pool.submit(_codificar_desde_bus, bus.descriptor(), secuencia, face_locations))
+
+    def _resultado(self, pool, futuro):
+        """Espera al trabajador como mucho TIMEOUT_CODIFICACION; lanza TimeoutError o BrokenProcessPool"""
+        try:
+            return futuro.result(timeout=config_caras.TIMEOUT_CODIFICACION)
+        except FuturesTimeoutError:
+            # Una llamada a dlib colgada: se terminan sus procesos para que las siguientes
+            # no se queden esperando detrás de ella
+            futuro.cancel()
+            self._reemplazar_pool(pool, terminar=True)
+            raise
+        except BrokenProcessPool:
+            # Un trabajador ha muerto (p. ej. un fallo dentro de dlib): pool nuevo para las siguientes
+            self._reemplazar_pool(pool)
+            raise
+
+    def _reemplazar_pool(self, pool, terminar=False):
+        with self._lock_pool:
+            if self.pool is not pool:
+                return
+            self.pool = self._crear_pool()
+        if terminar:
+            # ProcessPoolExecutor no tiene forma pública de matar un trabajador ocupado
+            for proceso in list((getattr(pool, "_processes", None) or {}).values()):
+                proceso.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def cerrar(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for i, memoria in enumerate(self.huecos):
+            if memoria is not None:
+                memoria.close()
+                memoria.unlink()
+                self.huecos[i] = None
+
+# Un único servicio para todo el proceso (reconocimiento, recolector de muestras...)
+_servicio = None
+_lock_servicio = threading.Lock()
+
+def obtener_servicio_codificacion():
+    """Servicio compartido, creado al primer uso; None si la codificación va en el propio proceso"""
+    global _servicio
+    if config_caras.TRABAJADORES_CODIFICACION <= 0:
+        return None
+    with _lock_servicio:
+        if _servicio is None:
+            _servicio = ServicioCodificacion()
+        return _servicio
+
+def cerrar_servicio_codificacion():
+    global _servicio
+    with _lock_servicio:
+        if _servicio is not None:
+            _servicio.cerrar()
+            _servicio = None
+
+class PipelineFacial:
+    """Detección y codificación de todas las caras de un frame"""
+
+    def __init__(self, detector=None, servicio=None, bus=None):
+        self.detector = detector or crear_detector_caras()
+        # Se pide al primer uso: así crear el pipeline no arranca procesos
+        self.servicio = servicio
+        # Bus de frames de la cámara (cuia.busFrames): los trabajadores leen de él sin copias
+        self.bus = bus
+
+    def detectar(self, frame):
+        """Devuelve las cajas (x, y, w, h) de las caras, de mayor a menor tamaño"""
+        cajas = list(self.detector.detectar(frame))
+        cajas.sort(key=lambda c: c[2] * c[3], reverse=True)
+        return cajas
+
+    def codificar(self, frame, cajas, secuencia=None):
+        """
+        Codifica todas las cajas con una única conversión BGR->RGB y una única
+        llamada a face_recognition.face_encodings, en el pool de procesos si está activo.
+        secuencia es la del frame en el bus de la cámara, si se conoce
+        """
+        if not cajas:
+            return []
+        # formato de face_recognition: (top, right, bottom, left)
+        face_locations = [(y, x + w, y + h, x) for (x, y, w, h) in cajas]
+        servicio = self.servicio or obtener_servicio_codificacion()
+        if servicio is not None:
+            try:
+                if self.bus is not None and secuencia is not None:
+                    vectores = servicio.codificar_desde_bus(self.bus, secuencia, face_locations)
+                    if vectores is not None:
+                        return vectores
+                return servicio.codificar(frame, face_locations)
+            except (FuturesTimeoutError, BrokenProcessPool) as e:
+                # Trabajador colgado o caído: este frame se codifica en el propio proceso
+                print(f"Codificacion facial en el propio proceso: {type(e).__name__} en el trabajador")
+            except Exception as e:
+                print(f"Error extrayendo vectores faciales: {e}")
+                return [None] * len(cajas)
+        try:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+        except Exception as e:
+            print(f"Error extrayendo vectores faciales: {e}")
+            return [None] * len(cajas)
+        # Convertir a lista para JSON
+        return [encoding.tolist() for encoding in encodings]
+
+    def procesar(self, frame, secuencia=None):
+        """
+        Detecta y codifica las caras del frame.
+        Retorna una lista de diccionarios {"id", "caja", "vector"} con la cara más grande primero
+        """
+        cajas = self.detectar(frame)
+        vectores = self.codificar(frame, cajas, secuencia)
+        return [{"id": i, "caja": caja, "vector": vector}
+                for i, (caja, vector) in enumerate(zip(cajas, vectores))]
+
+class RecolectorMuestras:
+    """
+    Recoge en segundo plano varias codificaciones de la cara principal durante el registro,
+    para guardar un centroide y ejemplares en lugar de un único vector
+    """
+
+    def __init__(self, pipeline=None, max_muestras=8, intervalo=0.4):
+        self.pipeline = pipeline or PipelineFacial(crear_detector_caras(seguimiento=False))
+        self.max_muestras = max_muestras
+        self.intervalo = intervalo
+        self.activo = False
+        self._muestras = []
+        self._frame = None
+        self._ultima_muestra = 0
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        with self._lock:
+            self._muestras = []
+        self._frame = None
+        self.activo = True
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self.activo = False
+        self._evento.set()
+
+    def ofrecer(self, frame):
+        """Entrega un frame al hilo de codificación sin bloquear (se descarta si está ocupado)"""
+        ahora = time.time()
+        if (not self.activo or self._frame is not None or len(self._muestras) >= self.max_muestras
+                or ahora - self._ultima_muestra < self.intervalo):
+            return
+        self._ultima_muestra = ahora
+        self._frame = frame.copy()
+        self._evento.set()
+
+    def muestras(self):
+        with self._lock:
+            return list(self._muestras)
+
+    def _bucle(self):
+        while self.activo:
+            self._evento.wait(0.5)
+            self._evento.clear()
+            frame = self._frame
+            if frame is None:
+                continue
+            cajas = self.pipeline.detectar(frame)[:1]
+            vectores = self.pipeline.codificar(frame, cajas)
+            if vectores and vectores[0] is not None:
+                with self._lock:
+                    self._muestras.append(vectores[0])
+            self._frame = None
@@ -4,6 +4,9 @@ import matplotlib as mpl
 from matplotlib import pyplot as plt
 import time
 import os
+import sys
+import json
+from multiprocessing import shared_memory
 from wgpu.gui.offscreen import WgpuCanvas # Para el render offscreen
 import pygfx as gfx
 import pylinalg as la # Álgebra lineal para las transformaciones geométricas
@@ -48,7 +51,83 @@ def plot(image, titulo=None, axis=False):
         plt.imshow( cv2.cvtColor(image, cv2.COLOR_BGR2RGB) , aspect='equal')
 
 
-def bestBackend(camid):
+def firmaCamara(camid):
+    # Identifica el dispositivo para saber si la caché de la cámara sigue siendo válida
+    firma = {
+        "camid": camid,
+        "plataforma": sys.platform,
+        "opencv": cv2.__version__,
+        "backends": [int(b) for b in cv2.videoio_registry.getCameraBackends()]
+    }
+    if isinstance(camid, int):
+        # En Linux el nombre del dispositivo V4L2 cambia si se conecta otra webcam
+        ruta_nombre = f"/sys/class/video4linux/video{camid}/name"
+        if os.path.exists(ruta_nombre):
+            with open(ruta_nombre, "r", encoding="utf-8") as f:
+                firma["nombre"] = f.read().strip()
+    return firma
+
+def leerCacheCamara(ruta, camid):
+    if not ruta or not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entrada = cache.get(str(camid))
+    if entrada is None or entrada.get("firma") != firmaCamara(camid):
+        return None
+    return entrada
+
+def guardarCacheCamara(ruta, camid, backend, formato=None):
+    cache = {}
+    if os.path.exists(ruta):
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    entrada = cache.get(str(camid), {})
+    if entrada.get("firma") != firmaCamara(camid) or entrada.get("backend") != int(backend):
+        entrada = {}
+    entrada["firma"] = firmaCamara(camid)
+    entrada["backend"] = int(backend)
+    if formato is not None:
+        entrada["formato"] = formato
+    cache[str(camid)] = entrada
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+def formatoCaptura(cap):
+    # Resolución, FPS, FOURCC y tamaño de buffer que el driver ha concedido realmente
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return {
+        "ancho": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "alto": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": float(cap.get(cv2.CAP_PROP_FPS)),
+        "fourcc": "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)) if fourcc > 0 else "",
+        "buffer": int(cap.get(cv2.CAP_PROP_BUFFERSIZE))
+    }
+
+# Perfiles de captura para webcams UVC. Con MJPG el driver puede dar 1080p30 o 720p60,
+# mientras que en YUYV se queda en pocos FPS. Un buffer de 1 frame reduce la latencia.
+PERFILES_CAPTURA = {
+    "mjpg_1080p30": {"fourcc": "MJPG", "ancho": 1920, "alto": 1080, "fps": 30, "buffer": 1},
+    "mjpg_720p60": {"fourcc": "MJPG", "ancho": 1280, "alto": 720, "fps": 60, "buffer": 1},
+    "mjpg_720p30": {"fourcc": "MJPG", "ancho": 1280, "alto": 720, "fps": 30, "buffer": 1},
+    "yuyv_480p30": {"fourcc": "YUYV", "ancho": 640, "alto": 480, "fps": 30, "buffer": 1}
+}
+
+def bestBackend(camid, cache=None):
+    # Si hay caché para este dispositivo no volvemos a abrir la cámara con cada backend
+    if cache is not None:
+        entrada = leerCacheCamara(cache, camid)
+        if entrada is not None:
+            return entrada["backend"]
     backends = cv2.videoio_registry.getCameraBackends()
     bestCap = 0
     bestTime = 999
@@ -61,12 +140,84 @@ def bestBackend(camid):
                 bestTime = end-start
                 bestCap = b
             cam.release()
+    if cache is not None:
+        guardarCacheCamara(cache, camid, bestCap)
     return bestCap
 
+class busFrames:
+    # Anillo de frames en memoria compartida para que otros procesos lean la cámara sin copias.
+    # Cabecera: la secuencia del frame que hay en cada hueco (-1 mientras se escribe) y la del
+    # último frame publicado. Un lector obtiene una vista numpy del hueco y, al terminar de
+    # usarla, comprueba con vigente() que el escritor no lo ha reutilizado entre medias.
+    def __init__(self, ancho, alto, canales=3, huecos=8, nombre=None):
+        self.forma = (alto, ancho, canales)
+        self.huecos = huecos
+        self._propietario = nombre is None
+        tamCabecera = (huecos + 1) * 8
+        if self._propietario:
+            self._shm = shared_memory.SharedMemory(create=True, size=tamCabecera + huecos * alto * ancho * canales)
+        else:
+            try:
+                # Python 3.13+: el proceso que lo creó es el único que lo libera
+                self._shm = shared_memory.SharedMemory(name=nombre, track=False)
+            except TypeError:
+                self._shm = shared_memory.SharedMemory(name=nombre)
+        self._secuencias = np.ndarray((huecos + 1,), dtype=np.int64, buffer=self._shm.buf)
+        self._frames = np.ndarray((huecos,) + self.forma, dtype=np.uint8, buffer=self._shm.buf, offset=tamCabecera)
+        if self._propietario:
+            self._secuencias[:] = -1
+
+    @classmethod
+    def conectar(cls, descriptor):
+        # Abre desde otro proceso un bus creado con descriptor()
+        alto, ancho, canales = descriptor["forma"]
+        return cls(ancho, alto, canales, descriptor["huecos"], nombre=descriptor["nombre"])
+
+    def descriptor(self):
+        # Lo necesario para conectar() desde otro proceso (se puede enviar por una cola)
+        return {"nombre": self._shm.name, "forma": self.forma, "huecos": self.huecos}
+
+    def escribir(self, frame):
+        # Publica un frame y devuelve su número de secuencia
+        if frame.shape != self.forma:
+            raise ValueError(f"El frame {frame.shape} no cabe en el bus {self.forma}")
+        secuencia = int(self._secuencias[-1]) + 1
+        hueco = secuencia % self.huecos
+        self._secuencias[hueco] = -1
+        np.copyto(self._frames[hueco], frame)
+        self._secuencias[hueco] = secuencia
+        self._secuencias[-1] = secuencia
+        return secuencia
+
+    def ultimo(self):
+        return int(self._secuencias[-1])
+
+    def leer(self, secuencia=None):
+        # (secuencia, vista del frame) sin copiar; por defecto el último. (None, None) si ya no está
+        if secuencia is None:
+            secuencia = self.ultimo()
+        if secuencia < 0 or not self.vigente(secuencia):
+            return None, None
+        return secuencia, self._frames[secuencia % self.huecos]
+
+    def vigente(self, secuencia):
+        return int(self._secuencias[secuencia % self.huecos]) == secuencia
+
+    def cerrar(self):
+        # Las vistas numpy deben soltarse antes de cerrar la memoria
+        self._secuencias = None
+        self._frames = None
+        self._shm.close()
+        if self._propietario:
+            self._shm.unlink()
+
 class myVideo:
-    def __init__(self, source, backend=cv2.CAP_ANY):
+    def __init__(self, source, backend=cv2.CAP_ANY, perfil=None):
         self.loop = False      #Para indicar si el video reiniciará al terminar
         self.process = None    #Para indicar la función opcional de procesado de frames
+        self.perfil = None     #Perfil de captura solicitado (ver PERFILES_CAPTURA)
+        self.bus = None        #Bus de frames en memoria compartida (ver publicar)
+        self.secuencia = None  #Secuencia en el bus del último frame leído
         if isinstance(source, str):
             if os.path.exists(source):
                 self._cap = cv2.VideoCapture(source)
@@ -82,12 +233,46 @@ class myVideo:
         elif isinstance(source, int):
             self._cap = cv2.VideoCapture(source, backend)
             self._camera = True
+            if perfil is not None:
+                self.aplicarPerfil(perfil)
+
+    def aplicarPerfil(self, perfil):
+        # Acepta el nombre de un perfil de PERFILES_CAPTURA o un diccionario con las mismas claves
+        if isinstance(perfil, str):
+            if perfil not in PERFILES_CAPTURA:
+                raise ValueError(f"Perfil de captura desconocido: {perfil}")
+            perfil = PERFILES_CAPTURA[perfil]
+        # El FOURCC se fija antes que la resolución para que el driver ofrezca los modos comprimidos
+        if perfil.get("fourcc"):
+            self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*perfil["fourcc"]))
+        if perfil.get("ancho") and perfil.get("alto"):
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, perfil["ancho"])
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, perfil["alto"])
+        if perfil.get("fps"):
+            self._cap.set(cv2.CAP_PROP_FPS, perfil["fps"])
+        if perfil.get("buffer") is not None:
+            self._cap.set(cv2.CAP_PROP_BUFFERSIZE, perfil["buffer"])
+        self.perfil = dict(perfil)
+        return self.formato()
+
+    def formato(self):
+        # Lo que el driver ha concedido, que puede diferir de lo pedido en el perfil
+        return formatoCaptura(self._cap)
+
+    def publicar(self, huecos=8):
+        # Publica cada frame capturado (antes de process) en un busFrames para otros procesos
+        formato = self.formato()
+        self.bus = busFrames(formato["ancho"], formato["alto"], 3, huecos)
+        return self.bus
 
     def __del__(self):
         self._cap.release()
 
     def release(self):
         self._cap.release()
+        if self.bus is not None:
+            self.bus.cerrar()
+            self.bus = None
         del self
 
     def isOpened(self):
@@ -96,6 +281,9 @@ class myVideo:
     def read(self):
         if self._camera:
             ret, frame = self._cap.read()
+            self.secuencia = None
+            if ret and self.bus is not None and frame.shape == self.bus.forma:
+                self.secuencia = self.bus.escribir(frame)
             if ret and self.process != None:
                 frame = self.process(frame)
             return(ret, frame)
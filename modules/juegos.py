@@ -1,12 +1,24 @@
 import modules.cuia as cuia
-import numpy as np
 import random
 import time
-import cv2
-from models.modelos import MODELOS_FRUTAS_VERDURAS, crear_modelo_por_id, obtener_info_modelo
+import threading
+from models.modelos import MODELOS_FRUTAS_VERDURAS, obtener_info_modelo
+from modules.respuestas import menciona, ids_mencionados
+from modules.texto import dibujar_texto, dibujar_capa, etiqueta
+from config.juegos import JUEGOS, COMANDOS_REPETIR, COMANDOS_SALIR
+
+ETIQUETAS_TIPO = {"fruta": "[FRUTA]", "verdura": "[VERDURA]"}
+
+# Cada cuánto se avisa al juego aunque no cambie ningún marcador (para sus temporizadores)
+INTERVALO_TICK_JUEGO = 0.25
 
 class GestorJuegosAR:
-    """Gestor de juegos para la aplicación AR"""
+    """
+    Gestor de juegos para la aplicación AR.
+    El juego activo solo se actualiza con eventos: aparece o se pierde un marcador,
+    vence el temporizador (INTERVALO_TICK_JUEGO) o llega un comando de voz. Lo que hay
+    que dibujar se guarda en descripcion_render y solo se recalcula tras un evento.
+    """
     
     def __init__(self):
         self.juego_activo = None
@@ -14,37 +26,31 @@ class GestorJuegosAR:
         self.modo_actual = None  # "entrenamiento" o "evaluacion"
         self.tipo_juego_actual = None
         self.mensajes_pantalla = []
-        self.modelos_activos = []
+        self.modelos_activos = []  # IDs de los modelos que muestra el juego
         self.esperando_respuesta = False
         self.respuesta_usuario = ""
         self.tiempo_ultima_accion = time.time()
         self.puntuacion_guardada = False  
         
-        # Juegos disponibles por modo
-        self.juegos_entrenamiento = {
-            "descubre": {
-                "nombre": "Descubre y Nombra",
-                "descripcion": "Aprende el nombre de frutas y verduras",
-                "comando": "descubre"
-            },
-            "frutas": {
-                "nombre": "Encuentra las Frutas", 
-                "descripcion": "Identifica solo las frutas",
-                "comando": "frutas"
-            }
-        }
+        # Estado para el manejo por eventos
+        self.marcadores_visibles = frozenset()
+        self.tiempo_ultimo_tick = 0
+        self.descripcion_render = {}
+        # El hilo de voz y el bucle de vídeo envían eventos al mismo juego
+        self._lock = threading.RLock()
+        
+        # Juegos disponibles por modo (definidos en config/juegos.py)
+        self.juegos_entrenamiento = self._juegos_del_modo("entrenamiento")
+        self.juegos_evaluacion = self._juegos_del_modo("evaluacion")
         
-        self.juegos_evaluacion = {
-            "categorias": {
-                "nombre": "Agrupa por Categorias",
-                "descripcion": "Separa frutas de verduras", 
-                "comando": "categorias"
-            },
-            "memoria": {
-                "nombre": "Juego de Memoria",
-                "descripcion": "Recuerda la secuencia",
-                "comando": "memoria"
+    def _juegos_del_modo(self, modo):
+        return {
+            clave: {
+                "nombre": definicion["titulo_menu"],
+                "descripcion": definicion["descripcion"],
+                "comando": definicion["comando"]
             }
+            for clave, definicion in JUEGOS.items() if definicion["modo"] == modo
         }
         
     def establecer_modo(self, modo):
@@ -53,6 +59,7 @@ class GestorJuegosAR:
         self.estado_juego = "menu_juegos"
         self.mensajes_pantalla = [f"Modo {modo.upper()} seleccionado"]
         self.puntuacion_guardada = False 
+        self._actualizar_descripcion()
         
     def obtener_juegos_disponibles(self):
         """Devuelve los juegos disponibles según el modo actual"""
@@ -70,18 +77,17 @@ class GestorJuegosAR:
         self.mensajes_pantalla = []
         self.tiempo_ultima_accion = time.time()
         self.puntuacion_guardada = False 
+        self.marcadores_visibles = frozenset()
+        self.tiempo_ultimo_tick = time.time()
         
-        if tipo_juego == "descubre":
-            self.juego_activo = JuegoDescubreAR()
-        elif tipo_juego == "frutas":
-            self.juego_activo = JuegoEncuentraFrutasAR()
-        elif tipo_juego == "categorias":
-            self.juego_activo = JuegoCategoriasAR()
-        elif tipo_juego == "memoria":
-            self.juego_activo = JuegoMemoriaAR()
+        if tipo_juego in JUEGOS:
+            # Los juegos sin clase propia los ejecuta directamente el motor
+            clase = CLASES_JUEGO.get(tipo_juego, JuegoAR)
+            self.juego_activo = clase(JUEGOS[tipo_juego])
         else:
             self.mensajes_pantalla = ["Juego no encontrado"]
             self.estado_juego = "menu_juegos"
+            self._actualizar_descripcion()
             return
             
         # Inicializar el juego
@@ -103,8 +109,7 @@ class GestorJuegosAR:
                 return "volver_modo"
                 
         elif self.estado_juego == "en_juego" and self.juego_activo:
-            resultado = self.juego_activo.procesar_comando(comando)
-            self.procesar_resultado_juego(resultado)
+            self.procesar_voz_juego(comando)
             return True
             
         elif self.estado_juego == "resultados":
@@ -115,17 +120,42 @@ class GestorJuegosAR:
                 else:
                     self.estado_juego = "menu_juegos"
                     self.puntuacion_guardada = False  
+                    self._actualizar_descripcion()
                 return True
             elif "menu" in comando or "volver" in comando:
                 self.estado_juego = "menu_juegos"
                 self.puntuacion_guardada = False  
+                self._actualizar_descripcion()
                 return True
                 
         return False
+    
+    def resetear(self):
+        """Termina el juego activo y vuelve al menú de juegos"""
+        with self._lock:
+            self.juego_activo = None
+            self.tipo_juego_actual = None
+            self.estado_juego = "menu_juegos"
+            self.mensajes_pantalla = []
+            self.modelos_activos = []
+            self.marcadores_visibles = frozenset()
+            self.puntuacion_guardada = False
+            self._actualizar_descripcion()
+    
+    def procesar_voz_juego(self, texto):
+        """Evento de voz para el juego activo. Retorna el resultado del juego (o None)"""
+        with self._lock:
+            if not self.juego_activo or not hasattr(self.juego_activo, 'procesar_comando'):
+                return None
+            resultado = self.juego_activo.procesar_comando(texto)
+            # Aunque el juego no devuelva nada puede haber cambiado su estado (p. ej. una respuesta parcial)
+            self.procesar_resultado_juego(resultado)
+            return resultado
         
     def procesar_resultado_juego(self, resultado):
         """Procesa el resultado devuelto por un juego"""
         if not resultado:
+            self._actualizar_descripcion()
             return
             
         if "mensajes" in resultado:
@@ -143,6 +173,25 @@ class GestorJuegosAR:
             elif resultado["estado"] == "menu":
                 self.estado_juego = "menu_juegos"
                 self.puntuacion_guardada = False  
+        
+        self._actualizar_descripcion()
+    
+    def _actualizar_descripcion(self):
+        """Recalcula lo que hay que dibujar; solo se llama cuando el juego cambia"""
+        juego = self.juego_activo
+        descripcion = {
+            "estado_juego": self.estado_juego,
+            "nombre": juego.obtener_nombre() if juego else None,
+            "puntuacion": None,
+            "mensajes": list(self.mensajes_pantalla),
+            "resultados": [],
+            "marcadores": self.obtener_marcadores_para_renderizar(),
+        }
+        if juego and hasattr(juego, 'obtener_puntuacion'):
+            descripcion["puntuacion"] = juego.obtener_puntuacion()
+        if juego and self.estado_juego == "resultados" and hasattr(juego, 'obtener_resultados'):
+            descripcion["resultados"] = juego.obtener_resultados()
+        self.descripcion_render = descripcion
     
     def juego_terminado(self):
         """Verifica si el juego actual ha terminado"""
@@ -178,10 +227,25 @@ class GestorJuegosAR:
         return datos
                 
     def actualizar_marcadores_detectados(self, marcadores_detectados):
-        """Actualiza los marcadores detectados en el juego actual"""
-        if self.juego_activo and hasattr(self.juego_activo, 'actualizar_marcadores'):
+        """
+        Avisa al juego actual solo si ha aparecido o desaparecido algún marcador,
+        o si ha pasado INTERVALO_TICK_JUEGO desde el último aviso.
+        Retorna True si el juego se ha actualizado
+        """
+        if not self.juego_activo or not hasattr(self.juego_activo, 'actualizar_marcadores'):
+            return False
+        
+        visibles = frozenset(marcadores_detectados)
+        ahora = time.time()
+        if visibles == self.marcadores_visibles and ahora - self.tiempo_ultimo_tick < INTERVALO_TICK_JUEGO:
+            return False
+        
+        with self._lock:
+            self.marcadores_visibles = visibles
+            self.tiempo_ultimo_tick = ahora
             resultado = self.juego_activo.actualizar_marcadores(marcadores_detectados)
             self.procesar_resultado_juego(resultado)
+        return True
             
     def dibujar_interfaz(self, frame):
         """Dibuja la interfaz del sistema de juegos en el frame"""
@@ -200,45 +264,43 @@ class GestorJuegosAR:
                                           font_scale=0.8, color=(255, 255, 255), bg_color=(100, 0, 100))
             
     def _dibujar_menu_juegos(self, frame):
-        """Dibuja el menú de selección de juegos"""
+        """Dibuja el menú de selección de juegos (capa fija, ver modules/texto.py)"""
         y_pos = 80
-        self._draw_text_with_background(frame, "SELECCIONA UN JUEGO:", (50, y_pos),
-                                      color=(255, 255, 255), bg_color=(0, 100, 0))
+        etiquetas = [etiqueta("SELECCIONA UN JUEGO:", (50, y_pos), font_scale=0.8, bg_color=(0, 100, 0))]
         y_pos += 50
         
         juegos = self.obtener_juegos_disponibles()
         for key, juego in juegos.items():
-            self._draw_text_with_background(frame, f"Di '{juego['comando']}' - {juego['nombre']}", 
-                                          (50, y_pos), font_scale=0.7,
-                                          color=(255, 255, 255), bg_color=(0, 0, 100))
+            etiquetas.append(etiqueta(f"Di '{juego['comando']}' - {juego['nombre']}", (50, y_pos),
+                                      bg_color=(0, 0, 100)))
             y_pos += 30
-            self._draw_text_with_background(frame, f"  {juego['descripcion']}", 
-                                          (70, y_pos), font_scale=0.5,
-                                          color=(200, 200, 200), bg_color=(50, 50, 50))
+            etiquetas.append(etiqueta(f"  {juego['descripcion']}", (70, y_pos), font_scale=0.5,
+                                      color=(200, 200, 200), bg_color=(50, 50, 50)))
             y_pos += 40
             
-        self._draw_text_with_background(frame, "Di 'volver' para cambiar modo", (50, y_pos),
-                                      font_scale=0.6, color=(255, 255, 0), bg_color=(100, 100, 0))
+        etiquetas.append(etiqueta("Di 'volver' para cambiar modo", (50, y_pos),
+                                  font_scale=0.6, color=(255, 255, 0), bg_color=(100, 100, 0)))
+        dibujar_capa(frame, etiquetas)
         
     def _dibujar_juego_activo(self, frame):
         """Dibuja la interfaz del juego activo"""
         if not self.juego_activo:
             return
             
+        descripcion = self.descripcion_render
+        
         # Título del juego
-        nombre_juego = self.juego_activo.obtener_nombre()
-        self._draw_text_with_background(frame, nombre_juego, (50, 80),
+        self._draw_text_with_background(frame, descripcion.get("nombre") or "", (50, 80),
                                       font_scale=1.0, color=(255, 255, 255), bg_color=(0, 100, 0))
         
         # Puntuación si está disponible
-        if hasattr(self.juego_activo, 'obtener_puntuacion'):
-            puntuacion = self.juego_activo.obtener_puntuacion()
-            self._draw_text_with_background(frame, f"Puntuacion: {puntuacion}", (50, 120),
+        if descripcion.get("puntuacion") is not None:
+            self._draw_text_with_background(frame, f"Puntuacion: {descripcion['puntuacion']}", (50, 120),
                                           font_scale=0.7, color=(255, 255, 0), bg_color=(100, 100, 0))
         
         # Mensajes del juego
         y_pos = 160
-        for mensaje in self.mensajes_pantalla:
+        for mensaje in descripcion.get("mensajes", []):
             self._draw_text_with_background(frame, mensaje, (50, y_pos),
                                           font_scale=0.7, color=(255, 255, 255), bg_color=(0, 50, 100))
             y_pos += 35
@@ -254,29 +316,15 @@ class GestorJuegosAR:
                                       font_scale=1.2, color=(255, 255, 255), bg_color=(0, 150, 0))
         
         # Mostrar resultados
-        if hasattr(self.juego_activo, 'obtener_resultados'):
-            resultados = self.juego_activo.obtener_resultados()
-            y_pos = 130
-            for resultado in resultados:
-                self._draw_text_with_background(frame, resultado, (50, y_pos),
-                                              font_scale=0.8, color=(255, 255, 255), bg_color=(0, 100, 0))
-                y_pos += 40
+        y_pos = 130
+        for resultado in self.descripcion_render.get("resultados", []):
+            self._draw_text_with_background(frame, resultado, (50, y_pos),
+                                          font_scale=0.8, color=(255, 255, 255), bg_color=(0, 100, 0))
+            y_pos += 40
         
     def _draw_text_with_background(self, frame, text, position, font_scale=0.8, color=(255, 255, 255), bg_color=(0, 0, 0)):
-        """Dibuja texto con fondo - función auxiliar"""
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        thickness = 2
-        
-        # Obtener tamaño del texto
-        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
-        
-        # Dibujar fondo
-        x, y = position
-        cv2.rectangle(frame, (x - 5, y - text_height - 5), 
-                     (x + text_width + 5, y + baseline + 5), bg_color, -1)
-        
-        # Dibujar texto
-        cv2.putText(frame, text, position, font, font_scale, color, thickness)
+        """Dibuja texto con fondo - función auxiliar (sprite cacheado, ver modules/texto.py)"""
+        dibujar_texto(frame, text, position, font_scale, color, bg_color)
 
     def obtener_marcadores_para_renderizar(self):
         """
@@ -317,6 +365,7 @@ class JuegoBaseAR:
     def iniciar(self):
         """Inicia el juego"""
         self.activo = True
+        self.tiempo_inicio = time.time()
         return self._inicializar_juego()
         
     def _inicializar_juego(self):
@@ -355,293 +404,478 @@ class JuegoBaseAR:
         """Indica si el juego actual espera una respuesta por voz"""
         return False
 
-class JuegoMemoriaAR(JuegoBaseAR):
-    """Juego de Memoria para AR"""
+class JuegoAR(JuegoBaseAR):
+    """
+    Motor común de los juegos AR. Interpreta una definición de config/juegos.py:
+    escaneo inicial, selección de elementos, fases en orden y regla de puntuación.
+    Cada tipo de fase son tres métodos (_iniciar_<tipo>, _actualizar_<tipo> y _voz_<tipo>)
+    y cada regla de puntuación dos (_puntuar_<regla> y _mensajes_<regla>)
+    """
     
-    def __init__(self):
+    clave = None
+    
+    def __init__(self, definicion=None):
         super().__init__()
-        # Variables de control del escaneo inicial
+        self.definicion = definicion or JUEGOS[self.clave]
+        tipos = self.definicion["escaneo"].get("tipos")
+        # Marcadores que cuentan en el escaneo, calculados una vez por partida
+        self.validos = frozenset(mid for mid, info in MODELOS_FRUTAS_VERDURAS.items()
+                                 if tipos is None or info['tipo'] in tipos)
         self.marcadores_detectados_inicial = set()
         self.tiempo_escaneo = None
+        self._reiniciar_estado()
+        
+    def _reiniciar_estado(self):
         self.fase_escaneo_completada = False
+        self.elementos = []
+        self.indice_fase = -1
+        self.fase = None
+        self.visibles = frozenset()
         
-        # Variables de la secuencia de memoria
-        self.secuencia_memoria = []
-        self.marcador_actual_mostrando = None
-        self.indice_secuencia = 0
-        self.tiempo_mostrar_elemento = None
-        # 3 segundos por elemento
-        self.duracion_elemento = 3  
-        self.fase_mostrando_secuencia = False
-        self.secuencia_completada = False
-        
-        # Variables para la respuesta del usuario
+        # Respuesta por voz
         self.esperando_respuesta = False
-        self.respuesta_usuario = []
+        self.en_pausa = False
+        self.inicio_pausa = None
         self.tiempo_pregunta = None
-        # 30 segundos para responder
-        self.timeout_respuesta = 30  
+        self.timeout_respuesta = 0
+        self.respuestas = []
+        
+        # Fases que recorren los elementos de uno en uno
+        self.indice_elemento = 0
+        self.marcador_actual = None
+        self.tiempo_elemento = None
+        self.pregunta_actual = None
+        
+        # Fase de categorías
+        self.indice_categoria = 0
+        self.categoria_actual = None
+        self.respuestas_categoria = {}
         
-        # Control de fin de juego
+        self.puntuacion = 0
+        self.intentos = 0
         self.juego_terminado = False
         self.resultado_final = None
+        self.puntuacion_guardada = False
         
     def obtener_nombre(self):
-        return "MEMORIA AR"
+        return self.definicion["nombre"]
         
     def _inicializar_juego(self):
-        """Inicia el juego con escaneo inicial"""
+        """Inicia (o reinicia) la partida con el escaneo inicial"""
+        self._reiniciar_estado()
         self.marcadores_detectados_inicial.clear()
         self.tiempo_escaneo = time.time()
-        self.fase_escaneo_completada = False
-        self.secuencia_memoria = []
-        self.marcador_actual_mostrando = None
-        self.indice_secuencia = 0
-        self.tiempo_mostrar_elemento = None
-        self.fase_mostrando_secuencia = False
-        self.secuencia_completada = False
-        self.esperando_respuesta = False
-        self.respuesta_usuario = []
-        self.tiempo_pregunta = None
-        self.juego_terminado = False
-        self.resultado_final = None
+        self.tiempo_inicio = self.tiempo_escaneo
         
+        escaneo = self.definicion["escaneo"]
+        mensajes = [f"ESCANEO INICIAL ({escaneo['duracion']} segundos)"] + escaneo["instrucciones"]
+        return self._resultado("escaneo_inicial", mensajes, self.validos)
+    
+    def _resultado(self, estado, mensajes, esperando=(), modelos=()):
         return {
-            "estado": "escaneo_inicial",
-            "mensajes": [
-                "ESCANEO INICIAL (10 segundos)",
-                "Muestra exactamente 3 marcadores diferentes",
-                "Colocalos uno por uno frente a la camara"
-            ],
-            "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()) if 'MODELOS_FRUTAS_VERDURAS' in globals() else [],
+            "estado": estado,
+            "mensajes": mensajes,
+            "esperando_marcadores": list(esperando),
+            "modelos": list(modelos)
         }
-        
+    
+    def _nombres(self, marcadores):
+        return [obtener_info_modelo(mid)['nombre'] for mid in marcadores]
+    
+    def _presentes(self):
+        return [mid for mid in self.elementos if mid in self.visibles]
+    
+    def _formatear(self, lineas, **valores):
+        """Rellena las plantillas de texto de la definición"""
+        valores.setdefault("nombres", ", ".join(self._nombres(self.elementos)))
+        valores.setdefault("n", len(self.elementos))
+        valores.setdefault("timeout", self.timeout_respuesta)
+        return [linea.format(**valores) for linea in lineas]
+    
     def actualizar_marcadores(self, marcadores_visibles):
         """Actualiza según los marcadores detectados"""
-        current_time = time.time()
+        self.visibles = frozenset(marcadores_visibles)
+        ahora = time.time()
         
-        # FASE 1: ESCANEO INICIAL (primeros 10 segundos)
+        if self.juego_terminado:
+            return self._mostrar_resultado_final()
         if not self.fase_escaneo_completada:
-            tiempo_transcurrido = current_time - self.tiempo_escaneo
-            tiempo_restante = max(0, 10 - int(tiempo_transcurrido))
-            
-            # Añadir marcadores válidos detectados
-            for marker_id in marcadores_visibles:
-                if marker_id in MODELOS_FRUTAS_VERDURAS:
-                    self.marcadores_detectados_inicial.add(marker_id)
-            
-            mensajes = [
-                f"ESCANEO INICIAL - {tiempo_restante}s restantes",
-                f"Marcadores encontrados: {len(self.marcadores_detectados_inicial)}/3"
-            ]
-            
-            # Mostrar qué marcadores se han encontrado
+            return self._actualizar_escaneo(ahora)
+        return getattr(self, f"_actualizar_{self.fase['tipo']}")(ahora)
+    
+    def procesar_comando(self, comando):
+        """Procesa comandos de voz durante el juego"""
+        comando_lower = comando.lower().strip()
+        
+        # Comandos especiales en resultado final
+        if self.juego_terminado:
+            if any(palabra in comando_lower for palabra in COMANDOS_REPETIR):
+                return self._inicializar_juego()
+            elif any(palabra in comando_lower for palabra in COMANDOS_SALIR):
+                return {
+                    "estado": "salir",
+                    "mensajes": [" ¡Gracias por jugar!", "Hasta la proxima"]
+                }
+            return None
+        
+        if not self.esperando_respuesta or self.fase is None:
+            return None
+        return getattr(self, f"_voz_{self.fase['tipo']}")(comando_lower)
+    
+    # ----- Escaneo inicial -----
+    
+    def _actualizar_escaneo(self, ahora):
+        escaneo = self.definicion["escaneo"]
+        self.marcadores_detectados_inicial.update(self.visibles & self.validos)
+        
+        transcurrido = ahora - self.tiempo_escaneo
+        encontrados = len(self.marcadores_detectados_inicial)
+        minimo = escaneo["minimo"]
+        
+        mensajes = [f"ESCANEO INICIAL - {max(0, escaneo['duracion'] - int(transcurrido))}s restantes"]
+        if minimo > 1:
+            mensajes.append(f"{escaneo['etiqueta']}: {encontrados}/{minimo}")
+        else:
+            mensajes.append(f"{escaneo['etiqueta']}: {encontrados}")
+        
+        if escaneo.get("contar_tipos"):
+            tipos = [MODELOS_FRUTAS_VERDURAS[mid]['tipo'] for mid in self.marcadores_detectados_inicial]
+            mensajes.append(f"Frutas: {tipos.count('fruta')}, Verduras: {tipos.count('verdura')}")
             for marker_id in sorted(self.marcadores_detectados_inicial):
                 info = obtener_info_modelo(marker_id)
-                mensajes.append(f"{info['nombre']}")
-            
-            if tiempo_transcurrido >= 10:
-                if len(self.marcadores_detectados_inicial) >= 3:
-                    # Completar escaneo e iniciar secuencia
-                    self.fase_escaneo_completada = True
-                    # Tomar solo los primeros 3 marcadores
-                    marcadores_lista = list(self.marcadores_detectados_inicial)[:3]
-                    # Crear secuencia aleatoria
-                    self.secuencia_memoria = marcadores_lista.copy()
-                    random.shuffle(self.secuencia_memoria)
-                    
-                    return self._iniciar_secuencia()
-                else:
-                    mensajes.append(f" Necesitas exactamente 3 marcadores (tienes {len(self.marcadores_detectados_inicial)})")
-                    # Reiniciar escaneo si no hay suficientes marcadores
-                    if tiempo_transcurrido >= 15:
-                        self.tiempo_escaneo = current_time
-                        self.marcadores_detectados_inicial.clear()
+                mensajes.append(f"{ETIQUETAS_TIPO.get(info['tipo'], '')} {info['nombre']}")
+        else:
+            mensajes.extend(self._nombres(sorted(self.marcadores_detectados_inicial)))
+        
+        if transcurrido >= escaneo["duracion"]:
+            if encontrados >= max(minimo, 1):
+                self.fase_escaneo_completada = True
+                self.elementos = self._seleccionar_elementos()
+                return self._siguiente_fase()
             
-            return {
-                "estado": "escaneo_inicial",
-                "mensajes": mensajes,
-                "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()),
-                "modelos": [crear_modelo_por_id(mid) for mid in marcadores_visibles if mid in MODELOS_FRUTAS_VERDURAS]
-            }
+            if minimo > 1:
+                mensajes.append(f"Necesitas al menos {minimo} {escaneo['elemento']} (tienes {encontrados})")
+            else:
+                mensajes.append("No se encontraron marcadores validos")
+            # Reiniciar escaneo si no hay suficientes marcadores
+            if transcurrido >= escaneo["reintento"]:
+                self.tiempo_escaneo = ahora
+                self.marcadores_detectados_inicial.clear()
         
-        # FASE 2: MOSTRANDO SECUENCIA
-        elif self.fase_mostrando_secuencia and not self.secuencia_completada:
-            return self._actualizar_secuencia(current_time)
+        return self._resultado("escaneo_inicial", mensajes, self.validos, self.visibles & self.validos)
+    
+    def _seleccionar_elementos(self):
+        """Elige los elementos de la partida entre los escaneados, en orden aleatorio"""
+        seleccion = self.definicion.get("seleccion", {})
+        candidatos = sorted(self.marcadores_detectados_inicial)
+        cantidad = seleccion.get("cantidad") or len(candidatos)
+        por_tipo = seleccion.get("por_tipo")
+        
+        if por_tipo:
+            # Equilibrar tipos (p. ej. frutas y verduras) y completar con el resto
+            elegidos = []
+            for tipo in sorted({MODELOS_FRUTAS_VERDURAS[mid]['tipo'] for mid in candidatos}):
+                del_tipo = [mid for mid in candidatos if MODELOS_FRUTAS_VERDURAS[mid]['tipo'] == tipo]
+                elegidos.extend(random.sample(del_tipo, min(por_tipo, len(del_tipo))))
+            restantes = [mid for mid in candidatos if mid not in elegidos]
+            elegidos.extend(random.sample(restantes, max(0, min(cantidad - len(elegidos), len(restantes)))))
+            elegidos = elegidos[:cantidad]
+        else:
+            elegidos = random.sample(candidatos, min(cantidad, len(candidatos)))
         
-        # FASE 3: ESPERANDO RESPUESTA DEL USUARIO
-        elif self.esperando_respuesta:
-            return self._manejar_fase_respuesta(current_time)
+        random.shuffle(elegidos)
+        return elegidos
+    
+    def _siguiente_fase(self, mensajes_previos=()):
+        """Pasa a la siguiente fase de la definición o termina la partida"""
+        self.indice_fase += 1
+        fases = self.definicion["fases"]
+        if self.indice_fase >= len(fases):
+            return self._finalizar_juego(mensajes_previos)
+        
+        self.fase = fases[self.indice_fase]
+        self.esperando_respuesta = False
+        self.en_pausa = False
+        self.inicio_pausa = None
+        self.tiempo_pregunta = None
+        self.marcador_actual = None
+        self.timeout_respuesta = self.fase.get("timeout", 0)
         
-        # FASE 4: JUEGO TERMINADO
-        elif self.juego_terminado:
-            return self._mostrar_resultado_final()
+        resultado = getattr(self, f"_iniciar_{self.fase['tipo']}")()
+        resultado["mensajes"][:0] = mensajes_previos
+        return resultado
+    
+    def _empezar_respuesta(self, ahora):
+        self.en_pausa = False
+        self.esperando_respuesta = True
+        self.tiempo_pregunta = ahora
+        self.inicio_pausa = None
+    
+    def _comprobar_presentes(self, ahora):
+        """
+        En fases con requiere_presentes la respuesta se pausa mientras falte algún
+        elemento delante de la cámara; al reanudarla el tiempo sigue donde estaba
+        (un marcador que parpadea un frame no vuelve a dar el tiempo completo).
+        Retorna el resultado que mostrar durante la pausa, o None si se puede seguir
+        """
+        if not self.fase.get("requiere_presentes"):
+            return None
+        
+        presentes = self._presentes()
+        if len(presentes) == len(self.elementos):
+            if self.en_pausa:
+                if self.tiempo_pregunta is None or self.inicio_pausa is None:
+                    self._empezar_respuesta(ahora)
+                else:
+                    # Se descuenta el tiempo en pausa
+                    self.tiempo_pregunta += ahora - self.inicio_pausa
+                    self.inicio_pausa = None
+                    self.en_pausa = False
+                    self.esperando_respuesta = True
+            return None
         
-        return {"estado": "error", "mensajes": ["Estado no reconocido"]}
+        mensajes = self._formatear(self.fase["colocar"], presentes=len(presentes))
+        if self.esperando_respuesta:
+            mensajes.insert(0, "¡Manten todos los elementos visibles!")
+            self.inicio_pausa = ahora
+        self.en_pausa = True
+        self.esperando_respuesta = False
+        return self._resultado("colocando_elementos", mensajes, self.elementos, presentes)
+    
+    # ----- Fase "secuencia": mostrar los elementos de uno en uno -----
     
     def _iniciar_secuencia(self):
-        """Inicia la fase de mostrar la secuencia"""
-        self.fase_mostrando_secuencia = True
-        self.indice_secuencia = 0
-        self.tiempo_mostrar_elemento = time.time()
-        self.marcador_actual_mostrando = self.secuencia_memoria[0]
+        self.indice_elemento = 0
+        self.marcador_actual = self.elementos[0]
+        self.tiempo_elemento = time.time()
+        return self._mostrar_elemento_secuencia("Observa el orden...")
+    
+    def _actualizar_secuencia(self, ahora):
+        duracion = self.fase["duracion_elemento"]
+        transcurrido = ahora - self.tiempo_elemento
         
-        info = obtener_info_modelo(self.marcador_actual_mostrando)
+        if transcurrido < duracion:
+            return self._mostrar_elemento_secuencia(f"Siguiente en {duracion - int(transcurrido)}s...")
         
-        return {
-            "estado": "mostrando_secuencia",
-            "mensajes": [
-                " MEMORIZA LA SECUENCIA",
-                f"Elemento 1/3: {info['nombre']}",
-                "Observa el orden..."
-            ],
-            "esperando_marcadores": [self.marcador_actual_mostrando],
-            "modelos": [crear_modelo_por_id(self.marcador_actual_mostrando)]
-        }
-    
-    def _actualizar_secuencia(self, current_time):
-        """Actualiza la visualización de la secuencia"""
-        tiempo_elemento = current_time - self.tiempo_mostrar_elemento
+        self.indice_elemento += 1
+        if self.indice_elemento >= len(self.elementos):
+            return self._siguiente_fase()
         
-        if tiempo_elemento >= self.duracion_elemento:
-            # Pasar al siguiente elemento
-            self.indice_secuencia += 1
-            
-            if self.indice_secuencia >= len(self.secuencia_memoria):
-                # Secuencia completada
-                self.secuencia_completada = True
-                self.fase_mostrando_secuencia = False
-                return self._iniciar_fase_respuesta()
-            else:
-                # Mostrar siguiente elemento
-                self.tiempo_mostrar_elemento = current_time
-                self.marcador_actual_mostrando = self.secuencia_memoria[self.indice_secuencia]
-                
-                info = obtener_info_modelo(self.marcador_actual_mostrando)
-                
-                return {
-                    "estado": "mostrando_secuencia",
-                    "mensajes": [
-                        " MEMORIZA LA SECUENCIA",
-                        f"Elemento {self.indice_secuencia + 1}/3: {info['nombre']}",
-                        "Observa el orden..."
-                    ],
-                    "esperando_marcadores": [self.marcador_actual_mostrando],
-                    "modelos": [crear_modelo_por_id(self.marcador_actual_mostrando)]
-                }
-        else:
-            # Continuar mostrando el elemento actual
-            info = obtener_info_modelo(self.marcador_actual_mostrando)
-            tiempo_restante = self.duracion_elemento - int(tiempo_elemento)
-            
-            return {
-                "estado": "mostrando_secuencia",
-                "mensajes": [
-                    " MEMORIZA LA SECUENCIA",
-                    f"Elemento {self.indice_secuencia + 1}/3: {info['nombre']}",
-                    f"Siguiente en {tiempo_restante}s..."
-                ],
-                "esperando_marcadores": [self.marcador_actual_mostrando],
-                "modelos": [crear_modelo_por_id(self.marcador_actual_mostrando)]
-            }
+        self.marcador_actual = self.elementos[self.indice_elemento]
+        self.tiempo_elemento = ahora
+        return self._mostrar_elemento_secuencia("Observa el orden...")
     
-    def _iniciar_fase_respuesta(self):
-        """Inicia la fase donde el usuario debe decir la secuencia"""
-        self.esperando_respuesta = True
-        self.tiempo_pregunta = time.time()
-        self.respuesta_usuario = []
-        
-        # Crear mensaje con la secuencia para referencia
-        nombres_secuencia = [obtener_info_modelo(mid)['nombre'] for mid in self.secuencia_memoria]
+    def _mostrar_elemento_secuencia(self, pie):
+        info = obtener_info_modelo(self.marcador_actual)
+        mensajes = [
+            self.fase.get("titulo", "MEMORIZA"),
+            f"Elemento {self.indice_elemento + 1}/{len(self.elementos)}: {info['nombre']}",
+            pie
+        ]
+        return self._resultado("mostrando_secuencia", mensajes, [self.marcador_actual], [self.marcador_actual])
+    
+    def _voz_secuencia(self, comando):
+        return None
+    
+    # ----- Fase "preguntar": una pregunta por elemento cuando su marcador está a la vista -----
+    
+    def _iniciar_preguntar(self):
+        self.indice_elemento = 0
+        return self._siguiente_pregunta()
+    
+    def _siguiente_pregunta(self, mensajes_previos=()):
+        if self.indice_elemento >= len(self.elementos):
+            return self._siguiente_fase(mensajes_previos)
         
-        return {
-            "estado": "esperando_respuesta",
-            "mensajes": [
-                " AHORA REPITE LA SECUENCIA",
-                "Di los nombres EN ORDEN, uno por uno",
-                "Ejemplo: 'pera', 'limón', 'lechuga'",
-                f"Tienes {self.timeout_respuesta} segundos"
-            ],
-            "esperando_marcadores": [],
-            "modelos": []
-        }
+        self.marcador_actual = self.elementos[self.indice_elemento]
+        self._reset_pregunta()
+        mensajes = list(mensajes_previos) + [
+            f"Elemento {self.indice_elemento + 1}/{len(self.elementos)}",
+            f"Coloca el marcador ID: {self.marcador_actual}",
+            "Cuando aparezca la fruta/verdura, di su nombre"
+        ]
+        return self._resultado("esperando_marcador", mensajes, [self.marcador_actual])
     
-    def _manejar_fase_respuesta(self, current_time):
-        """Maneja la fase de respuesta del usuario"""
-        if not self.esperando_respuesta:
-            # La respuesta ya se completó, mostrar resultado
-            return self._mostrar_resultado_final()
+    def _reset_pregunta(self):
+        self.pregunta_actual = None
+        self.tiempo_pregunta = None
+        self.esperando_respuesta = False
+    
+    def _actualizar_preguntar(self, ahora):
+        info = obtener_info_modelo(self.marcador_actual)
+        progreso = f"Elemento {self.indice_elemento + 1}/{len(self.elementos)}"
+        
+        if self.marcador_actual not in self.visibles:
+            # La pregunta se repite cuando el marcador vuelva a aparecer
+            self._reset_pregunta()
+            mensajes = [progreso, f"Coloca el marcador ID: {self.marcador_actual}", f"Busca: {info['nombre']}"]
+            return self._resultado("esperando_marcador", mensajes, [self.marcador_actual])
         
-        tiempo_esperando = current_time - self.tiempo_pregunta
-        tiempo_restante = max(0, self.timeout_respuesta - int(tiempo_esperando))
+        if not self.pregunta_actual:
+            plantilla = random.choice(self.fase["preguntas"])
+            self.pregunta_actual = plantilla.format(tipo=info.get('tipo', 'fruta o verdura'))
+            self._empezar_respuesta(ahora)
         
-        if tiempo_esperando >= self.timeout_respuesta:
-            # Timeout - mostrar resultado
-            return self._timeout_respuesta()
+        esperando = ahora - self.tiempo_pregunta
+        if esperando >= self.timeout_respuesta:
+            self.indice_elemento += 1
+            return self._siguiente_pregunta([f"Tiempo terminado. Era: {info['nombre']}"])
         
-        progreso_respuesta = len(self.respuesta_usuario)
         mensajes = [
-            "REPITE LA SECUENCIA",
-            f"Elementos dados: {progreso_respuesta}/3",
-            f"Tiempo restante: {tiempo_restante}s"
+            progreso,
+            self.pregunta_actual,
+            f" Responde ahora ({max(0, self.timeout_respuesta - int(esperando))}s)"
         ]
+        return self._resultado("escuchando", mensajes, [self.marcador_actual], [self.marcador_actual])
+    
+    def _voz_preguntar(self, comando):
+        if not self.pregunta_actual:
+            return None
         
-        # Mostrar respuestas dadas hasta ahora
-        if self.respuesta_usuario:
-            mensajes.append("Has dicho:")
-            for i, respuesta in enumerate(self.respuesta_usuario):
-                mensajes.append(f"{i+1}. {respuesta}")
+        info = obtener_info_modelo(self.marcador_actual)
+        self.intentos += 1
+        if menciona(comando, self.marcador_actual):
+            self.puntuacion += 1
+            mensajes = [f"¡CORRECTO! Es {info['nombre']}", "¡Muy bien! Preparando siguiente..."]
+        else:
+            mensajes = [f"INCORRECTO era: {info['nombre']}. Dijiste: '{comando}'"]
         
-        return {
-            "estado": "escuchando_respuesta",
-            "mensajes": mensajes,
-            "esperando_marcadores": [],
-            "modelos": []
-        }
+        self.indice_elemento += 1
+        return self._siguiente_pregunta(mensajes)
+    
+    # ----- Fase "nombrar": decir los nombres de todos los elementos -----
+    
+    def _iniciar_nombrar(self):
+        self.respuestas = []
+        if self.fase.get("requiere_presentes"):
+            # Se empieza a escuchar cuando estén todos los elementos a la vista
+            self.en_pausa = True
+            return self._resultado("colocando_elementos", self._formatear(self.fase["intro"]), self.elementos)
+        
+        self._empezar_respuesta(time.time())
+        return self._resultado("esperando_respuesta", self._formatear(self.fase["intro"]))
+    
+    def _actualizar_nombrar(self, ahora):
+        pausa = self._comprobar_presentes(ahora)
+        if pausa:
+            return pausa
+        
+        esperando = ahora - self.tiempo_pregunta
+        if esperando >= self.timeout_respuesta:
+            return self._finalizar_juego(razon="timeout")
+        
+        mensajes = self._formatear(self.fase["mensajes"],
+                                   restante=max(0, self.timeout_respuesta - int(esperando)),
+                                   dados=len(self.respuestas))
+        if self.respuestas:
+            mensajes.append("Has dicho: " + ", ".join(self._nombres(self.respuestas)))
+        
+        modelos = self._presentes() if self.fase.get("mostrar_elementos") else []
+        return self._resultado("escuchando_respuesta", mensajes, self.elementos, modelos)
+    
+    def _voz_nombrar(self, comando):
+        nuevos = [mid for mid in ids_mencionados(comando)
+                  if mid in self.elementos and mid not in self.respuestas]
+        if self.fase.get("una_por_frase"):
+            nuevos = nuevos[:1]
+        self.respuestas.extend(nuevos)
+        
+        if len(self.respuestas) >= len(self.elementos):
+            return self._siguiente_fase()
+        # Respuesta parcial: se sigue escuchando
+        return None
+    
+    # ----- Fase "categorias": decir los elementos de cada categoría -----
+    
+    def _iniciar_categorias(self):
+        categorias = self.fase["categorias"]
+        self.respuestas_categoria = {c["clave"]: [] for c in categorias}
+        self.indice_categoria = 0
+        self.categoria_actual = categorias[0]["clave"]
+        self.en_pausa = True
+        return self._resultado("colocando_elementos", self._formatear(self.fase["intro"]), self.elementos)
     
-    def _timeout_respuesta(self):
-        """Maneja el timeout de respuesta"""
-        nombres_correctos = [obtener_info_modelo(mid)['nombre'] for mid in self.secuencia_memoria]
+    def _actualizar_categorias(self, ahora):
+        pausa = self._comprobar_presentes(ahora)
+        if pausa:
+            return pausa
+        
+        if ahora - self.tiempo_pregunta >= self.timeout_respuesta:
+            return self._siguiente_categoria()
+        return self._mensajes_categoria(ahora)
+    
+    def _siguiente_categoria(self):
+        self.indice_categoria += 1
+        categorias = self.fase["categorias"]
+        if self.indice_categoria >= len(categorias):
+            return self._siguiente_fase()
+        
+        self.categoria_actual = categorias[self.indice_categoria]["clave"]
+        self.tiempo_pregunta = time.time()
+        return self._mensajes_categoria(self.tiempo_pregunta)
+    
+    def _elementos_de_tipo(self, tipo):
+        return [mid for mid in self.elementos if MODELOS_FRUTAS_VERDURAS[mid]['tipo'] == tipo]
+    
+    def _mensajes_categoria(self, ahora):
+        categoria = self.fase["categorias"][self.indice_categoria]
+        respuestas = self.respuestas_categoria[categoria["clave"]]
+        restante = max(0, self.timeout_respuesta - int(ahora - self.tiempo_pregunta))
+        
+        mensajes = [
+            f"{categoria['icono']} DIME TODAS LAS {categoria['titulo']}",
+            "Di una por una (en cualquier orden)",
+            f"Tiempo: {restante}s",
+            f"Encontradas: {len(respuestas)}/{len(self._elementos_de_tipo(categoria['tipo']))}"
+        ]
+        if respuestas:
+            mensajes.append("Ya dijiste: " + ", ".join(respuestas))
+        if self.indice_categoria + 1 < len(self.fase["categorias"]):
+            siguiente = self.fase["categorias"][self.indice_categoria + 1]["clave"]
+            mensajes.append(f"Di 'siguiente' para pasar a {siguiente}")
+        mensajes.append("Di 'listo' cuando termines")
         
+        return self._resultado(f"categoria_{categoria['clave']}", mensajes, self.elementos, self.elementos)
+    
+    def _voz_categorias(self, comando):
+        if any(palabra in comando for palabra in self.fase["comandos_siguiente"]):
+            return self._siguiente_categoria()
+        if any(palabra in comando for palabra in self.fase["comandos_terminar"]):
+            return self._siguiente_fase()
+        
+        respuestas = self.respuestas_categoria[self.categoria_actual]
+        if comando not in respuestas:
+            respuestas.append(comando)
+        return self._mensajes_categoria(time.time())
+    
+    # ----- Fin de partida y puntuación -----
+    
+    def _finalizar_juego(self, mensajes_previos=(), razon="respuesta_completa"):
         self.juego_terminado = True
-        self.resultado_final = {
-            "correcto": False,
-            "razon": "timeout",
-            "secuencia_correcta": nombres_correctos,
-            "tu_respuesta": self.respuesta_usuario
-        }
+        self.esperando_respuesta = False
+        self.marcador_actual = None
+        
+        self.resultado_final = getattr(self, f"_puntuar_{self.definicion['puntuacion']}")()
+        self.resultado_final["razon"] = razon
         
-        return self._mostrar_resultado_final()
+        resultado = self._mostrar_resultado_final()
+        resultado["mensajes"][:0] = mensajes_previos
+        return resultado
     
     def _mostrar_resultado_final(self):
         """Muestra el resultado final del juego"""
         if not self.resultado_final:
             return {"estado": "error", "mensajes": ["Error: No hay resultado"]}
         
+        textos = self.definicion["resultado"]
         mensajes = []
-        
         if self.resultado_final["correcto"]:
-            mensajes.extend([
-                "¡CORRECTO!",
-                "¡Tienes una excelente memoria!",
-                f"Puntuacion: {self.puntuacion}/1"
-            ])
+            mensajes.extend(textos["correcto"])
         else:
             if self.resultado_final["razon"] == "timeout":
                 mensajes.append("Se acabo el tiempo")
-            else:
-                mensajes.append("Secuencia incorrecta")
-            
-            mensajes.extend([
-                "Secuencia correcta:",
-                " ".join(self.resultado_final["secuencia_correcta"])
-            ])
-            
-            if self.resultado_final["tu_respuesta"]:
-                mensajes.extend([
-                    "Tu respuesta:",
-                    " ".join(self.resultado_final["tu_respuesta"])
-                ])
+            mensajes.extend(textos.get("incorrecto", []))
+        mensajes.extend(getattr(self, f"_mensajes_{self.definicion['puntuacion']}")(self.resultado_final))
         
         mensajes.extend([
             "",
@@ -649,1461 +883,242 @@ class JuegoMemoriaAR(JuegoBaseAR):
             "Di 'salir' para terminar"
         ])
         
+        modelos = self.elementos if self.definicion.get("mostrar_al_terminar") else []
+        return self._resultado("resultado_final", mensajes, modelos, modelos)
+    
+    def _puntuar_por_pregunta(self):
+        """Un punto por pregunta acertada; la precisión se calcula sobre las respondidas"""
+        precision = (self.puntuacion / self.intentos) * 100 if self.intentos > 0 else 0
         return {
-            "estado": "resultado_final",
-            "mensajes": mensajes,
-            "esperando_marcadores": [],
-            "modelos": []
+            "correcto": self.puntuacion == len(self.elementos),
+            "puntuacion": self.puntuacion,
+            "total": len(self.elementos),
+            "intentos": self.intentos,
+            "precision": precision,
+            "porcentaje": precision
         }
     
-    def verificar_respuesta_elemento(self, texto, respuesta_correcta):
-        """Verificar si un elemento de la respuesta es correcto"""
-        
-        texto = texto.lower().strip()
-        respuesta_correcta = respuesta_correcta.lower().strip()
-        
-        # Verificaciones directas
-        if respuesta_correcta in texto:
-            return True
-        
-        # Verificaciones con variaciones y sinónimos
-        variaciones = {
-            'pera': ['pera'],
-            'cebolleta': ['cebolleta', 'cebollino', 'cebolla verde'],
-            'cebolla': ['cebolla'],
-            'lechuga': ['lechuga'],
-            'limon': ['limon', 'limón'],  
-            'pimiento rojo': ['pimiento rojo', 'pimiento', 'pimentón rojo', 'chile rojo'],
-            'pimiento verde': ['pimiento verde', 'pimiento', 'pimentón verde', 'chile verde'],
-            'uvas': ['uvas', 'uva', 'racimo'],
-            'zanahoria': ['zanahoria'],
+    def _mensajes_por_pregunta(self, resultado):
+        mensajes = [
+            f"Puntuacion: {resultado['puntuacion']}/{resultado['total']}",
+            f"Precision: {resultado['precision']:.1f}%"
+        ]
+        if resultado['precision'] >= 80:
+            mensajes.append("¡Eres un experto en frutas y verduras!")
+        elif resultado['precision'] >= 60:
+            mensajes.append("¡Buen trabajo! Sigues mejorando")
+        else:
+            mensajes.append("¡Sigue practicando para mejorar!")
+        return mensajes
+    
+    def _puntuar_secuencia(self):
+        """Un punto si se repite la secuencia completa en orden"""
+        correcto = self.respuestas == self.elementos
+        if correcto:
+            self.puntuacion += 1
+        self.intentos += 1
+        return {
+            "correcto": correcto,
+            "secuencia_correcta": self._nombres(self.elementos),
+            "tu_respuesta": self._nombres(self.respuestas),
+            "porcentaje": 100.0 if correcto else 0.0
         }
-        
-        # Buscar variaciones
-        if respuesta_correcta in variaciones:
-            for variacion in variaciones[respuesta_correcta]:
-                if variacion in texto:
-                    return True
-        
-        # Verificación por palabras clave
-        palabras_respuesta = respuesta_correcta.split()
-        for palabra in palabras_respuesta:
-            if len(palabra) > 2 and palabra in texto:
-                return True
-        
-        return False
-
-    def procesar_comando(self, comando):
-        """Procesa comandos de voz durante el juego"""
-        comando_lower = comando.lower().strip()
-        
-        # Comandos especiales en resultado final
-        if self.juego_terminado:
-            if any(palabra in comando_lower for palabra in ['otra vez', 'repetir', 'nuevo', 'again']):
-                # Reiniciar juego
-                return self._inicializar_juego()
-            elif any(palabra in comando_lower for palabra in ['salir', 'terminar', 'exit', 'quit']):
-                return {
-                    "estado": "salir",
-                    "mensajes": [" ¡Gracias por jugar!", "Hasta la proxima"]
-                }
-            else:
-                return None  
-        
-        # Procesar respuesta durante la fase de escucha
-        if self.esperando_respuesta and len(self.respuesta_usuario) < 3:
-            # Buscar cuál fruta/verdura menciona
-            nombres_correctos = [obtener_info_modelo(mid)['nombre'] for mid in self.secuencia_memoria]
-            
-            elemento_detectado = None
-            for nombre in nombres_correctos:
-                if self.verificar_respuesta_elemento(comando, nombre):
-                    elemento_detectado = nombre
-                    break
-            
-            if elemento_detectado:
-                self.respuesta_usuario.append(elemento_detectado)
-                
-                # Verificar si ya completó la secuencia
-                if len(self.respuesta_usuario) >= 3:
-                    self.esperando_respuesta = False
-                    return self._evaluar_respuesta_completa()
+    
+    def _mensajes_secuencia(self, resultado):
+        if resultado["correcto"]:
+            return [f"Puntuacion: {self.puntuacion}/{self.intentos}"]
+        mensajes = []
+        if resultado["razon"] != "timeout":
+            mensajes.append("Secuencia incorrecta")
+        mensajes.extend(["Secuencia correcta:", " ".join(resultado["secuencia_correcta"])])
+        if resultado["tu_respuesta"]:
+            mensajes.extend(["Tu respuesta:", " ".join(resultado["tu_respuesta"])])
+        return mensajes
+    
+    def _puntuar_aciertos(self):
+        """Un punto por cada elemento nombrado, sin importar el orden"""
+        aciertos = len(set(self.respuestas) & set(self.elementos))
+        self.puntuacion = aciertos
+        self.intentos = len(self.elementos)
+        return {
+            "correcto": aciertos == len(self.elementos),
+            "objetivo": self._nombres(self.elementos),
+            "dichos": self._nombres(self.respuestas),
+            "porcentaje": (aciertos / len(self.elementos) * 100) if self.elementos else 0
+        }
+    
+    def _mensajes_aciertos(self, resultado):
+        if resultado["correcto"]:
+            return [f"Puntuacion: {self.puntuacion}/{len(self.elementos)}"]
+        mensajes = ["Objetivo:", ", ".join(resultado["objetivo"])]
+        if resultado["dichos"]:
+            mensajes.extend(["Dijiste:", ", ".join(resultado["dichos"])])
+        return mensajes
+    
+    def _puntuar_categorias(self):
+        """Un punto por cada elemento dicho en su categoría; correcto a partir de umbral_correcto"""
+        fase = next(f for f in self.definicion["fases"] if f["tipo"] == "categorias")
+        detalle = {}
+        total_correctas = 0
+        for categoria in fase["categorias"]:
+            ids_categoria = self._elementos_de_tipo(categoria["tipo"])
+            correctas = self._nombres(ids_categoria)
+            ids_encontrados, incorrectas = [], []
+            for respuesta in self.respuestas_categoria.get(categoria["clave"], []):
+                # Una frase puede nombrar varios elementos ("manzana y pera"): cuentan todos
+                aciertos = [mid for mid in ids_mencionados(respuesta)
+                            if mid in ids_categoria and mid not in ids_encontrados]
+                if aciertos:
+                    ids_encontrados.extend(aciertos)
                 else:
-                    # Continuar esperando más elementos
-                    return None
-            else:
-                # No se reconoció ningún elemento válido, continuar esperando
-                return None
-        
-        return None
-       
-    def _evaluar_respuesta_completa(self):
-        """Evalúa la respuesta completa del usuario"""
-        nombres_correctos = [obtener_info_modelo(mid)['nombre'] for mid in self.secuencia_memoria]
-        
-        # Verificar si la secuencia es correcta
-        es_correcta = len(self.respuesta_usuario) == len(nombres_correctos)
-        
-        if es_correcta:
-            for i in range(len(nombres_correctos)):
-                elemento_correcto = self.verificar_respuesta_elemento(
-                    self.respuesta_usuario[i], 
-                    nombres_correctos[i]
-                )
-                
-                if not elemento_correcto:
-                    es_correcta = False
-                    break
-        
-        # Actualizar puntuación
-        if es_correcta:
-            self.puntuacion += 1
+                    incorrectas.append(respuesta)
+            encontradas = self._nombres(ids_encontrados)
+            detalle[categoria["clave"]] = {
+                "titulo": categoria["titulo"],
+                "correctas": correctas,
+                "encontradas": encontradas,
+                "incorrectas": incorrectas,
+                "perdidas": [n for n in correctas if n not in encontradas]
+            }
+            total_correctas += len(encontradas)
         
+        total_elementos = len(self.elementos)
+        self.puntuacion = total_correctas
         self.intentos += 1
-        self.juego_terminado = True
-        
-        self.esperando_respuesta = False
-        
-        self.resultado_final = {
-            "correcto": es_correcta,
-            "razon": "respuesta_completa",
-            "secuencia_correcta": nombres_correctos,
-            "tu_respuesta": self.respuesta_usuario
+        return {
+            "correcto": total_correctas >= total_elementos * self.definicion.get("umbral_correcto", 1.0),
+            "total_correctas": total_correctas,
+            "total_elementos": total_elementos,
+            "porcentaje": (total_correctas / total_elementos * 100) if total_elementos > 0 else 0,
+            "categorias": detalle
         }
-        
-        return self._mostrar_resultado_final()
+    
+    def _mensajes_categorias(self, resultado):
+        mensajes = [f"Puntuacion: {resultado['total_correctas']}/{resultado['total_elementos']}"]
+        if not resultado["correcto"]:
+            mensajes.append(f"Porcentaje: {resultado['porcentaje']:.1f}%")
+        
+        for detalle in resultado["categorias"].values():
+            mensajes.extend(["", f" {detalle['titulo']}:"])
+            if detalle['encontradas']:
+                mensajes.append(f" Correctas: {', '.join(detalle['encontradas'])}")
+            if detalle['perdidas']:
+                mensajes.append(f" No encontradas: {', '.join(detalle['perdidas'])}")
+            if detalle['incorrectas']:
+                mensajes.append(f" Incorrectas: {', '.join(detalle['incorrectas'])}")
+        
+        mensajes.extend(["", "RESPUESTAS CORRECTAS COMPLETAS:"])
+        for detalle in resultado["categorias"].values():
+            mensajes.append(f"{detalle['titulo'].capitalize()}: {', '.join(detalle['correctas'])}")
+        return mensajes
+    
+    # ----- Consultas del gestor y de main -----
     
     def obtener_estado_detallado(self):
         """Información detallada del juego"""
-        base_info = super().obtener_estado_detallado()
-        base_info.update({
+        return {
+            "nombre": self.obtener_nombre(),
             "marcadores_detectados": len(self.marcadores_detectados_inicial),
             "fase_escaneo_completada": self.fase_escaneo_completada,
-            "secuencia_memoria": self.secuencia_memoria,
-            "indice_secuencia": self.indice_secuencia,
-            "fase_mostrando_secuencia": self.fase_mostrando_secuencia,
-            "secuencia_completada": self.secuencia_completada,
+            "fase": self.fase["tipo"] if self.fase else None,
+            "elementos": self.elementos,
+            "marcador_actual": self.marcador_actual,
             "esperando_respuesta": self.esperando_respuesta,
-            "respuesta_usuario": self.respuesta_usuario,
-            "juego_terminado": self.juego_terminado,
-            "elementos_respondidos": len(self.respuesta_usuario) if self.respuesta_usuario else 0
-        })
-        return base_info
+            "respuestas": self.respuestas,
+            "juego_terminado": self.juego_terminado
+        }
     
     def obtener_marcadores_renderizado(self):
         """Retorna qué marcadores se deben renderizar en 3D según el estado del juego"""
         if not self.fase_escaneo_completada:
             # Durante escaneo: mostrar todos los marcadores válidos detectados
             return list(self.marcadores_detectados_inicial)
-        elif self.fase_mostrando_secuencia and self.marcador_actual_mostrando:
-            # Durante secuencia: mostrar solo el marcador actual
-            return [self.marcador_actual_mostrando]
-        else:
-            # Durante respuesta o fin: no mostrar marcadores
-            return []
+        if self.juego_terminado:
+            return list(self.elementos) if self.definicion.get("mostrar_al_terminar") else []
+        if self.marcador_actual is not None:
+            return [self.marcador_actual]
+        if self.fase and self.fase.get("mostrar_elementos"):
+            return list(self.elementos)
+        return []
     
     def debe_escuchar_voz(self):
         """Determina si debe escuchar comandos de voz"""
-        return (self.esperando_respuesta and not self.juego_terminado) or self.juego_terminado
+        return self.esperando_respuesta or self.juego_terminado
+
+# Los juegos de siempre son definiciones de config/juegos.py; las clases se mantienen
+# con los nombres de atributo que usa la interfaz de main.py
 
-class JuegoDescubreAR(JuegoBaseAR):
+class JuegoDescubreAR(JuegoAR):
     """Juego Descubre y Nombra para AR"""
     
-    def __init__(self):
-        super().__init__()
-        self.marcadores_detectados_inicial = set()
-        self.marcadores_pendientes = []
-        self.marcador_actual = None
-        self.esperando_nombre = False
-        self.tiempo_escaneo = None
-        self.fase_escaneo_completada = False
-        
-        self.pregunta_actual = None
-        self.respuesta_correcta = None
-        self.tiempo_pregunta = None
-        # 15 segundos para responder
-        self.timeout_respuesta = 15  
-        
-        # Control de fin de juego
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-    def verificar_respuesta(self, texto, respuesta_correcta):
-        """Verificar si la respuesta del usuario es correcta con variaciones"""
-        texto = texto.lower().strip()
-        respuesta_correcta = respuesta_correcta.lower().strip()
-        
-        # Verificaciones directas
-        if respuesta_correcta in texto:
-            return True
-        
-        # Verificaciones adicionales con variaciones y sinónimos
-        variaciones = {
-            'pera': ['pera'],
-            'cebolleta': ['cebolleta', 'cebollino', 'cebolla verde'],
-            'cebolla': ['cebolla'],
-            'lechuga': ['lechuga'],
-            'limon': ['limon'],
-            'pimiento rojo': ['pimiento rojo', 'pimiento', 'pimentón rojo', 'chile rojo'],
-            'pimiento verde': ['pimiento verde', 'pimiento', 'pimentón verde', 'chile verde'],
-            'uvas': ['uvas', 'uva', 'racimo'],
-            'zanahoria': ['zanahoria'],
-        }
-        
-        # Buscar variaciones
-        if respuesta_correcta in variaciones:
-            for variacion in variaciones[respuesta_correcta]:
-                if variacion in texto:
-                    return True
-        
-        # Verificación por palabras clave
-        palabras_respuesta = respuesta_correcta.split()
-        for palabra in palabras_respuesta:
-            if len(palabra) > 2 and palabra in texto:
-                return True
-        
-        return False
+    clave = "descubre"
     
-    def generar_pregunta(self, marker_id):
-        """Generar diferentes tipos de preguntas para variedad"""
-        if marker_id not in MODELOS_FRUTAS_VERDURAS:
-            return None, None
-            
-        info = obtener_info_modelo(marker_id)
-        nombre = info['nombre']
-        tipo = info.get('tipo', 'fruta o verdura')
-        
-        # Diferentes tipos de preguntas para hacer el juego más dinámico
-        tipos_pregunta = [
-            f"¿Que {tipo} es esta?",
-            f"Dime el nombre de esta {tipo}",
-            f"¿Como se llama lo que ves?",
-            f"Identifica esta {tipo}",
-            f"Nombra esta {tipo}"
-        ]
-        
-        pregunta = random.choice(tipos_pregunta)
-        return pregunta, nombre
-        
-    def obtener_nombre(self):
-        return "DESCUBRE Y NOMBRA"
-        
-    def _inicializar_juego(self):
-        """Inicia el juego con escaneo inicial"""
-        self.marcadores_detectados_inicial.clear()
-        self.marcadores_pendientes = []
-        self.marcador_actual = None
-        self.esperando_nombre = False
-        self.tiempo_escaneo = time.time()
-        self.fase_escaneo_completada = False
-        self.pregunta_actual = None
-        self.respuesta_correcta = None
-        self.tiempo_pregunta = None
-        
-        # Resetear control de fin de juego
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-        return {
-            "estado": "escaneo_inicial",
-            "mensajes": [
-                "ESCANEO INICIAL (10 segundos)",
-                "Muestra todos los marcadores que quieres incluir",
-                "Colocalos uno por uno frente a la camara"
-            ],
-            "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()) if 'MODELOS_FRUTAS_VERDURAS' in globals() else [],
-        }
-        
-    def actualizar_marcadores(self, marcadores_visibles):
-        """Actualiza según los marcadores detectados"""
-        current_time = time.time()
-        
-        # FASE 1: ESCANEO INICIAL (primeros 10 segundos)
-        if not self.fase_escaneo_completada:
-            tiempo_transcurrido = current_time - self.tiempo_escaneo
-            tiempo_restante = max(0, 10 - int(tiempo_transcurrido))
-            
-            # Añadir marcadores válidos detectados
-            for marker_id in marcadores_visibles:
-                if marker_id in MODELOS_FRUTAS_VERDURAS:
-                    self.marcadores_detectados_inicial.add(marker_id)
-            
-            mensajes = [
-                f"ESCANEO INICIAL - {tiempo_restante}s restantes",
-                f"Marcadores encontrados: {len(self.marcadores_detectados_inicial)}"
-            ]
-            
-            # Mostrar qué marcadores se han encontrado
-            for marker_id in sorted(self.marcadores_detectados_inicial):
-                info = obtener_info_modelo(marker_id)
-                mensajes.append(f"{info['nombre']}")
-            
-            if tiempo_transcurrido >= 10:
-                if self.marcadores_detectados_inicial:
-                    # Completar escaneo e iniciar juego
-                    self.fase_escaneo_completada = True
-                    self.marcadores_pendientes = list(self.marcadores_detectados_inicial)
-                    random.shuffle(self.marcadores_pendientes)
-                    
-                    return self._mostrar_siguiente_marcador()
-                else:
-                    mensajes.append("No se encontraron marcadores validos")
-                    # Reiniciar escaneo
-                    if tiempo_transcurrido >= 15:
-                        self.tiempo_escaneo = current_time
-            
-            return {
-                "estado": "escaneo_inicial",
-                "mensajes": mensajes,
-                "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()),
-                "modelos": [crear_modelo_por_id(mid) for mid in marcadores_visibles if mid in MODELOS_FRUTAS_VERDURAS]
-            }
-        
-        # FASE 2: JUEGO PRINCIPAL
-        elif not self.juego_terminado:
-            if not self.marcadores_pendientes:
-                return self._finalizar_juego()
-            
-            # Verificar si el marcador actual está visible
-            if self.marcador_actual in marcadores_visibles:
-                info = obtener_info_modelo(self.marcador_actual)
-                progreso = len(self.marcadores_detectados_inicial) - len(self.marcadores_pendientes) + 1
-                total = len(self.marcadores_detectados_inicial)
-                
-                # Generar pregunta si no existe
-                if not self.pregunta_actual:
-                    self.pregunta_actual, self.respuesta_correcta = self.generar_pregunta(self.marcador_actual)
-                    self.tiempo_pregunta = current_time
-                    self.esperando_nombre = True
-                
-                # Verificar timeout de respuesta
-                tiempo_esperando = current_time - self.tiempo_pregunta if self.tiempo_pregunta else 0
-                tiempo_restante = max(0, self.timeout_respuesta - int(tiempo_esperando))
-                
-                mensajes = [
-                    f"Elemento {progreso}/{total}",
-                    self.pregunta_actual or f"¿Que {info['tipo']} es esta?",
-                ]
-                
-                if self.esperando_nombre:
-                    mensajes.append(f" Responde ahora ({tiempo_restante}s)")
-                    
-                    # Si se agota el tiempo, pasar al siguiente
-                    if tiempo_esperando >= self.timeout_respuesta:
-                        return self._timeout_respuesta()
-                else:
-                    mensajes.append("Preparando pregunta...")
-                
-                return {
-                    "estado": "preguntando" if not self.esperando_nombre else "escuchando",
-                    "mensajes": mensajes,
-                    "esperando_marcadores": [self.marcador_actual],
-                    "modelos": [crear_modelo_por_id(self.marcador_actual)]
-                }
-            else:
-                # Marcador no visible, mostrar instrucciones
-                info = obtener_info_modelo(self.marcador_actual) if self.marcador_actual else None
-                progreso = len(self.marcadores_detectados_inicial) - len(self.marcadores_pendientes) + 1
-                total = len(self.marcadores_detectados_inicial)
-                
-                # Resetear pregunta cuando no está visible
-                self.pregunta_actual = None
-                self.respuesta_correcta = None
-                self.tiempo_pregunta = None
-                self.esperando_nombre = False
-                
-                return {
-                    "estado": "esperando_marcador",
-                    "mensajes": [
-                        f"Elemento {progreso}/{total}",
-                        f"Coloca el marcador ID: {self.marcador_actual}",
-                        f"Busca: {info['nombre'] if info else 'Marcador'}"
-                    ],
-                    "esperando_marcadores": [self.marcador_actual],
-                    "modelos": []
-                }
-        
-        # FASE 3: JUEGO TERMINADO
-        elif self.juego_terminado:
-            return self._mostrar_resultado_final()
-        
-        return {"estado": "error", "mensajes": ["Estado no reconocido"]}
-        
-    def _timeout_respuesta(self):
-        """Manejar cuando se agota el tiempo de respuesta"""
-        info = obtener_info_modelo(self.marcador_actual)
-        mensaje_resultado = f"Tiempo terminado. Era: {info['nombre']}"
-        
-        # Remover marcador actual
-        self.marcadores_pendientes.remove(self.marcador_actual)
-        self._reset_pregunta()
-        
-        # Preparar siguiente marcador
-        if self.marcadores_pendientes:
-            siguiente = self._mostrar_siguiente_marcador()
-            siguiente["mensajes"].insert(0, mensaje_resultado)
-            return siguiente
-        else:
-            # Si no hay más marcadores, finalizar juego
-            return self._finalizar_juego_con_mensaje(mensaje_resultado)
+    @property
+    def marcadores_pendientes(self):
+        return self.elementos[self.indice_elemento:]
     
-    def _finalizar_juego(self):
-        """Finaliza el juego y prepara el resultado final"""
-        self.juego_terminado = True
-        
-        # Calcular estadísticas
-        total_marcadores = len(self.marcadores_detectados_inicial)
-        precision = (self.puntuacion/self.intentos)*100 if self.intentos > 0 else 0
-        
-        self.resultado_final = {
-            "puntuacion": self.puntuacion,
-            "total": total_marcadores,
-            "intentos": self.intentos,
-            "precision": precision
-        }
-        
-        return self._mostrar_resultado_final()
-    
-    def _finalizar_juego_con_mensaje(self, mensaje_previo):
-        """Finaliza el juego con un mensaje previo"""
-        resultado = self._finalizar_juego()
-        resultado["mensajes"].insert(0, mensaje_previo)
-        return resultado
-    
-    def _mostrar_resultado_final(self):
-        """Muestra el resultado final del juego"""
-        if not self.resultado_final:
-            return {"estado": "error", "mensajes": ["Error: No hay resultado"]}
-        
-        mensajes = [
-            " ¡JUEGO COMPLETADO!",
-            f"Puntuacion: {self.resultado_final['puntuacion']}/{self.resultado_final['total']}",
-            f"Precision: {self.resultado_final['precision']:.1f}%",
-            "¡Excelente trabajo!"
-        ]
-        
-        # Mensaje adicional basado en la puntuación
-        if self.resultado_final['precision'] >= 80:
-            mensajes.append("¡Eres un experto en frutas y verduras!")
-        elif self.resultado_final['precision'] >= 60:
-            mensajes.append("¡Buen trabajo! Sigues mejorando")
-        else:
-            mensajes.append("¡Sigue practicando para mejorar!")
-        
-        mensajes.extend([
-            "",
-            "Di 'otra vez' para jugar de nuevo",
-            "Di 'salir' para terminar"
-        ])
-        
-        return {
-            "estado": "resultado_final",
-            "mensajes": mensajes,
-            "esperando_marcadores": [],
-            "modelos": []
-        }
-    
-    def _reset_pregunta(self):
-        """Resetear estado de pregunta"""
-        self.pregunta_actual = None
-        self.respuesta_correcta = None
-        self.tiempo_pregunta = None
-        self.esperando_nombre = False
-        
-    def _mostrar_siguiente_marcador(self):
-        """Prepara el siguiente marcador del juego"""
-        if not self.marcadores_pendientes:
-            return self._finalizar_juego()
-            
-        self.marcador_actual = self.marcadores_pendientes[0] 
-        self._reset_pregunta() 
-        
-        info = obtener_info_modelo(self.marcador_actual)
-        progreso = len(self.marcadores_detectados_inicial) - len(self.marcadores_pendientes) + 1
-        total = len(self.marcadores_detectados_inicial)
-        
-        return {
-            "estado": "esperando_marcador",
-            "mensajes": [
-                f"Elemento {progreso}/{total}",
-                f"Coloca el marcador ID: {self.marcador_actual}",
-                "Cuando aparezca la fruta/verdura, di su nombre"
-            ],
-            "esperando_marcadores": [self.marcador_actual],
-            "modelos": []
-        }
-        
-    def procesar_comando(self, comando):
-        comando_lower = comando.lower().strip()
-        
-        # Comandos especiales en resultado final
-        if self.juego_terminado:
-            if any(palabra in comando_lower for palabra in ['otra vez', 'repetir', 'nuevo', 'again']):
-                # Reiniciar juego
-                return self._inicializar_juego()
-            elif any(palabra in comando_lower for palabra in ['salir', 'terminar', 'exit', 'quit']):
-                return {
-                    "estado": "salir",
-                    "mensajes": [" ¡Gracias por jugar!", "Hasta la proxima"]
-                }
-            else:
-                return None  # Ignorar otros comandos
-        
-        # Procesar respuesta durante el juego
-        if not self.esperando_nombre or self.marcador_actual is None or not self.respuesta_correcta:
-            return None
-            
-        info = obtener_info_modelo(self.marcador_actual)
-        
-        es_correcta = self.verificar_respuesta(comando, self.respuesta_correcta)
-        
-        self.intentos += 1
-        
-        if es_correcta:
-            self.puntuacion += 1
-            mensaje_resultado = f"¡CORRECTO! Es {info['nombre']}"
-        else:
-            mensaje_resultado = f"INCORRECTO era: {info['nombre']}. Dijiste: '{comando}'"
-        
-        # Remover marcador completado
-        self.marcadores_pendientes.remove(self.marcador_actual)
-        self._reset_pregunta()
-        
-        # Preparar siguiente marcador
-        if self.marcadores_pendientes:
-            siguiente = self._mostrar_siguiente_marcador()
-            siguiente["mensajes"].insert(0, mensaje_resultado)
-            siguiente["mensajes"].insert(1, "¡Muy bien! Preparando siguiente...")
-            return siguiente
-        else:
-            # Finalizar juego
-            return self._finalizar_juego_con_mensaje(mensaje_resultado)
-        
-    def obtener_estado_detallado(self):
-        """Información detallada del juego"""
-        base_info = super().obtener_estado_detallado()
-        base_info.update({
-            "marcadores_detectados": len(self.marcadores_detectados_inicial),
-            "marcadores_pendientes": len(self.marcadores_pendientes),
-            "marcador_actual": self.marcador_actual,
-            "esperando_nombre": self.esperando_nombre,
-            "fase_escaneo_completada": self.fase_escaneo_completada,
-            "pregunta_actual": self.pregunta_actual,
-            "respuesta_correcta": self.respuesta_correcta,
-            "tiempo_restante": self.timeout_respuesta - (time.time() - self.tiempo_pregunta) if self.tiempo_pregunta else 0,
-            "juego_terminado": self.juego_terminado
-        })
-        return base_info 
+    @property
+    def esperando_nombre(self):
+        return self.esperando_respuesta
 
-    def obtener_marcadores_renderizado(self):
-        """
-        Retorna qué marcadores se deben renderizar en 3D según el estado del juego
-        """
-        if not self.fase_escaneo_completada:
-            # Durante escaneo: mostrar todos los marcadores válidos detectados
-            return list(self.marcadores_detectados_inicial)
-        elif not self.juego_terminado:
-            # Durante juego: solo mostrar el marcador actual
-            if self.marcador_actual:
-                return [self.marcador_actual]
-            return []
-        else:
-            # Durante resultado final: no mostrar marcadores
-            return []
-
-    def debe_escuchar_voz(self):
-        """Determina si debe escuchar comandos de voz"""
-        return (self.esperando_nombre and self.marcador_actual is not None and self.fase_escaneo_completada and not self.juego_terminado) or self.juego_terminado
-     
-class JuegoEncuentraFrutasAR(JuegoBaseAR):
+class JuegoEncuentraFrutasAR(JuegoAR):
     """Juego Encuentra las Frutas para AR"""
     
-    def __init__(self):
-        super().__init__()
-        # Variables de control del escaneo inicial
-        self.marcadores_detectados_inicial = set()
-        self.tiempo_escaneo = None
-        self.fase_escaneo_completada = False
-        
-        # Variables del juego
-        self.frutas_objetivo = []
-        self.marcadores_encontrados = set()
-        self.esperando_nombres = False
-        self.tiempo_pregunta = None
-        # 30 segundos para responder
-        self.timeout_respuesta = 30  
-        self.nombres_dichos = []
-        
-        # Control de fin de juego
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-    def obtener_nombre(self):
-        return "ENCUENTRA LAS FRUTAS"
-        
-    def _inicializar_juego(self):
-        """Inicia el juego con escaneo inicial"""
-        self.marcadores_detectados_inicial.clear()
-        self.tiempo_escaneo = time.time()
-        self.fase_escaneo_completada = False
-        self.frutas_objetivo = []
-        self.marcadores_encontrados.clear()
-        self.esperando_nombres = False
-        self.tiempo_pregunta = None
-        self.nombres_dichos = []
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-        return {
-            "estado": "escaneo_inicial",
-            "mensajes": [
-                "ESCANEO INICIAL (10 segundos)",
-                "Muestra al menos 3 marcadores de frutas diferentes",
-                "Colocalos uno por uno frente a la camara"
-            ],
-            "esperando_marcadores": [id for id, info in MODELOS_FRUTAS_VERDURAS.items() if info['tipo'] == 'fruta'],
-        }
-        
-    def actualizar_marcadores(self, marcadores_visibles):
-        """Actualiza según los marcadores detectados"""
-        current_time = time.time()
-        
-        # FASE 1: ESCANEO INICIAL (primeros 10 segundos)
-        if not self.fase_escaneo_completada:
-            tiempo_transcurrido = current_time - self.tiempo_escaneo
-            tiempo_restante = max(0, 10 - int(tiempo_transcurrido))
-            
-            # Añadir marcadores válidos de frutas detectados
-            for marker_id in marcadores_visibles:
-                if marker_id in MODELOS_FRUTAS_VERDURAS and MODELOS_FRUTAS_VERDURAS[marker_id]['tipo'] == 'fruta':
-                    self.marcadores_detectados_inicial.add(marker_id)
-            
-            mensajes = [
-                f"ESCANEO INICIAL - {tiempo_restante}s restantes",
-                f"Frutas encontradas: {len(self.marcadores_detectados_inicial)}/3"
-            ]
-            
-            # Mostrar qué frutas se han encontrado
-            for marker_id in sorted(self.marcadores_detectados_inicial):
-                info = obtener_info_modelo(marker_id)
-                mensajes.append(f"{info['nombre']}")
-            
-            if tiempo_transcurrido >= 10:
-                if len(self.marcadores_detectados_inicial) >= 3:
-                    # Completar escaneo e iniciar juego
-                    self.fase_escaneo_completada = True
-                    # Seleccionar 3 frutas aleatorias
-                    frutas_lista = list(self.marcadores_detectados_inicial)
-                    self.frutas_objetivo = random.sample(frutas_lista, min(3, len(frutas_lista)))
-                    
-                    return self._iniciar_fase_juego()
-                else:
-                    mensajes.append(f"Necesitas al menos 3 frutas (tienes {len(self.marcadores_detectados_inicial)})")
-                    # Reiniciar escaneo si no hay suficientes marcadores
-                    if tiempo_transcurrido >= 15:
-                        self.tiempo_escaneo = current_time
-                        self.marcadores_detectados_inicial.clear()
-            
-            return {
-                "estado": "escaneo_inicial",
-                "mensajes": mensajes,
-                "esperando_marcadores": [id for id, info in MODELOS_FRUTAS_VERDURAS.items() if info['tipo'] == 'fruta'],
-                "modelos": [crear_modelo_por_id(mid) for mid in marcadores_visibles if mid in MODELOS_FRUTAS_VERDURAS and MODELOS_FRUTAS_VERDURAS[mid]['tipo'] == 'fruta']
-            }
-        
-        # FASE 2: JUGANDO - Esperando que coloque las frutas objetivo
-        elif not self.esperando_nombres:
-            # Verificar qué frutas objetivo están presentes
-            frutas_presentes = [m for m in marcadores_visibles if m in self.frutas_objetivo]
-            
-            if len(frutas_presentes) == len(self.frutas_objetivo):
-                # Todas las frutas están presentes, pasar a fase de nombres
-                self.esperando_nombres = True
-                self.tiempo_pregunta = current_time
-                
-                nombres_frutas = [obtener_info_modelo(id)['nombre'] for id in self.frutas_objetivo]
-                
-                return {
-                    "estado": "esperando_nombres",
-                    "mensajes": [
-                        "¡Perfecto! Todas las frutas estan aqui",
-                        f"Ahora di los nombres: {', '.join(nombres_frutas)}",
-                        "Puedes decirlos uno por uno o todos juntos"
-                    ],
-                    "esperando_marcadores": self.frutas_objetivo,
-                    "modelos": [crear_modelo_por_id(m) for m in frutas_presentes]
-                }
-            else:
-                nombres_objetivo = [obtener_info_modelo(id)['nombre'] for id in self.frutas_objetivo]
-                return {
-                    "estado": "colocando_frutas",
-                    "mensajes": [
-                        f"Coloca estas frutas: {', '.join(nombres_objetivo)}",
-                        f"Tienes {len(frutas_presentes)}/{len(self.frutas_objetivo)} frutas"
-                    ],
-                    "esperando_marcadores": self.frutas_objetivo,
-                    "modelos": [crear_modelo_por_id(m) for m in frutas_presentes]
-                }
-        
-        # FASE 3: ESPERANDO NOMBRES
-        elif self.esperando_nombres and not self.juego_terminado:
-            return self._manejar_fase_nombres(current_time, marcadores_visibles)
-        
-        # FASE 4: JUEGO TERMINADO
-        elif self.juego_terminado:
-            return self._mostrar_resultado_final()
-        
-        return {"estado": "error", "mensajes": ["Estado no reconocido"]}
-    
-    def _iniciar_fase_juego(self):
-        """Inicia la fase principal del juego"""
-        nombres_frutas = [obtener_info_modelo(id)['nombre'] for id in self.frutas_objetivo]
-        
-        return {
-            "estado": "colocando_frutas",
-            "mensajes": [
-                "¡ENCUENTRA ESTAS FRUTAS!",
-                f"Busca y coloca: {', '.join(nombres_frutas)}",
-                "Cuando las veas, di sus nombres en voz alta"
-            ],
-            "esperando_marcadores": self.frutas_objetivo,
-            "modelos": []
-        }
+    clave = "frutas"
     
-    def _manejar_fase_nombres(self, current_time, marcadores_visibles):
-        """Maneja la fase donde el usuario debe decir los nombres"""
-        if not self.esperando_nombres or self.juego_terminado:
-            return self._mostrar_resultado_final()
-        
-        # Verificar que las frutas sigan presentes
-        frutas_presentes = [m for m in marcadores_visibles if m in self.frutas_objetivo]
-        
-        if len(frutas_presentes) < len(self.frutas_objetivo):
-            # Faltan frutas, volver a la fase anterior
-            self.esperando_nombres = False
-            nombres_objetivo = [obtener_info_modelo(id)['nombre'] for id in self.frutas_objetivo]
-            return {
-                "estado": "colocando_frutas",
-                "mensajes": [
-                    "¡Manten todas las frutas visibles!",
-                    f"Coloca: {', '.join(nombres_objetivo)}"
-                ],
-                "esperando_marcadores": self.frutas_objetivo,
-                "modelos": [crear_modelo_por_id(m) for m in frutas_presentes]
-            }
-        
-        # Verificar timeout
-        tiempo_esperando = current_time - self.tiempo_pregunta
-        tiempo_restante = max(0, self.timeout_respuesta - int(tiempo_esperando))
-        
-        if tiempo_esperando >= self.timeout_respuesta:
-            return self._timeout_respuesta()
-        
-        # Mostrar estado actual
-        nombres_objetivo = [obtener_info_modelo(id)['nombre'] for id in self.frutas_objetivo]
-        mensajes = [
-            "DI LOS NOMBRES DE LAS FRUTAS",
-            f"Frutas objetivo: {', '.join(nombres_objetivo)}",
-            f"Tiempo restante: {tiempo_restante}s"
-        ]
-        
-        if self.nombres_dichos:
-            mensajes.append(f"Has dicho: {', '.join(self.nombres_dichos)}")
-        
-        return {
-            "estado": "escuchando_nombres",
-            "mensajes": mensajes,
-            "esperando_marcadores": self.frutas_objetivo,
-            "modelos": [crear_modelo_por_id(m) for m in frutas_presentes]
-        }
+    @property
+    def frutas_objetivo(self):
+        return self.elementos
     
-    def _timeout_respuesta(self):
-        """Maneja el timeout de respuesta"""
-        nombres_correctos = [obtener_info_modelo(mid)['nombre'] for mid in self.frutas_objetivo]
-        
-        self.juego_terminado = True
-        self.resultado_final = {
-            "correcto": False,
-            "razon": "timeout",
-            "frutas_objetivo": nombres_correctos,
-            "nombres_dichos": self.nombres_dichos
-        }
-        
-        return self._mostrar_resultado_final()
+    @property
+    def nombres_dichos(self):
+        return self._nombres(self.respuestas)
     
-    def _mostrar_resultado_final(self):
-        """Muestra el resultado final del juego"""
-        if not self.resultado_final:
-            return {"estado": "error", "mensajes": ["Error: No hay resultado"]}
-        
-        mensajes = []
-        
-        if self.resultado_final["correcto"]:
-            mensajes.extend([
-                "¡EXCELENTE!",
-                "¡Has encontrado todas las frutas!",
-                f"Puntuación: {self.puntuacion}/{len(self.frutas_objetivo)}"
-            ])
-        else:
-            if self.resultado_final["razon"] == "timeout":
-                mensajes.append("Se acabó el tiempo")
-            
-            mensajes.extend([
-                "Frutas objetivo:",
-                ", ".join(self.resultado_final["frutas_objetivo"])
-            ])
-            
-            if self.resultado_final["nombres_dichos"]:
-                mensajes.extend([
-                    "Dijiste:",
-                    ", ".join(self.resultado_final["nombres_dichos"])
-                ])
-        
-        mensajes.extend([
-            "",
-            "Di 'otra vez' para jugar de nuevo",
-            "Di 'salir' para terminar"
-        ])
-        
-        return {
-            "estado": "resultado_final",
-            "mensajes": mensajes,
-            "esperando_marcadores": [],
-            "modelos": []
-        }
-    
-    def verificar_respuesta_elemento(self, texto, respuesta_correcta):
-        """Verificar si un elemento de la respuesta es correcto"""
-        texto = texto.lower().strip()
-        respuesta_correcta = respuesta_correcta.lower().strip()
-        
-        # Verificaciones directas
-        if respuesta_correcta in texto:
-            return True
-        
-        # Verificaciones con variaciones y sinónimos
-        variaciones = {
-            'pera': ['pera'],
-            'limon': ['limon', 'limón'],  
-            'uvas': ['uvas', 'uva', 'racimo'],
-            'manzana': ['manzana'],
-            'naranja': ['naranja'],
-            'platano': ['platano', 'plátano', 'banana'],
-            'fresa': ['fresa', 'frutilla'],
-            'sandia': ['sandia', 'sandía'],
-            'melon': ['melon', 'melón'],
-        }
-        
-        # Buscar variaciones
-        if respuesta_correcta in variaciones:
-            for variacion in variaciones[respuesta_correcta]:
-                if variacion in texto:
-                    return True
-        
-        # Verificación por palabras clave
-        palabras_respuesta = respuesta_correcta.split()
-        for palabra in palabras_respuesta:
-            if len(palabra) > 2 and palabra in texto:
-                return True
-        
-        return False
-    
-    def procesar_comando(self, comando):
-        """Procesa comandos de voz durante el juego"""
-        comando_lower = comando.lower().strip()
-        
-        # Comandos especiales en resultado final
-        if self.juego_terminado:
-            if any(palabra in comando_lower for palabra in ['otra vez', 'repetir', 'nuevo', 'again']):
-                return self._inicializar_juego()
-            elif any(palabra in comando_lower for palabra in ['salir', 'terminar', 'exit', 'quit']):
-                return {
-                    "estado": "salir",
-                    "mensajes": [" ¡Gracias por jugar!", "Hasta la próxima"]
-                }
-            return None
-        
-        # Procesar nombres durante la fase de escucha
-        if self.esperando_nombres and not self.juego_terminado:
-            nombres_objetivo = [obtener_info_modelo(id)['nombre'].lower() for id in self.frutas_objetivo]
-            
-            # Buscar frutas mencionadas
-            frutas_mencionadas = []
-            for nombre in nombres_objetivo:
-                nombre_original = obtener_info_modelo(
-                    next(id for id in self.frutas_objetivo if obtener_info_modelo(id)['nombre'].lower() == nombre)
-                )['nombre']
-                
-                if self.verificar_respuesta_elemento(comando, nombre_original) and nombre_original not in self.nombres_dichos:
-                    frutas_mencionadas.append(nombre_original)
-            
-            # Agregar nuevas frutas mencionadas
-            self.nombres_dichos.extend(frutas_mencionadas)
-            
-            # Verificar si ya se completó
-            if len(self.nombres_dichos) >= len(self.frutas_objetivo):
-                return self._evaluar_respuesta_completa()
-        
-        return None
-    
-    def _evaluar_respuesta_completa(self):
-        """Evalúa la respuesta completa del usuario"""
-        nombres_correctos = [obtener_info_modelo(mid)['nombre'].lower() for mid in self.frutas_objetivo]
-        nombres_usuario = [n.lower() for n in self.nombres_dichos]
-        
-        # Contar aciertos
-        aciertos = 0
-        for nombre_correcto in nombres_correctos:
-            if nombre_correcto in nombres_usuario:
-                aciertos += 1
-        
-        # Actualizar puntuación
-        self.puntuacion = aciertos
-        self.intentos = len(self.frutas_objetivo)
-        self.juego_terminado = True
-        self.esperando_nombres = False
-        
-        self.resultado_final = {
-            "correcto": aciertos == len(self.frutas_objetivo),
-            "razon": "respuesta_completa",
-            "frutas_objetivo": [obtener_info_modelo(mid)['nombre'] for mid in self.frutas_objetivo],
-            "nombres_dichos": self.nombres_dichos
-        }
-        
-        return self._mostrar_resultado_final()
-    
-    def obtener_estado_detallado(self):
-        """Información detallada del juego"""
-        base_info = super().obtener_estado_detallado()
-        base_info.update({
-            "marcadores_detectados": len(self.marcadores_detectados_inicial),
-            "fase_escaneo_completada": self.fase_escaneo_completada,
-            "frutas_objetivo": self.frutas_objetivo,
-            "esperando_nombres": self.esperando_nombres,
-            "nombres_dichos": self.nombres_dichos,
-            "juego_terminado": self.juego_terminado
-        })
-        return base_info
-    
-    def obtener_marcadores_renderizado(self):
-        """Retorna qué marcadores se deben renderizar en 3D según el estado del juego"""
-        if not self.fase_escaneo_completada:
-            # Durante escaneo: mostrar todas las frutas detectadas
-            return list(self.marcadores_detectados_inicial)
-        elif self.esperando_nombres or not self.juego_terminado:
-            # Durante juego: mostrar las frutas objetivo
-            return self.frutas_objetivo
-        else:
-            # Durante resultado: no mostrar marcadores
-            return []
-    
-    def debe_escuchar_voz(self):
-        """Determina si debe escuchar comandos de voz"""
-        return (self.esperando_nombres and not self.juego_terminado) or self.juego_terminado
+    @property
+    def esperando_nombres(self):
+        return self.esperando_respuesta
 
-class JuegoCategoriasAR(JuegoBaseAR):
+class JuegoCategoriasAR(JuegoAR):
     """Juego de Categorías AR"""
     
-    def __init__(self):
-        super().__init__()
-        # Variables de control del escaneo inicial
-        self.marcadores_detectados_inicial = set()
-        self.tiempo_escaneo = None
-        self.fase_escaneo_completada = False
-        
-        # Variables del juego
-        self.elementos_juego = []
-        self.frutas_correctas = []
-        self.verduras_correctas = []
-        
-        # Variables para recolección de respuestas
-        # Empezamos con frutas
-        self.categoria_actual = "frutas"  
-        self.respuestas_frutas = []
-        self.respuestas_verduras = []
-        self.esperando_respuesta = False
-        self.tiempo_pregunta = None
-        # 30 segundos por categoría
-        self.timeout_respuesta = 30  
-        
-        # Control de fin de juego
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-    def obtener_nombre(self):
-        return "AGRUPA POR CATEGORIAS"
-        
-    def _inicializar_juego(self):
-        """Inicia el juego con escaneo inicial"""
-        self.marcadores_detectados_inicial.clear()
-        self.tiempo_escaneo = time.time()
-        self.fase_escaneo_completada = False
-        self.elementos_juego = []
-        self.frutas_correctas = []
-        self.verduras_correctas = []
-        
-        # Reiniciar variables de respuestas
-        self.categoria_actual = "frutas"
-        self.respuestas_frutas = []
-        self.respuestas_verduras = []
-        self.esperando_respuesta = False
-        self.tiempo_pregunta = None
-        
-        self.juego_terminado = False
-        self.resultado_final = None
-        
-        return {
-            "estado": "escaneo_inicial",
-            "mensajes": [
-                "ESCANEO INICIAL (12 segundos)",
-                "Muestra al menos 6 marcadores diferentes",
-                "Mezcla de frutas y verduras"
-            ],
-            "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()),
-        }
-        
-    def actualizar_marcadores(self, marcadores_visibles):
-        """Actualiza segun los marcadores detectados"""
-        current_time = time.time()
-        
-        # FASE 1: ESCANEO INICIAL (primeros 12 segundos)
-        if not self.fase_escaneo_completada:
-            tiempo_transcurrido = current_time - self.tiempo_escaneo
-            tiempo_restante = max(0, 12 - int(tiempo_transcurrido))
-            
-            # Anadir marcadores validos detectados
-            for marker_id in marcadores_visibles:
-                if marker_id in MODELOS_FRUTAS_VERDURAS:
-                    self.marcadores_detectados_inicial.add(marker_id)
-            
-            # Contar frutas y verduras
-            frutas_count = sum(1 for mid in self.marcadores_detectados_inicial 
-                             if MODELOS_FRUTAS_VERDURAS[mid]['tipo'] == 'fruta')
-            verduras_count = sum(1 for mid in self.marcadores_detectados_inicial 
-                               if MODELOS_FRUTAS_VERDURAS[mid]['tipo'] == 'verdura')
-            
-            mensajes = [
-                f"ESCANEO INICIAL - {tiempo_restante}s restantes",
-                f"Elementos encontrados: {len(self.marcadores_detectados_inicial)}/6",
-                f"Frutas: {frutas_count}, Verduras: {verduras_count}"
-            ]
-            
-            # Mostrar elementos encontrados
-            for marker_id in sorted(self.marcadores_detectados_inicial):
-                info = obtener_info_modelo(marker_id)
-                tipo_icono = "[FRUTA]" if info['tipo'] == 'fruta' else "[VERDURA]"
-                mensajes.append(f"{tipo_icono} {info['nombre']}")
-            
-            if tiempo_transcurrido >= 12:
-                if len(self.marcadores_detectados_inicial) >= 6:
-                    # Completar escaneo e iniciar juego
-                    self.fase_escaneo_completada = True
-                    return self._iniciar_fase_juego()
-                else:
-                    mensajes.append(f"Necesitas al menos 6 elementos (tienes {len(self.marcadores_detectados_inicial)})")
-                    # Reiniciar escaneo si no hay suficientes marcadores
-                    if tiempo_transcurrido >= 17:
-                        self.tiempo_escaneo = current_time
-                        self.marcadores_detectados_inicial.clear()
-            
-            return {
-                "estado": "escaneo_inicial",
-                "mensajes": mensajes,
-                "esperando_marcadores": list(MODELOS_FRUTAS_VERDURAS.keys()),
-                "modelos": [crear_modelo_por_id(mid) for mid in marcadores_visibles if mid in MODELOS_FRUTAS_VERDURAS]
-            }
-        
-        # FASE 2: JUGANDO - Esperando que coloque todos los elementos
-        elif not self.esperando_respuesta and not self.juego_terminado:
-            elementos_presentes = [m for m in marcadores_visibles if m in self.elementos_juego]
-            
-            if len(elementos_presentes) == len(self.elementos_juego):
-                # Todos los elementos estan presentes, comenzar preguntas
-                return self._iniciar_primera_categoria()
-            else:
-                return {
-                    "estado": "colocando_elementos",
-                    "mensajes": [
-                        "Coloca todos los elementos escaneados",
-                        f"Tienes {len(elementos_presentes)}/{len(self.elementos_juego)} elementos"
-                    ],
-                    "esperando_marcadores": self.elementos_juego,
-                    "modelos": [crear_modelo_por_id(m) for m in elementos_presentes]
-                }
-        
-        # FASE 3: ESPERANDO RESPUESTA POR CATEGORIA
-        elif self.esperando_respuesta and not self.juego_terminado:
-            return self._manejar_categoria_actual(current_time, marcadores_visibles)
-        
-        # FASE 4: JUEGO TERMINADO
-        elif self.juego_terminado:
-            return self._mostrar_resultado_final()
-        
-        return {"estado": "error", "mensajes": ["Estado no reconocido"]}
-    
-    def _iniciar_fase_juego(self):
-        """Inicia la fase principal del juego"""
-        # Seleccionar elementos del escaneo
-        elementos_lista = list(self.marcadores_detectados_inicial)
-        
-        # Asegurar balance entre frutas y verduras
-        frutas_disponibles = [id for id in elementos_lista if MODELOS_FRUTAS_VERDURAS[id]['tipo'] == 'fruta']
-        verduras_disponibles = [id for id in elementos_lista if MODELOS_FRUTAS_VERDURAS[id]['tipo'] == 'verdura']
-        
-        # Seleccionar 3 frutas y 3 verduras si es posible
-        frutas_sel = frutas_disponibles[:3] if len(frutas_disponibles) >= 3 else frutas_disponibles
-        verduras_sel = verduras_disponibles[:3] if len(verduras_disponibles) >= 3 else verduras_disponibles
-        
-        # Completar con elementos adicionales si es necesario
-        elementos_seleccionados = frutas_sel + verduras_sel
-        if len(elementos_seleccionados) < 6:
-            elementos_faltantes = [id for id in elementos_lista if id not in elementos_seleccionados]
-            elementos_seleccionados.extend(elementos_faltantes[:6-len(elementos_seleccionados)])
-        
-        self.elementos_juego = elementos_seleccionados
-        random.shuffle(self.elementos_juego)
-        
-        # Preparar listas de respuestas correctas
-        self.frutas_correctas = [obtener_info_modelo(id)['nombre'] for id in self.elementos_juego 
-                               if MODELOS_FRUTAS_VERDURAS[id]['tipo'] == 'fruta']
-        self.verduras_correctas = [obtener_info_modelo(id)['nombre'] for id in self.elementos_juego 
-                                 if MODELOS_FRUTAS_VERDURAS[id]['tipo'] == 'verdura']
-        
-        return {
-            "estado": "colocando_elementos",
-            "mensajes": [
-                "CLASIFICA EN FRUTAS Y VERDURAS!",
-                f"Coloca estos {len(self.elementos_juego)} elementos",
-                "Te preguntare por cada categoria"
-            ],
-            "esperando_marcadores": self.elementos_juego,
-            "modelos": []
-        }
+    clave = "categorias"
     
-    def _iniciar_primera_categoria(self):
-        """Inicia la primera categoria de preguntas"""
-        self.categoria_actual = "frutas"
-        self.esperando_respuesta = True
-        self.tiempo_pregunta = time.time()
-        
-        return self._mostrar_categoria_actual()
+    @property
+    def elementos_juego(self):
+        return self.elementos
     
-    def _mostrar_categoria_actual(self):
-        """Muestra la pregunta de la categoria actual"""
-        # Calcular tiempo restante
-        tiempo_transcurrido = time.time() - self.tiempo_pregunta
-        tiempo_restante = max(0, self.timeout_respuesta - int(tiempo_transcurrido))
-        
-        if self.categoria_actual == "frutas":
-            icono = "[FRUTA]"
-            categoria_nombre = "FRUTAS"
-            total_categoria = len(self.frutas_correctas)
-            respuestas_actuales = len(self.respuestas_frutas)
-        else:
-            icono = "[VERDURA]"
-            categoria_nombre = "VERDURAS"
-            total_categoria = len(self.verduras_correctas)
-            respuestas_actuales = len(self.respuestas_verduras)
-        
-        mensajes = [
-            f"{icono} DIME TODAS LAS {categoria_nombre}",
-            f"Di una por una (en cualquier orden)",
-            f"Tiempo: {tiempo_restante}s",
-            f"Encontradas: {respuestas_actuales}/{total_categoria}"
-        ]
-        
-        # Mostrar las que ya ha dicho
-        if self.categoria_actual == "frutas" and self.respuestas_frutas:
-            mensajes.append("Ya dijiste: " + ", ".join(self.respuestas_frutas))
-        elif self.categoria_actual == "verduras" and self.respuestas_verduras:
-            mensajes.append("Ya dijiste: " + ", ".join(self.respuestas_verduras))
-        
-        mensajes.append("Di 'siguiente' para pasar a verduras")
-        mensajes.append("Di 'listo' cuando termines")
-        
-        return {
-            "estado": f"categoria_{self.categoria_actual}",
-            "mensajes": mensajes,
-            "esperando_marcadores": self.elementos_juego,
-            "modelos": [crear_modelo_por_id(m) for m in self.elementos_juego]
-        }
+    @property
+    def respuestas_frutas(self):
+        return self.respuestas_categoria.get("frutas", [])
     
-    def _manejar_categoria_actual(self, current_time, marcadores_visibles):
-        """Maneja la categoría actual"""
-        # Verificar que todos los elementos sigan presentes
-        elementos_presentes = [m for m in marcadores_visibles if m in self.elementos_juego]
-        
-        if len(elementos_presentes) < len(self.elementos_juego):
-            # Faltan elementos, pausar pregunta
-            self.esperando_respuesta = False
-            return {
-                "estado": "colocando_elementos",
-                "mensajes": [
-                    "¡Manten todos los elementos visibles!",
-                    f"Faltan {len(self.elementos_juego) - len(elementos_presentes)} elementos",
-                    "Pon todos para continuar con las preguntas"
-                ],
-                "esperando_marcadores": self.elementos_juego,
-                "modelos": [crear_modelo_por_id(m) for m in elementos_presentes]
-            }
-        
-        # Verificar timeout
-        tiempo_esperando = current_time - self.tiempo_pregunta
-        
-        if tiempo_esperando >= self.timeout_respuesta:
-            return self._timeout_categoria_actual()
-        
-        # Mostrar categoría actual
-        return self._mostrar_categoria_actual()
-    
-    def _timeout_categoria_actual(self):
-        """Maneja el timeout de la categoría actual"""
-        if self.categoria_actual == "frutas":
-            # Pasar a verduras
-            return self._cambiar_a_verduras()
-        else:
-            # Finalizar juego
-            return self._finalizar_juego()
-    
-    def _cambiar_a_verduras(self):
-        """Cambia a la categoría de verduras"""
-        self.categoria_actual = "verduras"
-        self.tiempo_pregunta = time.time()
-        return self._mostrar_categoria_actual()
-    
-    def _finalizar_juego(self):
-        """Finaliza el juego y calcula resultados"""
-        self.juego_terminado = True
-        self.esperando_respuesta = False
-        
-        # Verificar respuestas correctas
-        frutas_correctas_encontradas = []
-        frutas_incorrectas = []
-        
-        for respuesta in self.respuestas_frutas:
-            encontrada = False
-            for fruta_correcta in self.frutas_correctas:
-                if self.verificar_elemento_categoria(respuesta, fruta_correcta):
-                    if fruta_correcta not in frutas_correctas_encontradas:
-                        frutas_correctas_encontradas.append(fruta_correcta)
-                        encontrada = True
-                        break
-            if not encontrada:
-                frutas_incorrectas.append(respuesta)
-        
-        verduras_correctas_encontradas = []
-        verduras_incorrectas = []
-        
-        for respuesta in self.respuestas_verduras:
-            encontrada = False
-            for verdura_correcta in self.verduras_correctas:
-                if self.verificar_elemento_categoria(respuesta, verdura_correcta):
-                    if verdura_correcta not in verduras_correctas_encontradas:
-                        verduras_correctas_encontradas.append(verdura_correcta)
-                        encontrada = True
-                        break
-            if not encontrada:
-                verduras_incorrectas.append(respuesta)
-        
-        # Calcular puntuación
-        total_correctas = len(frutas_correctas_encontradas) + len(verduras_correctas_encontradas)
-        total_elementos = len(self.frutas_correctas) + len(self.verduras_correctas)
-        
-        self.puntuacion = total_correctas
-        self.intentos += 1
-        
-        self.resultado_final = {
-            "correcto": total_correctas >= (total_elementos * 0.8), 
-            "total_correctas": total_correctas,
-            "total_elementos": total_elementos,
-            "porcentaje": (total_correctas / total_elementos * 100) if total_elementos > 0 else 0,
-            "frutas_correctas_encontradas": frutas_correctas_encontradas,
-            "frutas_incorrectas": frutas_incorrectas,
-            "frutas_perdidas": [f for f in self.frutas_correctas if f not in frutas_correctas_encontradas],
-            "verduras_correctas_encontradas": verduras_correctas_encontradas,
-            "verduras_incorrectas": verduras_incorrectas,
-            "verduras_perdidas": [v for v in self.verduras_correctas if v not in verduras_correctas_encontradas],
-            "respuestas_frutas": self.respuestas_frutas,
-            "respuestas_verduras": self.respuestas_verduras
-        }
-        
-        return self._mostrar_resultado_final()
-    
-    def _mostrar_resultado_final(self):
-        """Muestra el resultado final del juego"""
-        if not self.resultado_final:
-            return {"estado": "error", "mensajes": ["Error: No hay resultado"]}
-        
-        resultado = self.resultado_final
-        mensajes = []
-        
-        if resultado["correcto"]:
-            mensajes.extend([
-                "¡EXCELENTE CLASIFICACION!",
-                f"Puntuacion: {resultado['total_correctas']}/{resultado['total_elementos']}"
-            ])
-        else:
-            mensajes.extend([
-                "¡Buen intento!",
-                f"Puntuacion: {resultado['total_correctas']}/{resultado['total_elementos']}",
-                f"Porcentaje: {resultado['porcentaje']:.1f}%"
-            ])
-        
-        # Mostrar detalles de frutas
-        mensajes.append("")
-        mensajes.append(" FRUTAS:")
-        if resultado['frutas_correctas_encontradas']:
-            mensajes.append(f" Correctas: {', '.join(resultado['frutas_correctas_encontradas'])}")
-        if resultado['frutas_perdidas']:
-            mensajes.append(f" No encontradas: {', '.join(resultado['frutas_perdidas'])}")
-        if resultado['frutas_incorrectas']:
-            mensajes.append(f" Incorrectas: {', '.join(resultado['frutas_incorrectas'])}")
-        
-        # Mostrar detalles de verduras
-        mensajes.append("")
-        mensajes.append(" VERDURAS:")
-        if resultado['verduras_correctas_encontradas']:
-            mensajes.append(f" Correctas: {', '.join(resultado['verduras_correctas_encontradas'])}")
-        if resultado['verduras_perdidas']:
-            mensajes.append(f" No encontradas: {', '.join(resultado['verduras_perdidas'])}")
-        if resultado['verduras_incorrectas']:
-            mensajes.append(f" Incorrectas: {', '.join(resultado['verduras_incorrectas'])}")
-        
-        # Mostrar todas las respuestas correctas
-        mensajes.append("")
-        mensajes.append("RESPUESTAS CORRECTAS COMPLETAS:")
-        mensajes.append(f"Frutas: {', '.join(self.frutas_correctas)}")
-        mensajes.append(f"Verduras: {', '.join(self.verduras_correctas)}")
-        
-        mensajes.extend([
-            "",
-            "Di 'otra vez' para jugar de nuevo",
-            "Di 'salir' para terminar"
-        ])
-        
-        return {
-            "estado": "resultado_final",
-            "mensajes": mensajes,
-            "esperando_marcadores": self.elementos_juego,
-            "modelos": [crear_modelo_por_id(m) for m in self.elementos_juego]
-        }
+    @property
+    def respuestas_verduras(self):
+        return self.respuestas_categoria.get("verduras", [])
     
-    def verificar_elemento_categoria(self, texto, elemento_nombre):
-        """Verificar si un elemento se menciona en el texto"""
-        texto = texto.lower().strip()
-        elemento_nombre = elemento_nombre.lower().strip()
-        
-        # Verificaciones directas
-        if elemento_nombre in texto:
-            return True
-        
-        # Verificaciones con variaciones y sinónimos
-        variaciones = {
-            'pera': ['pera'],
-            'cebolleta': ['cebolleta', 'cebollino', 'cebolla verde'],
-            'cebolla': ['cebolla'],
-            'lechuga': ['lechuga'],
-            'limon': ['limon', 'limón'],  
-            'pimiento rojo': ['pimiento rojo', 'pimiento', 'pimentón rojo', 'chile rojo'],
-            'pimiento verde': ['pimiento verde', 'pimiento', 'pimentón verde', 'chile verde'],
-            'uvas': ['uvas', 'uva', 'racimo'],
-            'zanahoria': ['zanahoria'],
-        }
-        
-        # Buscar variaciones
-        if elemento_nombre in variaciones:
-            for variacion in variaciones[elemento_nombre]:
-                if variacion in texto:
-                    return True
-        
-        # Verificación por palabras clave
-        palabras_elemento = elemento_nombre.split()
-        for palabra in palabras_elemento:
-            if len(palabra) > 2 and palabra in texto:
-                return True
-        
-        return False
+    @property
+    def frutas_correctas(self):
+        return self._nombres(self._elementos_de_tipo("fruta"))
     
-    def procesar_comando(self, comando):
-        """Procesa comandos de voz durante el juego"""
-        comando_lower = comando.lower().strip()
-        
-        # Comandos especiales en resultado final
-        if self.juego_terminado:
-            if any(palabra in comando_lower for palabra in ['otra vez', 'repetir', 'nuevo', 'again']):
-                # Reiniciar juego
-                return self._inicializar_juego()
-            elif any(palabra in comando_lower for palabra in ['salir', 'terminar', 'exit', 'quit']):
-                return {
-                    "estado": "salir",
-                    "mensajes": ["¡Gracias por jugar!", "Hasta la proxima"]
-                }
-            else:
-                return None 
-        
-        # Procesar respuesta durante categoría
-        if self.esperando_respuesta and not self.juego_terminado:
-            return self._procesar_respuesta_categoria(comando_lower)
-        
-        return None
+    @property
+    def verduras_correctas(self):
+        return self._nombres(self._elementos_de_tipo("verdura"))
+
+class JuegoMemoriaAR(JuegoAR):
+    """Juego de Memoria para AR"""
     
-    def _procesar_respuesta_categoria(self, comando):
-        """Procesa la respuesta durante una categoría"""
-        # Comandos especiales
-        if any(palabra in comando for palabra in ['siguiente', 'verduras', 'cambiar']):
-            if self.categoria_actual == "frutas":
-                return self._cambiar_a_verduras()
-            else:
-                return self._finalizar_juego()
-        
-        if any(palabra in comando for palabra in ['listo', 'terminar', 'acabar', 'finalizar']):
-            return self._finalizar_juego()
-        
-        # Procesar respuesta normal
-        if self.categoria_actual == "frutas":
-            # Verificar si ya se dijo esta respuesta
-            if comando not in self.respuestas_frutas:
-                self.respuestas_frutas.append(comando)
-        else:
-            # Verificar si ya se dijo esta respuesta
-            if comando not in self.respuestas_verduras:
-                self.respuestas_verduras.append(comando)
-        
-        # Continuar mostrando la categoría actual
-        return self._mostrar_categoria_actual()
+    clave = "memoria"
     
-    def obtener_estado_detallado(self):
-        """Información detallada del juego"""
-        base_info = super().obtener_estado_detallado()
-        base_info.update({
-            "marcadores_detectados": len(self.marcadores_detectados_inicial),
-            "fase_escaneo_completada": self.fase_escaneo_completada,
-            "elementos_juego": self.elementos_juego,
-            "categoria_actual": self.categoria_actual,
-            "esperando_respuesta": self.esperando_respuesta,
-            "respuestas_frutas": len(self.respuestas_frutas),
-            "respuestas_verduras": len(self.respuestas_verduras),
-            "frutas_correctas_total": len(self.frutas_correctas),
-            "verduras_correctas_total": len(self.verduras_correctas),
-            "juego_terminado": self.juego_terminado
-        })
-        return base_info
+    @property
+    def secuencia_memoria(self):
+        return self.elementos
     
-    def obtener_marcadores_renderizado(self):
-        """Retorna qué marcadores se deben renderizar en 3D según el estado del juego"""
-        if not self.fase_escaneo_completada:
-            # Durante escaneo: mostrar todos los marcadores válidos detectados
-            return list(self.marcadores_detectados_inicial)
-        elif self.elementos_juego:
-            # Durante juego: mostrar todos los elementos del juego
-            return self.elementos_juego
-        else:
-            # Estado por defecto: no mostrar marcadores
-            return []
+    @property
+    def respuesta_usuario(self):
+        return self._nombres(self.respuestas)
     
-    def debe_escuchar_voz(self):
-        """Determina si debe escuchar comandos de voz"""
-        return (self.esperando_respuesta and not self.juego_terminado) or self.juego_terminado
-
-
+    @property
+    def marcador_actual_mostrando(self):
+        return self.marcador_actual
 
+CLASES_JUEGO = {clase.clave: clase for clase in (JuegoDescubreAR, JuegoEncuentraFrutasAR,
+                                                 JuegoCategoriasAR, JuegoMemoriaAR)}
@@ -0,0 +1,187 @@
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+
+# Procesado de frames en etapas, cada una en su hilo y unidas por colas acotadas:
+# mientras el hilo principal compone y muestra el frame N, otra etapa detecta en el N+1
+# y la cámara ya está capturando el N+2. OpenCV suelta el GIL durante casi todo su trabajo.
+#
+# PROFUNDIDAD_PIPELINE: frames que caben en cada cola. 1 da la menor latencia; más
+# profundidad absorbe picos de una etapa a costa de mostrar frames más antiguos.
+# POLITICA_PIPELINE: "latencia" descarta el frame más antiguo si la etapa siguiente
+# va atrasada; "rendimiento" espera a que haya hueco y no pierde frames.
+PROFUNDIDAD_PIPELINE = 2
+POLITICA_PIPELINE = "latencia"
+# Frames recientes con los que se calculan latencia y FPS
+MUESTRAS_LATENCIA = 120
+# Segundos de espera entre reintentos cuando falla la lectura de la cámara (se duplica en cada fallo)
+ESPERA_MIN_CAPTURA = 0.05
+ESPERA_MAX_CAPTURA = 2.0
+
+class PaqueteFrame:
+    """Un frame capturado y lo que cada etapa calcula sobre él"""
+
+    __slots__ = ("numero", "ret", "frame", "secuencia", "t_captura", "tiempos", "datos")
+
+    def __init__(self, numero, ret, frame, secuencia=None):
+        self.numero = numero
+        self.ret = ret
+        self.frame = frame
+        self.secuencia = secuencia  # posición del frame en el bus de la cámara, si lo hay
+        self.t_captura = time.perf_counter()
+        self.tiempos = {}  # etapa -> segundos de trabajo
+        self.datos = {}    # etapa -> resultado
+
+class _Cola:
+    """Cola acotada entre dos etapas con la política de descarte configurada"""
+
+    def __init__(self, profundidad, politica):
+        self.cola = queue.Queue(maxsize=profundidad)
+        self.politica = politica
+        self.descartados = 0
+
+    def poner(self, paquete, activo):
+        if self.politica == "rendimiento":
+            while activo():
+                try:
+                    self.cola.put(paquete, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        while True:
+            try:
+                self.cola.put_nowait(paquete)
+                return
+            except queue.Full:
+                # La etapa siguiente va atrasada: se tira el frame más viejo
+                try:
+                    self.cola.get_nowait()
+                    self.descartados += 1
+                except queue.Empty:
+                    pass
+
+    def sacar(self, timeout):
+        return self.cola.get(timeout=timeout)
+
+class PipelineFrames:
+    """
+    Captura y etapas intermedias en hilos; el hilo principal recoge los paquetes con
+    siguiente() y, cuando ha mostrado el frame, llama a entregado() para medir la latencia.
+    Cada etapa es (nombre, funcion) y funcion(paquete) deja su resultado en paquete.datos.
+    secuencia, si se da, devuelve la secuencia en el bus del frame que acaba de leer leer()
+    """
+
+    def __init__(self, leer, etapas, profundidad=PROFUNDIDAD_PIPELINE, politica=POLITICA_PIPELINE, secuencia=None):
+        if politica not in ("latencia", "rendimiento"):
+            raise ValueError(f"Politica de pipeline desconocida: {politica}")
+        self.leer = leer
+        self.secuencia = secuencia
+        self.etapas = list(etapas)
+        self.profundidad = profundidad
+        self.politica = politica
+        # Una cola a la salida de la captura y de cada etapa; la última la lee el hilo principal
+        self.colas = [_Cola(profundidad, politica) for _ in range(len(self.etapas) + 1)]
+        self.activo = False
+        self._hilos = []
+        self._numero = 0
+
+        self.latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self.entregas = deque(maxlen=MUESTRAS_LATENCIA)
+        self.tiempos_etapa = {nombre: deque(maxlen=MUESTRAS_LATENCIA) for nombre, _ in self.etapas}
+        self.frames_entregados = 0
+
+    def iniciar(self):
+        self.activo = True
+        self._hilos = [threading.Thread(target=self._capturar, daemon=True)]
+        for i, (nombre, funcion) in enumerate(self.etapas):
+            self._hilos.append(threading.Thread(target=self._etapa, args=(nombre, funcion, self.colas[i], self.colas[i + 1]),
+                                                daemon=True))
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self):
+        self.activo = False
+        for hilo in self._hilos:
+            hilo.join(timeout=1.0)
+
+    def _esta_activo(self):
+        return self.activo
+
+    def _capturar(self):
+        espera = ESPERA_MIN_CAPTURA
+        while self.activo:
+            try:
+                ret, frame = self.leer()
+            except Exception as e:
+                # Un fallo de la cámara no debe matar el hilo: se reintenta cada vez más espaciado
+                print(f" Error al capturar en el pipeline: {e}")
+                ret, frame = False, None
+                time.sleep(espera)
+                espera = min(espera * 2, ESPERA_MAX_CAPTURA)
+            else:
+                espera = ESPERA_MIN_CAPTURA
+            self._numero += 1
+            secuencia = self.secuencia() if self.secuencia else None
+            self.colas[0].poner(PaqueteFrame(self._numero, ret, frame, secuencia), self._esta_activo)
+            if not ret:
+                time.sleep(0.01)
+
+    def _etapa(self, nombre, funcion, entrada, salida):
+        while self.activo:
+            try:
+                paquete = entrada.sacar(timeout=0.1)
+            except queue.Empty:
+                continue
+            if paquete.ret:
+                inicio = time.perf_counter()
+                try:
+                    funcion(paquete)
+                except Exception as e:
+                    # Un fallo en una etapa no debe parar la cámara; el hilo principal hará el trabajo
+                    print(f" Error en la etapa {nombre} del pipeline: {e}")
+                paquete.tiempos[nombre] = time.perf_counter() - inicio
+            salida.poner(paquete, self._esta_activo)
+
+    def siguiente(self, timeout=1.0):
+        """Siguiente paquete terminado, o None si no llega ninguno a tiempo"""
+        try:
+            return self.colas[-1].sacar(timeout)
+        except queue.Empty:
+            return None
+
+    def entregado(self, paquete):
+        """Marca el frame como mostrado y anota su latencia de extremo a extremo"""
+        ahora = time.perf_counter()
+        self.latencias.append(ahora - paquete.t_captura)
+        self.entregas.append(ahora)
+        self.frames_entregados += 1
+        for nombre, duracion in paquete.tiempos.items():
+            self.tiempos_etapa[nombre].append(duracion)
+
+    def estadisticas(self):
+        latencias = np.array(self.latencias) * 1000 if self.latencias else np.zeros(1)
+        fps = 0.0
+        if len(self.entregas) > 1 and self.entregas[-1] > self.entregas[0]:
+            fps = (len(self.entregas) - 1) / (self.entregas[-1] - self.entregas[0])
+        return {
+            "profundidad": self.profundidad,
+            "politica": self.politica,
+            "frames": self.frames_entregados,
+            "fps": round(fps, 1),
+            "latencia_media_ms": round(float(latencias.mean()), 1),
+            "latencia_p95_ms": round(float(np.percentile(latencias, 95)), 1),
+            "descartados": sum(cola.descartados for cola in self.colas),
+            "etapas_ms": {nombre: round(float(np.mean(t)) * 1000, 2) if t else 0.0
+                          for nombre, t in self.tiempos_etapa.items()}
+        }
+
+    def imprimir_estadisticas(self):
+        datos = self.estadisticas()
+        print(f" Pipeline ({datos['politica']}, profundidad {datos['profundidad']}): {datos['frames']} frames, "
+              f"{datos['fps']} FPS, latencia media {datos['latencia_media_ms']} ms "
+              f"(p95 {datos['latencia_p95_ms']} ms), {datos['descartados']} frames descartados")
+        for nombre, ms in datos["etapas_ms"].items():
+            print(f"   etapa {nombre}: {ms:.2f} ms de media")
@@ -0,0 +1,183 @@
+import time
+from contextlib import contextmanager
+from collections import deque
+
+# Planificador de frames del bucle principal.
+# Cada tarea tiene una prioridad y un presupuesto; las críticas se ejecutan siempre,
+# las normales se espacian cuando el bucle no llega a los FPS objetivo y las bajas
+# solo se ejecutan si al frame le queda holgura. El tiempo de captura no cuenta:
+# ar.read() espera a la cámara, que es la que marca el ritmo.
+FPS_OBJETIVO = 30
+
+CRITICA = 0
+NORMAL = 1
+BAJA = 2
+
+# Niveles de degradación: cada cuántos frames se ejecutan las tareas normales
+# (detección, caras, juego) y a qué escala se renderizan los modelos 3D
+NIVELES_DEGRADACION = [
+    {"intervalo": 1, "escala_render": 1.0},
+    {"intervalo": 2, "escala_render": 1.0},
+    {"intervalo": 2, "escala_render": 0.5},
+    {"intervalo": 3, "escala_render": 0.5},
+]
+
+VENTANA_FRAMES = 30          # frames que se promedian para decidir el nivel
+FACTOR_DEGRADAR = 1.10       # se degrada si el frame medio supera el presupuesto en un 10%
+FACTOR_RECUPERAR = 0.70      # y se recupera calidad si baja del 70%
+FRAMES_ESTABILIZACION = 60   # frames mínimos entre dos cambios de nivel
+SUAVIZADO_COSTE = 0.2        # peso de la última medida en el coste medio de cada tarea
+
+class Tarea:
+    """Estado y contadores de una tarea del bucle principal"""
+
+    def __init__(self, nombre, prioridad, presupuesto_ms, max_aplazamientos):
+        self.nombre = nombre
+        self.prioridad = prioridad
+        self.presupuesto = presupuesto_ms / 1000.0
+        self.max_aplazamientos = max_aplazamientos
+        self.coste_medio = self.presupuesto
+        self.ultimo_frame = None
+        self.ultimo_resultado = None
+        self.aplazamientos_seguidos = 0
+
+        self.ejecutadas = 0
+        self.aplazadas = 0     # tareas bajas que no cabían en la holgura del frame
+        self.espaciadas = 0    # tareas normales saltadas por el nivel de degradación
+        self.excedidas = 0     # ejecuciones que superaron su presupuesto
+
+class PlanificadorFrames:
+    """
+    Reparte el tiempo de cada frame entre las tareas del bucle principal y
+    degrada la calidad de forma escalonada para mantener FPS_OBJETIVO.
+    Uso por frame: empezar_frame(), ejecutar()/medir() para cada tarea y terminar_frame()
+    """
+
+    def __init__(self, fps_objetivo=FPS_OBJETIVO):
+        self.presupuesto = 1.0 / fps_objetivo
+        self.tareas = {}
+        self.nivel = 0
+        self.frame = 0
+        self.inicio_frame = time.perf_counter()
+        self.duraciones = deque(maxlen=VENTANA_FRAMES)
+        self.frames_desde_cambio = 0
+        self.cambios_nivel = 0
+
+    def registrar(self, nombre, prioridad=NORMAL, presupuesto_ms=5, max_aplazamientos=15):
+        """Añade una tarea. max_aplazamientos evita que una tarea baja no llegue a ejecutarse nunca"""
+        self.tareas[nombre] = Tarea(nombre, prioridad, presupuesto_ms, max_aplazamientos)
+
+    @property
+    def escala_render(self):
+        return NIVELES_DEGRADACION[self.nivel]["escala_render"]
+
+    def empezar_frame(self):
+        self.inicio_frame = time.perf_counter()
+
+    def holgura(self):
+        """Segundos que le quedan al frame actual"""
+        return self.presupuesto - (time.perf_counter() - self.inicio_frame)
+
+    def ejecutar(self, nombre, funcion, *args, **kwargs):
+        """
+        Ejecuta la tarea si le toca en este frame.
+        Retorna (ejecutada, resultado); si no se ejecuta, el resultado es el de la última vez
+        """
+        tarea = self.tareas[nombre]
+        if not self._toca(tarea):
+            return False, tarea.ultimo_resultado
+
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        self._anotar(tarea, time.perf_counter() - inicio)
+        tarea.ultimo_resultado = resultado
+        return True, resultado
+
+    @contextmanager
+    def medir(self, nombre):
+        """Mide un bloque de código que se ejecuta siempre (tareas críticas escritas en línea)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._anotar(self.tareas[nombre], time.perf_counter() - inicio)
+
+    def _toca(self, tarea):
+        if tarea.prioridad == CRITICA or tarea.ultimo_frame is None:
+            return True
+
+        if tarea.prioridad == NORMAL:
+            if self.frame - tarea.ultimo_frame < NIVELES_DEGRADACION[self.nivel]["intervalo"]:
+                tarea.espaciadas += 1
+                return False
+            return True
+
+        # Baja prioridad: solo si su coste medio cabe en lo que queda de frame
+        if tarea.coste_medio <= self.holgura() or tarea.aplazamientos_seguidos >= tarea.max_aplazamientos:
+            return True
+        tarea.aplazadas += 1
+        tarea.aplazamientos_seguidos += 1
+        return False
+
+    def _anotar(self, tarea, duracion):
+        tarea.coste_medio += SUAVIZADO_COSTE * (duracion - tarea.coste_medio)
+        tarea.ejecutadas += 1
+        tarea.ultimo_frame = self.frame
+        tarea.aplazamientos_seguidos = 0
+        if duracion > tarea.presupuesto:
+            tarea.excedidas += 1
+
+    def terminar_frame(self):
+        """Cierra el frame y ajusta el nivel de degradación con histéresis"""
+        self.duraciones.append(time.perf_counter() - self.inicio_frame)
+        self.frame += 1
+        self.frames_desde_cambio += 1
+
+        if len(self.duraciones) < VENTANA_FRAMES or self.frames_desde_cambio < FRAMES_ESTABILIZACION:
+            return
+
+        media = sum(self.duraciones) / len(self.duraciones)
+        nivel_anterior = self.nivel
+        if media > self.presupuesto * FACTOR_DEGRADAR and self.nivel < len(NIVELES_DEGRADACION) - 1:
+            self.nivel += 1
+        elif media < self.presupuesto * FACTOR_RECUPERAR and self.nivel > 0:
+            self.nivel -= 1
+
+        if self.nivel != nivel_anterior:
+            self.frames_desde_cambio = 0
+            self.cambios_nivel += 1
+            print(f" Planificador: frame medio {media * 1000:.1f} ms, nivel de degradacion {nivel_anterior} -> {self.nivel}")
+
+    def fps(self):
+        """FPS que permitiría el trabajo medio por frame (sin contar la espera a la cámara)"""
+        if not self.duraciones:
+            return 0.0
+        media = sum(self.duraciones) / len(self.duraciones)
+        return 1.0 / media if media > 0 else 0.0
+
+    def estadisticas(self):
+        return {
+            "frames": self.frame,
+            "nivel": self.nivel,
+            "cambios_nivel": self.cambios_nivel,
+            "fps": round(self.fps(), 1),
+            "tareas": {
+                nombre: {
+                    "ejecutadas": tarea.ejecutadas,
+                    "aplazadas": tarea.aplazadas,
+                    "espaciadas": tarea.espaciadas,
+                    "excedidas": tarea.excedidas,
+                    "coste_medio_ms": round(tarea.coste_medio * 1000, 2)
+                }
+                for nombre, tarea in self.tareas.items()
+            }
+        }
+
+    def imprimir_estadisticas(self):
+        datos = self.estadisticas()
+        print(f" Planificador: {datos['frames']} frames, nivel {datos['nivel']}, "
+              f"{datos['cambios_nivel']} cambios de nivel, {datos['fps']} FPS de trabajo")
+        print(f"   {'tarea':<14}{'ejecutadas':>11}{'aplazadas':>11}{'espaciadas':>11}{'excedidas':>11}{'media ms':>10}")
+        for nombre, t in datos["tareas"].items():
+            print(f"   {nombre:<14}{t['ejecutadas']:>11}{t['aplazadas']:>11}{t['espaciadas']:>11}"
+                  f"{t['excedidas']:>11}{t['coste_medio_ms']:>10.2f}")
@@ -0,0 +1,91 @@
+import re
+import unicodedata
+from models.modelos import MODELOS_FRUTAS_VERDURAS
+
+def normalizar(texto):
+    """Minúsculas, sin tildes y con los espacios simplificados"""
+    texto = unicodedata.normalize("NFD", texto.lower())
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    return " ".join(texto.split())
+
+def singular_plural(palabra):
+    """Formas singular y plural (aproximadas) de una palabra"""
+    if palabra.endswith("s"):
+        return [palabra[:-1], palabra]
+    if palabra[-1] in "aeiouáéíóú":
+        return [palabra, palabra + "s"]
+    if len(palabra) > 1 and palabra[-2] in "áéíóú":
+        # limón -> limones, cebollín -> cebollines
+        return [palabra, palabra[:-2] + normalizar(palabra[-2]) + palabra[-1] + "es"]
+    return [palabra, palabra + "es"]
+
+def formas_de(nombre):
+    """
+    Una frase en singular y en plural: 'pimiento rojo' -> 'pimientos rojos'.
+    Lo que va detrás de "de" no cambia: 'racimo de uvas' -> 'racimos de uvas'
+    """
+    cabeza, separador, resto = nombre.partition(" de ")
+    palabras = [singular_plural(p) for p in cabeza.split()]
+    return [" ".join(formas) + separador + resto for formas in zip(*palabras)]
+
+class ComparadorRespuestas:
+    """
+    Reconoce qué frutas y verduras se mencionan en un texto.
+    Nombres, sinónimos y plurales se compilan una sola vez en una expresión regular
+    sobre el texto normalizado (sin tildes); las formas largas tienen prioridad,
+    así que "pimiento rojo" no cuenta también como "pimiento verde"
+    """
+
+    def __init__(self, modelos=None):
+        modelos = modelos if modelos is not None else MODELOS_FRUTAS_VERDURAS
+        self.formas = {}    # forma normalizada -> ids que la usan
+        self.nombres = {}   # nombre o respuesta normalizada -> id
+        self.originales = {}  # id -> formas con tildes (para la gramática de voz)
+
+        for marker_id, info in modelos.items():
+            frases = [info["nombre"], info["respuesta_correcta"]] + list(info.get("sinonimos", []))
+            originales = []
+            for frase in frases:
+                for forma in formas_de(frase.lower()):
+                    if forma not in originales:
+                        originales.append(forma)
+                    ids = self.formas.setdefault(normalizar(forma), [])
+                    if marker_id not in ids:
+                        ids.append(marker_id)
+            self.originales[marker_id] = originales
+            self.nombres[normalizar(info["nombre"])] = marker_id
+            self.nombres[normalizar(info["respuesta_correcta"])] = marker_id
+
+        alternativas = sorted(self.formas, key=len, reverse=True)
+        self.patron = re.compile(r"\b(" + "|".join(re.escape(f) for f in alternativas) + r")\b")
+
+    def ids_mencionados(self, texto):
+        """Ids mencionados en el texto, en el orden en que aparecen (sin repetir)"""
+        ids = []
+        for coincidencia in self.patron.finditer(normalizar(texto)):
+            for marker_id in self.formas[coincidencia.group(1)]:
+                if marker_id not in ids:
+                    ids.append(marker_id)
+        return ids
+
+    def id_de(self, elemento):
+        """Id de un elemento dado por id o por nombre; None si no es un modelo conocido"""
+        if isinstance(elemento, int):
+            return elemento
+        return self.nombres.get(normalizar(elemento))
+
+    def menciona(self, texto, elemento):
+        """Indica si el texto menciona el elemento (id o nombre)"""
+        marker_id = self.id_de(elemento)
+        if marker_id is None:
+            # Nombre que no está en los modelos: coincidencia de palabra completa
+            return re.search(r"\b" + re.escape(normalizar(elemento)) + r"\b", normalizar(texto)) is not None
+        return marker_id in self.ids_mencionados(texto)
+
+comparador = ComparadorRespuestas()
+
+def ids_mencionados(texto):
+    return comparador.ids_mencionados(texto)
+
+def menciona(texto, elemento):
+    return comparador.menciona(texto, elemento)
@@ -0,0 +1,157 @@
+import os
+import re
+import time
+import hashlib
+import shutil
+import threading
+import numpy as np
+
+# Historial de partidas: un fichero binario por usuario, modo y juego, solo de añadir.
+# Cada partida es un registro de tamaño fijo, así que el fichero se abre como memmap
+# y cada campo se lee como una columna sin cargar el historial completo.
+SESIONES_DIR = "data/sesiones"
+TIPO_SESION = np.dtype([
+    ("ts", "<f8"),           # instante de fin de la partida (segundos desde epoch)
+    ("puntuacion", "<f4"),   # porcentaje de aciertos (0-100)
+    ("duracion", "<f4"),     # segundos de juego
+    ("marcadores", "<u4"),   # máscara de bits con los IDs de marcador usados (0-31)
+])
+# Partidas recientes que se comparan con las anteriores para calcular la tendencia
+VENTANA_TENDENCIA = 5
+
+_lock = threading.Lock()
+
+def _nombre_fichero(texto):
+    """
+    Nombre legible seguido de un hash corto del texto: "ana maria", "ana-maria" y
+    "ana_maria" dan el mismo nombre legible pero no pueden compartir directorio
+    """
+    texto = texto.lower()
+    legible = re.sub(r"\W+", "_", texto).strip("_") or "_"
+    return f"{legible}_{hashlib.sha1(texto.encode('utf-8')).hexdigest()[:8]}"
+
+def _ruta_serie(nombre_usuario, modo, nombre_juego):
+    return os.path.join(SESIONES_DIR, _nombre_fichero(nombre_usuario), modo,
+                        _nombre_fichero(nombre_juego) + ".bin")
+
+def marcadores_a_mascara(marcadores):
+    mascara = 0
+    for marker_id in marcadores:
+        if 0 <= marker_id < 32:
+            mascara |= 1 << int(marker_id)
+    return mascara
+
+def mascara_a_marcadores(mascara):
+    return [i for i in range(32) if int(mascara) & (1 << i)]
+
+def registrar_sesion(nombre_usuario, modo, nombre_juego, puntuacion, duracion=0.0, marcadores=(), ts=None):
+    """Añade una partida al historial (una escritura secuencial de 20 bytes)"""
+    registro = np.zeros(1, dtype=TIPO_SESION)
+    registro["ts"] = ts if ts is not None else time.time()
+    registro["puntuacion"] = puntuacion
+    registro["duracion"] = duracion
+    registro["marcadores"] = marcadores_a_mascara(marcadores)
+
+    ruta = _ruta_serie(nombre_usuario, modo, nombre_juego)
+    with _lock:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "ab") as f:
+            # Si una escritura anterior se cortó, se descarta el registro incompleto
+            sobrante = f.tell() % TIPO_SESION.itemsize
+            if sobrante:
+                f.truncate(f.tell() - sobrante)
+                f.seek(0, os.SEEK_END)
+            f.write(registro.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+def leer_sesiones(nombre_usuario, modo, nombre_juego, desde=None, hasta=None):
+    """
+    Devuelve las partidas con desde <= ts < hasta como array estructurado (vista memmap).
+    Las partidas se añaden en orden, así que el rango se busca con searchsorted
+    """
+    ruta = _ruta_serie(nombre_usuario, modo, nombre_juego)
+    if not os.path.exists(ruta):
+        return np.zeros(0, dtype=TIPO_SESION)
+    n = os.path.getsize(ruta) // TIPO_SESION.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=TIPO_SESION)
+    sesiones = np.memmap(ruta, dtype=TIPO_SESION, mode="r", shape=(n,))
+
+    inicio, fin = 0, n
+    if desde is not None:
+        inicio = int(np.searchsorted(sesiones["ts"], desde, side="left"))
+    if hasta is not None:
+        fin = int(np.searchsorted(sesiones["ts"], hasta, side="left"))
+    return sesiones[inicio:fin]
+
+def resumen_tendencia(nombre_usuario, modo, nombre_juego, desde=None, hasta=None, ventana=VENTANA_TENDENCIA):
+    """
+    Resume la evolución de un juego: media de las últimas partidas frente a las anteriores,
+    pendiente por partida y duración media. Retorna None si no hay historial
+    """
+    sesiones = leer_sesiones(nombre_usuario, modo, nombre_juego, desde, hasta)
+    if len(sesiones) == 0:
+        return None
+
+    puntuaciones = np.asarray(sesiones["puntuacion"], dtype=np.float64)
+    recientes = puntuaciones[-ventana:]
+    anteriores = puntuaciones[-2 * ventana:-ventana]
+
+    resumen = {
+        "sesiones": len(sesiones),
+        "media_reciente": round(float(recientes.mean()), 2),
+        "media_anterior": round(float(anteriores.mean()), 2) if len(anteriores) else None,
+        "tendencia": None,
+        "pendiente": 0.0,
+        "duracion_media": round(float(np.mean(sesiones["duracion"])), 1),
+        "marcadores_usados": mascara_a_marcadores(np.bitwise_or.reduce(sesiones["marcadores"])),
+        "primera_sesion": float(sesiones["ts"][0]),
+        "ultima_sesion": float(sesiones["ts"][-1]),
+    }
+    if resumen["media_anterior"] is not None:
+        resumen["tendencia"] = round(resumen["media_reciente"] - resumen["media_anterior"], 2)
+    if len(puntuaciones) >= 2:
+        # Ajuste lineal sobre las últimas 2 ventanas: puntos porcentuales por partida
+        ultimas = puntuaciones[-2 * ventana:]
+        resumen["pendiente"] = round(float(np.polyfit(np.arange(len(ultimas)), ultimas, 1)[0]), 2)
+    return resumen
+
+def _fusionar_series(origen, destino):
+    """Añade las partidas de origen a destino manteniendo el orden por ts (lo necesita leer_sesiones)"""
+    n_origen = os.path.getsize(origen) // TIPO_SESION.itemsize
+    n_destino = os.path.getsize(destino) // TIPO_SESION.itemsize
+    partidas = np.concatenate([np.fromfile(destino, dtype=TIPO_SESION, count=n_destino),
+                               np.fromfile(origen, dtype=TIPO_SESION, count=n_origen)])
+    partidas = partidas[np.argsort(partidas["ts"], kind="stable")]
+    ruta_tmp = destino + ".tmp"
+    with open(ruta_tmp, "wb") as f:
+        f.write(partidas.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_tmp, destino)
+    os.remove(origen)
+
+def renombrar_historial(nombre_anterior, nombre_nuevo):
+    """
+    Mueve el historial cuando un usuario cambia de nombre. Si el nombre nuevo ya tenía
+    historial, las series de cada juego se fusionan
+    """
+    origen = os.path.join(SESIONES_DIR, _nombre_fichero(nombre_anterior))
+    destino = os.path.join(SESIONES_DIR, _nombre_fichero(nombre_nuevo))
+    if origen == destino or not os.path.exists(origen):
+        return
+    with _lock:
+        if not os.path.exists(destino):
+            shutil.move(origen, destino)
+            return
+        for modo in os.listdir(origen):
+            os.makedirs(os.path.join(destino, modo), exist_ok=True)
+            for fichero in os.listdir(os.path.join(origen, modo)):
+                serie_origen = os.path.join(origen, modo, fichero)
+                serie_destino = os.path.join(destino, modo, fichero)
+                if os.path.exists(serie_destino):
+                    _fusionar_series(serie_origen, serie_destino)
+                else:
+                    shutil.move(serie_origen, serie_destino)
+        shutil.rmtree(origen)
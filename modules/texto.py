@@ -0,0 +1,186 @@
+from collections import OrderedDict
+import os
+import numpy as np
+import cv2
+import config.interfaz as config_interfaz
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+# Margen del fondo alrededor del texto, como en los textos con fondo de siempre
+MARGEN = 5
+FUENTE_HERSHEY = cv2.FONT_HERSHEY_SIMPLEX
+GROSOR_HERSHEY = 2
+
+def buscar_fuente_ttf():
+    """Primera fuente de config/interfaz.py que exista, o None si no se puede usar TrueType"""
+    if Image is None:
+        return None
+    for ruta in config_interfaz.FUENTES_TTF:
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+class CacheTexto:
+    """
+    Etiquetas de la interfaz rasterizadas una sola vez. Cada combinación de
+    (texto, escala, color, fondo) se guarda como un sprite BGR (BGRA si no tiene fondo)
+    y en cada frame solo se copia sobre la imagen
+    """
+
+    def __init__(self, ruta_fuente=None, max_sprites=None):
+        self.ruta_fuente = ruta_fuente or buscar_fuente_ttf()
+        self.max_sprites = max_sprites or config_interfaz.MAX_SPRITES_TEXTO
+        self.sprites = OrderedDict()  # clave -> (sprite, dx, dy) con (dx, dy) la esquina respecto a pos
+        self.fuentes = {}             # tamaño en píxeles -> ImageFont
+        if self.ruta_fuente is None:
+            print(" Textos con la fuente Hershey de OpenCV (sin Pillow o sin fuente TrueType)")
+
+    def dibujar(self, img, texto, pos, font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0)):
+        """Dibuja el texto con su línea base empezando en pos, igual que cv2.putText"""
+        sprite, dx, dy = self.sprite(texto, font_scale, color, bg_color)
+        self._pegar(img, sprite, pos[0] + dx, pos[1] + dy)
+
+    def sprite(self, texto, font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0)):
+        """(sprite, dx, dy) de la etiqueta; (dx, dy) es su esquina respecto a la posición del texto"""
+        clave = (texto, font_scale, tuple(color), tuple(bg_color) if bg_color is not None else None)
+        entrada = self.sprites.get(clave)
+        if entrada is None:
+            entrada = self._rasterizar(texto, font_scale, color, bg_color)
+            self.sprites[clave] = entrada
+            if len(self.sprites) > self.max_sprites:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(clave)
+        return entrada
+
+    def _rasterizar(self, texto, font_scale, color, bg_color):
+        if self.ruta_fuente is not None:
+            return self._rasterizar_ttf(texto, font_scale, color, bg_color)
+        return self._rasterizar_hershey(texto, font_scale, color, bg_color)
+
+    def _rasterizar_hershey(self, texto, font_scale, color, bg_color):
+        (ancho, alto), baseline = cv2.getTextSize(texto, FUENTE_HERSHEY, font_scale, GROSOR_HERSHEY)
+        # +1: cv2.rectangle incluye las dos esquinas del fondo
+        forma = (alto + baseline + 2 * MARGEN + 1, ancho + 2 * MARGEN + 1)
+        origen = (MARGEN, MARGEN + alto)
+        if bg_color is not None:
+            sprite = np.empty(forma + (3,), dtype=np.uint8)
+            sprite[:] = bg_color
+            cv2.putText(sprite, texto, origen, FUENTE_HERSHEY, font_scale, color, GROSOR_HERSHEY)
+        else:
+            sprite = np.zeros(forma + (4,), dtype=np.uint8)
+            cv2.putText(sprite, texto, origen, FUENTE_HERSHEY, font_scale, tuple(color) + (255,), GROSOR_HERSHEY)
+        return sprite, -MARGEN, -MARGEN - alto
+
+    def _fuente(self, tam):
+        fuente = self.fuentes.get(tam)
+        if fuente is None:
+            fuente = self.fuentes[tam] = ImageFont.truetype(self.ruta_fuente, tam)
+        return fuente
+
+    def _rasterizar_ttf(self, texto, font_scale, color, bg_color):
+        fuente = self._fuente(max(8, round(font_scale * config_interfaz.PIXELES_POR_ESCALA)))
+        # Altura fija por tamaño de fuente: las filas de etiquetas quedan alineadas
+        ascenso, descenso = fuente.getmetrics()
+        ancho = int(np.ceil(fuente.getlength(texto)))
+        tam = (ancho + 2 * MARGEN, ascenso + descenso + 2 * MARGEN)
+        # Pillow trabaja en RGB y los colores de la interfaz son BGR
+        relleno = tuple(color[::-1])
+        if bg_color is not None:
+            imagen = Image.new("RGB", tam, tuple(bg_color[::-1]))
+            ImageDraw.Draw(imagen).text((MARGEN, MARGEN + ascenso), texto, font=fuente, fill=relleno, anchor="ls")
+            sprite = cv2.cvtColor(np.asarray(imagen), cv2.COLOR_RGB2BGR)
+        else:
+            imagen = Image.new("RGBA", tam, (0, 0, 0, 0))
+            ImageDraw.Draw(imagen).text((MARGEN, MARGEN + ascenso), texto, font=fuente, fill=relleno + (255,), anchor="ls")
+            sprite = cv2.cvtColor(np.asarray(imagen), cv2.COLOR_RGBA2BGRA)
+        return sprite, -MARGEN, -MARGEN - ascenso
+
+    @staticmethod
+    def _pegar(img, sprite, x, y):
+        """Copia el sprite en (x, y) recortándolo a los bordes de la imagen"""
+        alto, ancho = sprite.shape[:2]
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + ancho, img.shape[1]), min(y + alto, img.shape[0])
+        if x1 >= x2 or y1 >= y2:
+            return
+        trozo = sprite[y1 - y:y2 - y, x1 - x:x2 - x]
+        if trozo.shape[2] == 3:
+            img[y1:y2, x1:x2] = trozo
+            return
+        # Sin fondo: mezcla con el canal alfa del texto
+        alfa = trozo[:, :, 3:4].astype(np.uint16)
+        destino = img[y1:y2, x1:x2]
+        destino[:] = ((trozo[:, :, :3] * alfa + destino * (255 - alfa)) // 255).astype(np.uint8)
+
+class CapaInterfaz:
+    """
+    Parte fija de una pantalla (menús): las etiquetas con fondo se dibujan una vez sobre una
+    capa con su máscara, recortada a la zona que ocupan, y componerlas es una sola copia con
+    máscara. Las etiquetas sin fondo se mezclan aparte para respetar su alfa
+    """
+
+    def __init__(self, etiquetas, forma, cache):
+        alto, ancho = forma[:2]
+        capa = np.zeros((alto, ancho, 3), dtype=np.uint8)
+        cubiertos = np.zeros((alto, ancho), dtype=np.uint8)
+        self.transparentes = []
+        for texto, pos, font_scale, color, bg_color in etiquetas:
+            sprite, dx, dy = cache.sprite(texto, font_scale, color, bg_color)
+            x, y = pos[0] + dx, pos[1] + dy
+            if sprite.shape[2] == 4:
+                self.transparentes.append((sprite, x, y))
+                continue
+            CacheTexto._pegar(capa, sprite, x, y)
+            cubiertos[max(y, 0):max(y + sprite.shape[0], 0), max(x, 0):max(x + sprite.shape[1], 0)] = 1
+
+        filas, columnas = np.nonzero(cubiertos.any(axis=1))[0], np.nonzero(cubiertos.any(axis=0))[0]
+        self.zona = None
+        if len(filas):
+            self.zona = (slice(filas[0], filas[-1] + 1), slice(columnas[0], columnas[-1] + 1))
+            self.capa = capa[self.zona].copy()
+            self.mascara = cubiertos[self.zona].copy()
+
+    def componer(self, img):
+        if self.zona is not None:
+            # cv2.copyTo escribe directamente en la región de img
+            cv2.copyTo(self.capa, self.mascara, img[self.zona])
+        for sprite, x, y in self.transparentes:
+            CacheTexto._pegar(img, sprite, x, y)
+
+class CacheCapas:
+    """Capas ya compuestas por contenido y tamaño: una pantalla se reconstruye solo si cambia su texto"""
+
+    def __init__(self, cache, max_capas=16):
+        self.cache = cache
+        self.max_capas = max_capas
+        self.capas = OrderedDict()
+
+    def dibujar(self, img, etiquetas):
+        clave = (tuple(etiquetas), img.shape[:2])
+        capa = self.capas.get(clave)
+        if capa is None:
+            capa = self.capas[clave] = CapaInterfaz(etiquetas, img.shape, self.cache)
+            if len(self.capas) > self.max_capas:
+                self.capas.popitem(last=False)
+        else:
+            self.capas.move_to_end(clave)
+        capa.componer(img)
+
+# Cachés compartidas por main y los juegos (la interfaz se dibuja en el hilo principal)
+cache_texto = CacheTexto()
+cache_capas = CacheCapas(cache_texto)
+
+def dibujar_texto(img, texto, pos, font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0)):
+    cache_texto.dibujar(img, texto, pos, font_scale, color, bg_color)
+
+def etiqueta(texto, pos, font_scale=0.7, color=(255, 255, 255), bg_color=(0, 0, 0)):
+    """Etiqueta de una capa fija, con los mismos valores por defecto que dibujar_texto"""
+    return (texto, tuple(pos), font_scale, tuple(color), tuple(bg_color) if bg_color is not None else None)
+
+def dibujar_capa(img, etiquetas):
+    """Dibuja la parte fija de una pantalla, dada como lista de etiqueta(...)"""
+    cache_capas.dibujar(img, etiquetas)
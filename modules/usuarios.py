@@ -1,34 +1,412 @@
+import io
 import json
 import os
+import copy
+import bisect
+import base64
+import time
+import atexit
+import threading
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
+from modules.sesiones import registrar_sesion, resumen_tendencia, renombrar_historial
 
 DB_PATH = "data/usuarios.json"
+# Diario de cambios (una línea JSON por usuario modificado) que se aplica sobre DB_PATH al arrancar
+JOURNAL_PATH = "data/usuarios.journal"
+# Número de entradas del diario a partir del cual se reescribe DB_PATH y se vacía el diario
+MAX_ENTRADAS_JOURNAL = 200
+# Índice facial: matriz de vectores normalizados (memory-mapped) y la clave de usuario de cada fila
+EMBEDDINGS_PATH = "data/embeddings.npy"
+EMBEDDINGS_IDS_PATH = "data/embeddings_ids.json"
 # Umbral para considerar que dos caras son la misma persona
 UMBRAL_SIMILITUD = 0.94  
+# Registro con varias muestras: número máximo de ejemplares guardados por usuario y
+# margen bajo el umbral en el que se consultan los ejemplares si el centroide no llega
+MAX_EJEMPLARES = 5
+MARGEN_EJEMPLARES = 0.03
+# Segundos que se esperan para agrupar varias puntuaciones en una sola escritura
+RETARDO_COLA_PUNTUACIONES = 2.0
+# Formato binario de los vectores faciales en el JSON: "float32" o "float16"
+FORMATO_VECTOR = "float32"
+TIPOS_VECTOR = {"float32": "<f4", "float16": "<f2"}
+
+def codificar_vector(vector, formato=None):
+    """Convierte un vector facial en un blob base64 compacto para guardarlo en el JSON"""
+    formato = formato or FORMATO_VECTOR
+    datos = np.asarray(vector, dtype=TIPOS_VECTOR[formato])
+    return {"formato": formato, "datos": base64.b64encode(datos.tobytes()).decode("ascii")}
+
+def decodificar_vector(valor):
+    """Convierte un vector guardado (blob base64 o lista de floats antigua) en un array float32"""
+    if valor is None:
+        return None
+    if isinstance(valor, dict):
+        datos = np.frombuffer(base64.b64decode(valor["datos"]), dtype=TIPOS_VECTOR[valor.get("formato", "float32")])
+        return datos.astype(np.float32, copy=False)
+    return np.asarray(valor, dtype=np.float32)
+
+# ----- ALMACENAMIENTO (snapshot usuarios.json + diario) -----
+
+# Serializa los accesos a la base de datos en memoria y a los ficheros
+_lock_bd = threading.RLock()
+# Copia en memoria de la base de datos (snapshot + diario aplicado)
+_usuarios_cache = None
+_entradas_journal = 0
+# Rankings precalculados: (modo, nombre_juego) -> lista ordenada de (-puntuacion_media, clave)
+_rankings = {}
+# Entradas de cada usuario en los rankings, para poder quitarlas al actualizarlo
+_entradas_ranking = {}
+
+def _decodificar_usuario(datos):
+    if datos.get("vector_facial") is not None:
+        datos["vector_facial"] = decodificar_vector(datos["vector_facial"])
+    if datos.get("vectores_ejemplo"):
+        datos["vectores_ejemplo"] = [decodificar_vector(v) for v in datos["vectores_ejemplo"]]
+    return datos
+
+def _leer_journal():
+    """
+    Lee las entradas del diario. Una última línea incompleta (corte durante la escritura)
+    se ignora. Retorna (entradas, completo)
+    """
+    entradas = []
+    if not os.path.exists(JOURNAL_PATH):
+        return entradas, True
+    with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                entradas.append(json.loads(linea))
+            except json.JSONDecodeError:
+                print(f" Entrada incompleta al final de {JOURNAL_PATH}, se descarta")
+                return entradas, False
+    return entradas, True
+
+def _cargar_bd():
+    """Carga el snapshot y aplica el diario encima"""
+    global _usuarios_cache, _entradas_journal
+    usuarios = {}
+    if os.path.exists(DB_PATH):
+        with open(DB_PATH, "r", encoding="utf-8") as f:
+            usuarios = json.load(f)
+    for datos in usuarios.values():
+        _decodificar_usuario(datos)
+
+    entradas, completo = _leer_journal()
+    for entrada in entradas:
+        if entrada.get("datos") is None:
+            usuarios.pop(entrada["clave"], None)
+        else:
+            usuarios[entrada["clave"]] = _decodificar_usuario(entrada["datos"])
+
+    _usuarios_cache = usuarios
+    _entradas_journal = len(entradas)
+    _construir_rankings(usuarios)
+    # Con una línea rota al final no se puede seguir añadiendo al diario: se compacta
+    if not completo or _entradas_journal >= MAX_ENTRADAS_JOURNAL:
+        compactar_bd()
+    return _usuarios_cache
+
+def _bd():
+    if _usuarios_cache is None:
+        _cargar_bd()
+    return _usuarios_cache
 
 def cargar_usuarios():
-    if not os.path.exists(DB_PATH):
-        return {}
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Las puntuaciones que siguen en la cola se escriben antes de leer
+    vaciar_cola_puntuaciones()
+    return _leer_usuarios()
+
+def _leer_usuarios():
+    """Copia de la base de datos en memoria (el llamante puede modificarla libremente)"""
+    with _lock_bd:
+        return copy.deepcopy(_bd())
+
+def _serializar_usuario(datos):
+    if datos.get("vector_facial") is None and not datos.get("vectores_ejemplo"):
+        return datos
+    serializado = dict(datos)
+    if datos.get("vector_facial") is not None:
+        serializado["vector_facial"] = codificar_vector(datos["vector_facial"])
+    if datos.get("vectores_ejemplo"):
+        serializado["vectores_ejemplo"] = [codificar_vector(v) for v in datos["vectores_ejemplo"]]
+    return serializado
+
+def guardar_usuario(nombre_key, datos):
+    """
+    Guarda los datos de un único usuario (None para borrarlo) añadiendo una línea al diario,
+    en lugar de reescribir toda la base de datos
+    """
+    global _entradas_journal
+    with _lock_bd:
+        entrada = {"clave": nombre_key, "datos": _serializar_usuario(datos) if datos is not None else None}
+        linea = json.dumps(entrada, ensure_ascii=False) + "\n"
+        with open(JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write(linea)
+            f.flush()
+            os.fsync(f.fileno())
+
+        bd = _bd()
+        if datos is None:
+            bd.pop(nombre_key, None)
+        else:
+            bd[nombre_key] = copy.deepcopy(datos)
+        _ranking_actualizar_usuario(nombre_key, datos)
+        _entradas_journal += 1
+        if _entradas_journal >= MAX_ENTRADAS_JOURNAL:
+            compactar_bd()
 
 def guardar_usuarios(data):
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """
+    Reescribe la base de datos completa: fichero temporal, fsync y renombrado (escritura atómica).
+    Después vacía el diario, que ya está incluido en el snapshot
+    """
+    global _usuarios_cache, _entradas_journal
+    with _lock_bd:
+        serializado = {clave: _serializar_usuario(datos) for clave, datos in data.items()}
+        ruta_tmp = DB_PATH + ".tmp"
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(serializado, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_tmp, DB_PATH)
+        # Si se corta aquí, al arrancar se vuelve a aplicar el diario, que solo contiene
+        # estados completos de usuario y por tanto puede repetirse sin problema
+        if os.path.exists(JOURNAL_PATH):
+            os.remove(JOURNAL_PATH)
+        _usuarios_cache = copy.deepcopy(data)
+        _entradas_journal = 0
+        _construir_rankings(_usuarios_cache)
+
+def _ranking_actualizar_usuario(nombre_key, datos):
+    """Quita las entradas anteriores del usuario en los rankings e inserta las nuevas"""
+    for clave_ranking, entrada in _entradas_ranking.pop(nombre_key, {}).items():
+        ranking = _rankings[clave_ranking]
+        i = bisect.bisect_left(ranking, entrada)
+        if i < len(ranking) and ranking[i] == entrada:
+            del ranking[i]
+
+    if datos is None:
+        return
+    entradas = {}
+    for modo, juegos in datos.get("juegos", {}).items():
+        if not isinstance(juegos, dict):
+            continue
+        for nombre_juego, stats in juegos.items():
+            # Hay datos antiguos con entradas que no son estadísticas de juego
+            if not isinstance(stats, dict) or "puntuacion_media" not in stats:
+                continue
+            entrada = (-float(stats.get("puntuacion_media", 0.0)), nombre_key)
+            bisect.insort(_rankings.setdefault((modo, nombre_juego), []), entrada)
+            entradas[(modo, nombre_juego)] = entrada
+    if entradas:
+        _entradas_ranking[nombre_key] = entradas
+
+def _construir_rankings(usuarios):
+    _rankings.clear()
+    _entradas_ranking.clear()
+    for nombre_key, datos in usuarios.items():
+        _ranking_actualizar_usuario(nombre_key, datos)
+
+def compactar_bd():
+    """Vuelca el estado actual a DB_PATH y vacía el diario"""
+    with _lock_bd:
+        guardar_usuarios(_bd())
+    print(f" Base de datos compactada en {DB_PATH}")
+
+def migrar_vectores_faciales(formato=None):
+    """
+    Reescribe la base de datos con todos los vectores faciales en formato binario.
+    Los vectores antiguos (listas de floats) se leen igualmente sin migrar.
+    """
+    global FORMATO_VECTOR
+    formato_anterior = FORMATO_VECTOR
+    if formato:
+        if formato not in TIPOS_VECTOR:
+            print(f" Formato de vector no valido: {formato}")
+            return False
+        FORMATO_VECTOR = formato
+    try:
+        usuarios = cargar_usuarios()
+        guardar_usuarios(usuarios)
+    finally:
+        FORMATO_VECTOR = formato_anterior
+    print(f" {len(usuarios)} usuarios migrados a {formato or formato_anterior}")
+    return True
+
+# ----- ÍNDICE FACIAL (data/embeddings.npy) -----
+_indice_facial = None
+
+def _normalizar(vector):
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norma = np.linalg.norm(vector)
+    return vector / norma if norma > 0 else vector
+
+def _escribir_indice(matriz, ids):
+    # Escritura a fichero temporal + os.replace para no dejar nunca un índice a medias
+    tmp_matriz = EMBEDDINGS_PATH + ".tmp.npy"
+    np.save(tmp_matriz, np.ascontiguousarray(matriz, dtype=np.float32))
+    os.replace(tmp_matriz, EMBEDDINGS_PATH)
+    _escribir_ids(ids)
+
+def _escribir_ids(ids):
+    tmp_ids = EMBEDDINGS_IDS_PATH + ".tmp"
+    with open(tmp_ids, "w", encoding="utf-8") as f:
+        json.dump(ids, f, ensure_ascii=False)
+    os.replace(tmp_ids, EMBEDDINGS_IDS_PATH)
+
+def _abrir_indice():
+    global _indice_facial
+    with open(EMBEDDINGS_IDS_PATH, "r", encoding="utf-8") as f:
+        ids = json.load(f)
+    matriz = np.load(EMBEDDINGS_PATH, mmap_mode="r")
+    if matriz.ndim != 2 or matriz.shape[0] != len(ids):
+        raise ValueError("Indice facial inconsistente")
+    _indice_facial = {"matriz": matriz, "ids": ids}
+    return _indice_facial
+
+def reconstruir_indice_facial():
+    """Regenera el índice facial a partir de usuarios.json"""
+    usuarios = cargar_usuarios()
+    ids = []
+    filas = []
+    for nombre_key, datos in usuarios.items():
+        if datos.get("vector_facial") is not None:
+            ids.append(nombre_key)
+            filas.append(_normalizar(datos["vector_facial"]))
+    matriz = np.stack(filas) if filas else np.zeros((0, 128), dtype=np.float32)
+    _escribir_indice(matriz, ids)
+    return _abrir_indice()
+
+def cargar_indice_facial():
+    """
+    Devuelve el índice facial, abriendo la matriz con np.load(mmap_mode='r').
+    Solo se reconstruye si falta, no cuadra con el mapa de ids o los ids no son
+    los usuarios con vector facial de la base de datos.
+    """
+    if _indice_facial is not None:
+        return _indice_facial
+    if os.path.exists(EMBEDDINGS_PATH) and os.path.exists(EMBEDDINGS_IDS_PATH):
+        try:
+            indice = _abrir_indice()
+            # Un corte entre guardar_usuario y la actualización del índice deja ids que
+            # ya no cuadran con los usuarios con vector facial de la base de datos
+            with _lock_bd:
+                claves = {clave for clave, datos in _bd().items() if datos.get("vector_facial") is not None}
+            if set(indice["ids"]) == claves:
+                return indice
+            print(" Reconstruyendo indice facial: no coincide con la base de datos")
+        except (OSError, ValueError) as e:
+            print(f" Reconstruyendo indice facial: {e}")
+    return reconstruir_indice_facial()
+
+def _anadir_fila_npy(ruta, fila):
+    """
+    Añade una fila al final de un .npy reescribiendo solo la cabecera.
+    numpy deja espacio en la cabecera para que la primera dimensión crezca sin moverla;
+    si la nueva cabecera no cabe en ese hueco no se toca el fichero y se retorna False.
+    """
+    with open(ruta, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version != (1, 0):
+            return False
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        inicio_datos = f.tell()
+        if fortran_order or len(shape) != 2 or shape[1] != fila.size or dtype != np.float32:
+            return False
+        cabecera = io.BytesIO()
+        np.lib.format.write_array_header_1_0(cabecera, {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (shape[0] + 1, shape[1])
+        })
+        if cabecera.tell() != inicio_datos:
+            return False
+        # Primero los datos y después la cabecera: si se corta entre medias queda una fila
+        # de sobra al final, que np.load ignora, en vez de una cabecera que apunta a datos que no existen
+        f.seek(0, os.SEEK_END)
+        f.write(fila.astype(dtype).tobytes())
+        f.flush()
+        f.seek(0)
+        f.write(cabecera.getvalue())
+    return True
+
+def _indice_guardar_vector(nombre_key, vector_facial):
+    indice = cargar_indice_facial()
+    fila = _normalizar(vector_facial)
+    ids = list(indice["ids"])
+    if nombre_key in ids:
+        # Sobrescribir la fila existente en el propio fichero
+        matriz = np.load(EMBEDDINGS_PATH, mmap_mode="r+")
+        matriz[ids.index(nombre_key)] = fila
+        matriz.flush()
+        del matriz
+    else:
+        ids.append(nombre_key)
+        if not _anadir_fila_npy(EMBEDDINGS_PATH, fila):
+            _escribir_indice(np.vstack([indice["matriz"], fila]), ids)
+        else:
+            _escribir_ids(ids)
+    _abrir_indice()
+
+def _indice_eliminar_vector(nombre_key):
+    indice = cargar_indice_facial()
+    if nombre_key not in indice["ids"]:
+        return
+    # Compactar: la matriz se reescribe sin la fila eliminada
+    posicion = indice["ids"].index(nombre_key)
+    ids = [clave for clave in indice["ids"] if clave != nombre_key]
+    matriz = np.delete(np.asarray(indice["matriz"]), posicion, axis=0)
+    _escribir_indice(matriz, ids)
+    _abrir_indice()
+
+def _indice_renombrar(clave_anterior, clave_nueva):
+    indice = cargar_indice_facial()
+    if clave_anterior not in indice["ids"]:
+        return
+    ids = [clave_nueva if clave == clave_anterior else clave for clave in indice["ids"]]
+    _escribir_ids(ids)
+    indice["ids"] = ids
 
 def obtener_usuario(nombre):
     usuarios = cargar_usuarios()
     return usuarios.get(nombre.lower())
 
-def registrar_usuario(nombre, idioma, vector_facial=None):
+def calcular_centroide(vectores):
     """
-    Registra un usuario con idioma y opcionalmente con vector facial
+    Calcula el centroide de varias muestras faciales y elige hasta MAX_EJEMPLARES
+    muestras lo más distintas posible entre sí (distintas luces o posturas)
+    """
+    muestras = np.array([np.asarray(v, dtype=np.float32).reshape(-1) for v in vectores])
+    centroide = muestras.mean(axis=0)
+    
+    # Selección voraz del punto más lejano, empezando por la muestra más alejada del centroide
+    normalizadas = muestras / np.maximum(np.linalg.norm(muestras, axis=1, keepdims=True), 1e-12)
+    elegidos = [int(np.argmin(normalizadas @ _normalizar(centroide)))]
+    while len(elegidos) < min(MAX_EJEMPLARES, len(muestras)):
+        similitud_max = (normalizadas @ normalizadas[elegidos].T).max(axis=1)
+        similitud_max[elegidos] = np.inf
+        elegidos.append(int(np.argmin(similitud_max)))
+    
+    return centroide.tolist(), [muestras[i].tolist() for i in elegidos]
+
+def registrar_usuario(nombre, idioma, vector_facial=None, vectores_ejemplo=None):
+    """
+    Registra un usuario con idioma y opcionalmente con vector facial.
+    Si se pasan varias muestras faciales se guarda su centroide como vector facial
+    y un pequeño conjunto de ejemplares
     """
     usuarios = cargar_usuarios()
     nombre_key = nombre.lower()
     
+    ejemplares = None
+    if vectores_ejemplo:
+        muestras = list(vectores_ejemplo)
+        if vector_facial is not None:
+            muestras.append(vector_facial)
+        vector_facial, ejemplares = calcular_centroide(muestras)
+    
     if nombre_key not in usuarios:
         nuevo_usuario = {
             "nombre": nombre,
@@ -43,37 +421,29 @@ def registrar_usuario(nombre, idioma, vector_facial=None):
         # Agregar vector facial si se proporciona
         if vector_facial is not None:
             nuevo_usuario["vector_facial"] = vector_facial
+        if ejemplares:
+            nuevo_usuario["vectores_ejemplo"] = ejemplares
         
         usuarios[nombre_key] = nuevo_usuario
-        guardar_usuarios(usuarios)
+        guardar_usuario(nombre_key, nuevo_usuario)
+        if vector_facial is not None:
+            _indice_guardar_vector(nombre_key, vector_facial)
         print(f"✅ Usuario {nombre} registrado correctamente")
     
     return usuarios[nombre_key]
 
-def guardar_puntuacion_juego(nombre_usuario, modo, nombre_juego, puntuacion_obtenida):
+def _aplicar_puntuacion(usuarios, nombre_usuario, modo, nombre_juego, puntuacion_obtenida, fecha=None):
     """
-    Guarda la puntuación en porcentaje de un juego específico y actualiza las estadísticas
-    
-    Args:
-        nombre_usuario (str): Nombre del usuario
-        modo (str): 'entrenamiento' o 'evaluacion'
-        nombre_juego (str): Nombre del juego
-        puntuacion_obtenida (float): Porcentaje de aciertos en esta partida (0–100)
+    Actualiza en memoria las estadísticas de un juego con una nueva partida.
+    Retorna las estadísticas del juego o None si el usuario no existe
     """
-    usuarios = cargar_usuarios()
     nombre_key = nombre_usuario.lower()
-    
     if nombre_key not in usuarios:
         print(f"Usuario {nombre_usuario} no encontrado")
-        return False
-    
-    usuario = usuarios[nombre_key]
+        return None
 
-    try:
-        puntuacion_obtenida = float(puntuacion_obtenida)
-    except (ValueError, TypeError):
-        print(f"Puntuación inválida: {puntuacion_obtenida}")
-        return False
+    usuario = usuarios[nombre_key]
+    fecha = fecha or datetime.now().isoformat()
 
     # Asegurar que existe la estructura de juegos
     if "juegos" not in usuario:
@@ -90,8 +460,8 @@ def guardar_puntuacion_juego(nombre_usuario, modo, nombre_juego, puntuacion_obte
             "mejor_puntuacion": puntuacion_obtenida,
             "ultima_puntuacion": puntuacion_obtenida,
             "suma_porcentajes": puntuacion_obtenida,
-            "fecha_ultima_partida": datetime.now().isoformat(),
-            "fecha_primera_partida": datetime.now().isoformat()
+            "fecha_ultima_partida": fecha,
+            "fecha_primera_partida": fecha
         }
     else:
         juego_stats = usuario["juegos"][modo][nombre_juego]
@@ -114,16 +484,43 @@ def guardar_puntuacion_juego(nombre_usuario, modo, nombre_juego, puntuacion_obte
         juego_stats["puntuacion_media"] = round(nueva_media, 2)
         juego_stats["mejor_puntuacion"] = max(juego_stats["mejor_puntuacion"], puntuacion_obtenida)
         juego_stats["ultima_puntuacion"] = puntuacion_obtenida
-        juego_stats["fecha_ultima_partida"] = datetime.now().isoformat()
+        juego_stats["fecha_ultima_partida"] = fecha
+
+    return usuario["juegos"][modo][nombre_juego]
 
-    # Guardar cambios
+def guardar_puntuacion_juego(nombre_usuario, modo, nombre_juego, puntuacion_obtenida, duracion=0.0, marcadores=()):
+    """
+    Guarda la puntuación en porcentaje de un juego específico, actualiza las estadísticas
+    y añade la partida al historial de sesiones
+    
+    Args:
+        nombre_usuario (str): Nombre del usuario
+        modo (str): 'entrenamiento' o 'evaluacion'
+        nombre_juego (str): Nombre del juego
+        puntuacion_obtenida (float): Porcentaje de aciertos en esta partida (0–100)
+        duracion (float): Segundos que ha durado la partida
+        marcadores (iterable): IDs de los marcadores usados en la partida
+    """
     try:
-        guardar_usuarios(usuarios)
-    except Exception as e:
-        print(f"Error al guardar usuarios: {e}")
+        puntuacion_obtenida = float(puntuacion_obtenida)
+    except (ValueError, TypeError):
+        print(f"Puntuación inválida: {puntuacion_obtenida}")
         return False
 
-    stats = usuario["juegos"][modo][nombre_juego]
+    with _lock_bd:
+        usuarios = cargar_usuarios()
+        stats = _aplicar_puntuacion(usuarios, nombre_usuario, modo, nombre_juego, puntuacion_obtenida)
+        if stats is None:
+            return False
+
+        # Guardar cambios
+        try:
+            guardar_usuario(nombre_usuario.lower(), usuarios[nombre_usuario.lower()])
+            registrar_sesion(nombre_usuario.lower(), modo, nombre_juego, puntuacion_obtenida, duracion, marcadores)
+        except Exception as e:
+            print(f"Error al guardar usuarios: {e}")
+            return False
+
     print(f"✅ Puntuación guardada para {nombre_usuario}")
     print(f"   Juego: {nombre_juego} ({modo})")
     print(f"   Ultima partida: {puntuacion_obtenida:.1f}%")
@@ -133,6 +530,114 @@ def guardar_puntuacion_juego(nombre_usuario, modo, nombre_juego, puntuacion_obte
     
     return True
 
+class ColaPuntuaciones:
+    """
+    Cola de escritura diferida para las puntuaciones.
+    encolar() vuelve al instante; un hilo en segundo plano agrupa las partidas
+    pendientes y las aplica con una única lectura y escritura de la base de datos.
+    """
+
+    def __init__(self, retardo=RETARDO_COLA_PUNTUACIONES):
+        self.retardo = retardo
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo = None
+        self._activo = False
+
+    def encolar(self, nombre_usuario, modo, nombre_juego, puntuacion_obtenida, duracion=0.0, marcadores=()):
+        try:
+            puntuacion_obtenida = float(puntuacion_obtenida)
+        except (ValueError, TypeError):
+            print(f"Puntuación inválida: {puntuacion_obtenida}")
+            return False
+
+        with self._lock:
+            self._pendientes.append((nombre_usuario, modo, nombre_juego, puntuacion_obtenida,
+                                     duracion, tuple(marcadores), time.time()))
+            if self._hilo is None or not self._hilo.is_alive():
+                self._activo = True
+                self._hilo = threading.Thread(target=self._bucle, daemon=True)
+                self._hilo.start()
+        self._evento.set()
+        return True
+
+    def pendientes(self):
+        with self._lock:
+            return len(self._pendientes)
+
+    def vaciar(self):
+        """Escribe ahora todas las puntuaciones pendientes. Retorna cuántas se han guardado"""
+        with _lock_bd:
+            with self._lock:
+                lote, self._pendientes = self._pendientes, []
+            if not lote:
+                return 0
+
+            usuarios = _leer_usuarios()
+            guardadas = 0
+            modificados = set()
+            sesiones = []
+            for nombre_usuario, modo, nombre_juego, puntuacion, duracion, marcadores, ts in lote:
+                fecha = datetime.fromtimestamp(ts).isoformat()
+                if _aplicar_puntuacion(usuarios, nombre_usuario, modo, nombre_juego, puntuacion, fecha) is not None:
+                    guardadas += 1
+                    modificados.add(nombre_usuario.lower())
+                    sesiones.append((nombre_usuario.lower(), modo, nombre_juego, puntuacion, duracion, marcadores, ts))
+            escritos = set()
+            try:
+                for nombre_key in modificados:
+                    guardar_usuario(nombre_key, usuarios[nombre_key])
+                    escritos.add(nombre_key)
+            except Exception as e:
+                print(f"Error al guardar usuarios: {e}")
+                # Solo vuelven a la cola las partidas de los usuarios que no se llegaron a
+                # escribir; las demás ya están en el diario y se aplicarían dos veces
+                fallidos = modificados - escritos
+                with self._lock:
+                    self._pendientes[:0] = [p for p in lote if p[0].lower() in fallidos]
+                guardadas = sum(1 for sesion in sesiones if sesion[0] in escritos)
+                sesiones = [sesion for sesion in sesiones if sesion[0] in escritos]
+
+            for sesion in sesiones:
+                try:
+                    registrar_sesion(*sesion)
+                except OSError as e:
+                    print(f"Error al guardar el historial de sesiones: {e}")
+
+        print(f"✅ {guardadas} puntuación(es) guardada(s) en {DB_PATH}")
+        return guardadas
+
+    def detener(self):
+        """Para el hilo y escribe lo pendiente (llamar al salir de la aplicación)"""
+        self._activo = False
+        self._evento.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+        self.vaciar()
+
+    def _bucle(self):
+        while self._activo:
+            self._evento.wait()
+            self._evento.clear()
+            if not self._activo:
+                break
+            # Esperar un poco para agrupar las partidas que lleguen seguidas
+            time.sleep(self.retardo)
+            self.vaciar()
+
+cola_puntuaciones = ColaPuntuaciones()
+atexit.register(cola_puntuaciones.detener)
+
+def encolar_puntuacion(nombre_usuario, modo, nombre_juego, puntuacion_obtenida, duracion=0.0, marcadores=()):
+    """Registra una puntuación sin bloquear; se escribe en segundo plano"""
+    return cola_puntuaciones.encolar(nombre_usuario, modo, nombre_juego, puntuacion_obtenida, duracion, marcadores)
+
+def vaciar_cola_puntuaciones():
+    """Escribe las puntuaciones pendientes, si las hay"""
+    if cola_puntuaciones.pendientes():
+        cola_puntuaciones.vaciar()
+
 def obtener_estadisticas_juego(nombre_usuario, modo=None, nombre_juego=None):
     """
     Obtiene estadísticas de juegos de un usuario
@@ -183,7 +688,8 @@ def obtener_estadisticas_juego(nombre_usuario, modo=None, nombre_juego=None):
 
 def obtener_ranking_juego(nombre_juego, modo, top=10):
     """
-    Obtiene un ranking de usuarios para un juego específico
+    Obtiene un ranking de usuarios para un juego específico.
+    Usa los rankings que se mantienen al guardar cada usuario, sin leer ficheros ni ordenar.
     
     Args:
         nombre_juego (str): Nombre del juego
@@ -193,14 +699,11 @@ def obtener_ranking_juego(nombre_juego, modo, top=10):
     Returns:
         list: Lista de usuarios ordenados por puntuación media
     """
-    usuarios = cargar_usuarios()
     ranking = []
-    
-    for nombre_key, usuario_data in usuarios.items():
-        if ("juegos" in usuario_data and 
-            modo in usuario_data["juegos"] and 
-            nombre_juego in usuario_data["juegos"][modo]):
-            
+    with _lock_bd:
+        usuarios = _bd()
+        for _, nombre_key in _rankings.get((modo, nombre_juego), [])[:top]:
+            usuario_data = usuarios[nombre_key]
             stats = usuario_data["juegos"][modo][nombre_juego]
             ranking.append({
                 "nombre": usuario_data.get("nombre", nombre_key),
@@ -210,10 +713,7 @@ def obtener_ranking_juego(nombre_juego, modo, top=10):
                 "fecha_ultima_partida": stats["fecha_ultima_partida"]
             })
     
-    # Ordenar por puntuación media (descendente)
-    ranking.sort(key=lambda x: x["puntuacion_media"], reverse=True)
-    
-    return ranking[:top]
+    return ranking
 
 def obtener_progreso_usuario(nombre_usuario):
     """
@@ -247,7 +747,8 @@ def obtener_progreso_usuario(nombre_usuario):
                 "total_partidas_modo": 0,
                 "promedio_general": 0,
                 "mejor_juego": None,
-                "juegos": {}
+                "juegos": {},
+                "tendencias": {}
             }
             
             total_puntuacion_modo = 0
@@ -256,6 +757,10 @@ def obtener_progreso_usuario(nombre_usuario):
             
             for nombre_juego, stats in usuario["juegos"][modo].items():
                 modo_stats["juegos"][nombre_juego] = stats
+                # Evolución reciente a partir del historial de sesiones (si existe)
+                tendencia = resumen_tendencia(nombre_usuario.lower(), modo, nombre_juego)
+                if tendencia:
+                    modo_stats["tendencias"][nombre_juego] = tendencia
                 total_partidas_modo += stats["partidas_jugadas"]
                 total_puntuacion_modo += stats["puntuacion_media"] * stats["partidas_jugadas"]
                 
@@ -306,6 +811,9 @@ def imprimir_progreso_usuario(nombre_usuario):
         print(f"   Detalle por juego:")
         for nombre_juego, juego_stats in stats["juegos"].items():
             print(f"- {nombre_juego}: {juego_stats['puntuacion_media']:.1f}% (promedio de {juego_stats['partidas_jugadas']} partidas)")
+            tendencia = stats["tendencias"].get(nombre_juego)
+            if tendencia and tendencia["tendencia"] is not None:
+                print(f"    Ultimas partidas: {tendencia['media_reciente']:.1f}% ({tendencia['tendencia']:+.1f} respecto a las anteriores)")
 
 def comparar_vectores_faciales(vector1, vector2):
     """Compara dos vectores faciales y retorna la similitud"""
@@ -332,13 +840,32 @@ def buscar_usuario_por_cara(vector_facial):
     if vector_facial is None:
         return None, None
         
-    usuarios = cargar_usuarios()
+    indice = cargar_indice_facial()
     
-    for nombre_key, datos in usuarios.items():
-        if 'vector_facial' in datos and datos['vector_facial'] is not None:
-            similitud = comparar_vectores_faciales(vector_facial, datos['vector_facial'])
-            print(f"Similitud con {datos.get('nombre', nombre_key)}: {similitud:.3f}")
-            
+    if len(indice["ids"]) > 0:
+        # Similitud coseno con los centroides de todos los usuarios a la vez (filas ya normalizadas)
+        vector = _normalizar(vector_facial)
+        similitudes = indice["matriz"] @ vector
+        mejor = int(np.argmax(similitudes))
+        nombre_key = indice["ids"][mejor]
+        print(f"Similitud con {nombre_key}: {similitudes[mejor]:.3f}")
+        
+        if similitudes[mejor] >= UMBRAL_SIMILITUD:
+            datos = obtener_usuario(nombre_key)
+            if datos:
+                print(f" Usuario {datos.get('nombre', nombre_key)} reconocido por cara")
+                return datos.get('nombre', nombre_key), datos
+        
+        # Cerca del umbral: comparar con los ejemplares de los candidatos más probables
+        candidatos = [int(i) for i in np.argsort(similitudes)[::-1][:3]
+                      if similitudes[i] >= UMBRAL_SIMILITUD - MARGEN_EJEMPLARES]
+        for posicion in candidatos:
+            nombre_key = indice["ids"][posicion]
+            datos = obtener_usuario(nombre_key)
+            if not datos or not datos.get("vectores_ejemplo"):
+                continue
+            similitud = max(float(_normalizar(ejemplar) @ vector) for ejemplar in datos["vectores_ejemplo"])
+            print(f"Similitud con ejemplares de {nombre_key}: {similitud:.3f}")
             if similitud >= UMBRAL_SIMILITUD:
                 print(f" Usuario {datos.get('nombre', nombre_key)} reconocido por cara")
                 return datos.get('nombre', nombre_key), datos
@@ -356,7 +883,8 @@ def actualizar_vector_facial(nombre, vector_facial):
     if nombre_key in usuarios:
         usuarios[nombre_key]["vector_facial"] = vector_facial
         usuarios[nombre_key]["fecha_actualizacion_facial"] = datetime.now().isoformat()
-        guardar_usuarios(usuarios)
+        guardar_usuario(nombre_key, usuarios[nombre_key])
+        _indice_guardar_vector(nombre_key, vector_facial)
         print(f" Vector facial actualizado para {nombre}")
         return True
     else:
@@ -373,8 +901,10 @@ def eliminar_vector_facial(nombre):
     if nombre_key in usuarios:
         if "vector_facial" in usuarios[nombre_key]:
             del usuarios[nombre_key]["vector_facial"]
+            usuarios[nombre_key].pop("vectores_ejemplo", None)
             usuarios[nombre_key]["fecha_eliminacion_facial"] = datetime.now().isoformat()
-            guardar_usuarios(usuarios)
+            guardar_usuario(nombre_key, usuarios[nombre_key])
+            _indice_eliminar_vector(nombre_key)
             print(f" Vector facial eliminado para {nombre}")
             return True
         else:
@@ -460,7 +990,7 @@ def obtener_datos_visibles_usuario(nombre):
         print(f" Usuario {nombre} no encontrado")
         return None
     
-    datos_visibles = {k: v for k, v in usuario.items() if k != "vector_facial"}
+    datos_visibles = {k: v for k, v in usuario.items() if k not in ("vector_facial", "vectores_ejemplo")}
     return datos_visibles
 
 def actualizar_nombre_usuario(nombre_anterior, nombre_nuevo):
@@ -496,7 +1026,12 @@ def actualizar_usuario(nombre_actual, nuevo_nombre=None, nuevo_idioma=None):
         from datetime import datetime
         usuario["fecha_actualizacion_idioma"] = datetime.now().isoformat()
 
-    guardar_usuarios(usuarios)
+    # Primero se guarda la clave nueva: si se corta entre medias el usuario no se pierde
+    guardar_usuario(key_actual, usuario)
+    if key_actual != nombre_actual.lower():
+        guardar_usuario(nombre_actual.lower(), None)
+        _indice_renombrar(nombre_actual.lower(), key_actual)
+        renombrar_historial(nombre_actual.lower(), key_actual)
     print(f"Usuario '{nuevo_nombre}' actualizado correctamente.")
     return True
 
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+import speech_recognition as sr
+import config.voz as config_voz
+from config.juegos import JUEGOS, COMANDOS_REPETIR, COMANDOS_SALIR
+from modules.respuestas import comparador
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+# Palabras y frases que la aplicación espera oír (comandos de main.py y de los juegos).
+# Con Vosk el reconocimiento se limita a esta gramática, salvo en las fases de nombre libre.
+COMANDOS_VOZ = [
+    "iniciar sesión", "iniciar", "registrar", "registrarme",
+    "comenzar", "empezar", "jugar", "cuenta", "personal", "progreso", "estadisticas",
+    "salir", "cerrar", "volver", "atras", "menu", "continuar", "siguiente",
+    "cambiar nombre", "cambiar idioma", "cambiar",
+    "español", "castellano", "inglés", "english",
+    "entrenamiento", "entrenar", "practicar", "evaluación", "evaluar",
+    "descubre", "nombra", "nombres", "frutas", "verduras", "encuentra",
+    "categorias", "categorías", "agrupa", "separa", "memoria", "recuerda", "secuencia",
+    "otra vez", "repetir", "nuevo", "terminar", "sí", "no",
+]
+
+def gramatica_respuestas():
+    """Nombres, sinónimos y plurales de las frutas y verduras de los marcadores"""
+    nombres = set()
+    for formas in comparador.originales.values():
+        nombres.update(formas)
+    return sorted(nombres)
+
+def comandos_juegos():
+    """Comandos que aceptan los juegos según sus definiciones (p. ej. 'listo' en categorías)"""
+    comandos = COMANDOS_REPETIR + COMANDOS_SALIR
+    for definicion in JUEGOS.values():
+        comandos.append(definicion["comando"])
+        for fase in definicion["fases"]:
+            comandos += fase.get("comandos_siguiente", []) + fase.get("comandos_terminar", [])
+    return comandos
+
+def gramatica_comandos():
+    # dict.fromkeys quita repetidos conservando el orden
+    return list(dict.fromkeys(COMANDOS_VOZ + comandos_juegos())) + gramatica_respuestas()
+
+def gramatica_para_fase(fase):
+    """Gramática de la fase actual, o None si se espera texto libre (nombres)"""
+    if "nombre" in fase:
+        return None
+    return gramatica_comandos()
+
+class ReconocedorGoogle:
+    """Reconocimiento en la nube con la Web Speech API de Google (necesita red)"""
+
+    nombre = "google"
+
+    def __init__(self, recognizer, idioma=None):
+        self.recognizer = recognizer
+        self.idioma = idioma or config_voz.IDIOMA_GOOGLE
+
+    def reconocer(self, audio, gramatica=None, al_parcial=None):
+        # Google no admite gramática ni resultados parciales
+        return self.recognizer.recognize_google(audio, language=self.idioma).lower().strip()
+
+class FlujoVosk:
+    """Reconocimiento incremental: se le van pasando bloques de audio PCM 16 bits mono"""
+
+    def __init__(self, modelo, frecuencia, gramatica=None):
+        if gramatica:
+            self.kaldi = vosk.KaldiRecognizer(modelo, frecuencia, json.dumps(gramatica + ["[unk]"], ensure_ascii=False))
+        else:
+            self.kaldi = vosk.KaldiRecognizer(modelo, frecuencia)
+        self.ultimo_parcial = ""
+
+    def aceptar(self, bloque):
+        """Procesa un bloque. Retorna el texto parcial si ha cambiado, o None"""
+        if self.kaldi.AcceptWaveform(bloque):
+            parcial = json.loads(self.kaldi.Result()).get("text", "")
+        else:
+            parcial = json.loads(self.kaldi.PartialResult()).get("partial", "")
+        parcial = _limpiar(parcial)
+        if parcial and parcial != self.ultimo_parcial:
+            self.ultimo_parcial = parcial
+            return parcial
+        return None
+
+    def final(self):
+        texto = _limpiar(json.loads(self.kaldi.FinalResult()).get("text", ""))
+        return texto or self.ultimo_parcial
+
+def _limpiar(texto):
+    return " ".join(palabra for palabra in texto.split() if palabra != "[unk]")
+
+class ReconocedorVosk:
+    """Reconocimiento local con Vosk (sin red), limitado opcionalmente a una gramática"""
+
+    nombre = "vosk"
+    TAM_BLOQUE = 4000  # bytes de audio por llamada al decodificador (125 ms a 16 kHz)
+
+    def __init__(self, ruta_modelo, frecuencia=16000):
+        vosk.SetLogLevel(-1)
+        self.modelo = vosk.Model(ruta_modelo)
+        self.frecuencia = frecuencia
+
+    def iniciar_flujo(self, gramatica=None, frecuencia=None):
+        return FlujoVosk(self.modelo, frecuencia or self.frecuencia, gramatica)
+
+    def reconocer(self, audio, gramatica=None, al_parcial=None):
+        """
+        Reconoce un sr.AudioData. Lanza sr.UnknownValueError si no se entiende nada,
+        igual que recognize_google
+        """
+        datos = audio.get_raw_data(convert_rate=self.frecuencia, convert_width=2)
+        flujo = self.iniciar_flujo(gramatica)
+        for i in range(0, len(datos), self.TAM_BLOQUE):
+            parcial = flujo.aceptar(datos[i:i + self.TAM_BLOQUE])
+            if parcial and al_parcial:
+                al_parcial(parcial)
+        texto = flujo.final()
+        if not texto:
+            raise sr.UnknownValueError()
+        return texto
+
+class DetectorPalabrasClave:
+    """
+    Busca palabras de la gramática en los resultados parciales y decide cuándo
+    se puede dar una por oída sin esperar al final de la frase
+    """
+
+    def __init__(self, gramatica):
+        self.frases = sorted(set(gramatica), key=len, reverse=True)
+
+    def buscar(self, parcial):
+        """
+        Retorna la frase de la gramática con la que termina el parcial si ya no puede
+        convertirse en otra más larga (p. ej. "pimiento" puede seguir como "pimiento rojo")
+        """
+        for frase in self.frases:
+            if parcial == frase or parcial.endswith(" " + frase):
+                if any(otra.startswith(frase + " ") for otra in self.frases):
+                    return None
+                return frase
+        return None
+
+def escuchar_palabras_clave(frase, reconocedor, gramatica):
+    """
+    Pasa los bloques de una frase al reconocedor en streaming a medida que se capturan.
+    Devuelve la palabra clave en cuanto aparece en un resultado parcial, o el texto
+    final cuando termina la frase
+    """
+    flujo = reconocedor.iniciar_flujo(gramatica, frecuencia=frase.frecuencia)
+    detector = DetectorPalabrasClave(gramatica)
+
+    for bloque in frase.bloques():
+        parcial = flujo.aceptar(bloque)
+        if parcial:
+            clave = detector.buscar(parcial)
+            if clave:
+                return clave
+
+    texto = flujo.final()
+    if not texto:
+        raise sr.UnknownValueError()
+    return texto
+
+class FraseAudio:
+    """Frase detectada por CapturaAudio; sus bloques llegan mientras se sigue hablando"""
+
+    def __init__(self, frecuencia, ancho_muestra, inicio):
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.inicio = inicio
+        self._bloques = queue.Queue()
+
+    def _anadir(self, bloque):
+        self._bloques.put(bloque)
+
+    def _terminar(self):
+        self._bloques.put(None)
+
+    def bloques(self):
+        while True:
+            bloque = self._bloques.get()
+            if bloque is None:
+                return
+            yield bloque
+
+    def audio(self):
+        """Espera al final de la frase y la devuelve como sr.AudioData"""
+        return sr.AudioData(b"".join(self.bloques()), self.frecuencia, self.ancho_muestra)
+
+class CapturaAudio:
+    """
+    Hilo que mantiene el micrófono abierto y separa frases con un VAD de energía
+    y cruces por cero. Guarda un pequeño búfer circular para no perder el principio
+    de las palabras, y las frases dichas justo antes de empezar a escuchar
+    """
+
+    def __init__(self, microphone):
+        self.microphone = microphone
+        self.frases = queue.Queue()
+        self.activo = False
+        self._hilo = None
+
+    def iniciar(self):
+        self.activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self.activo = False
+
+    def siguiente_frase(self, timeout):
+        """
+        Retorna la siguiente FraseAudio. Las frases que empezaron hace más de
+        ANTIGUEDAD_MAX_FRASE segundos se descartan. Lanza sr.WaitTimeoutError si no hay ninguna
+        """
+        limite = time.time() + timeout
+        while True:
+            restante = limite - time.time()
+            if restante <= 0:
+                raise sr.WaitTimeoutError("No se ha detectado voz")
+            try:
+                frase = self.frases.get(timeout=restante)
+            except queue.Empty:
+                raise sr.WaitTimeoutError("No se ha detectado voz")
+            if time.time() - frase.inicio <= config_voz.ANTIGUEDAD_MAX_FRASE:
+                return frase
+
+    def _bucle(self):
+        espera = config_voz.ESPERA_MIN_MICROFONO
+        while self.activo:
+            try:
+                with self.microphone as source:
+                    espera = config_voz.ESPERA_MIN_MICROFONO
+                    self._escuchar(source)
+            except OSError as e:
+                # Desbordamiento del búfer o micrófono desconectado: se vuelve a abrir
+                # en lugar de perder la entrada de voz el resto de la sesión
+                print(f" Error de captura de audio, reabriendo el micrófono: {e}")
+                time.sleep(espera)
+                espera = min(espera * 2, config_voz.ESPERA_MAX_MICROFONO)
+
+    def _escuchar(self, source):
+        frecuencia, ancho = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+        duracion_bloque = source.CHUNK / frecuencia
+        preroll = deque(maxlen=max(1, int(config_voz.PREROLL_VOZ / duracion_bloque)))
+        bloques_fin = max(1, int(config_voz.PAUSA_FIN_FRASE / duracion_bloque))
+        bloques_max = int(config_voz.MAX_DURACION_FRASE / duracion_bloque)
+
+        ruido = float(config_voz.UMBRAL_ENERGIA_MINIMO) / config_voz.FACTOR_RUIDO
+        frase = None
+        voz_seguida = silencio = longitud = 0
+
+        try:
+            while self.activo:
+                bloque = source.stream.read(source.CHUNK)
+                muestras = np.frombuffer(bloque, dtype=np.int16).astype(np.float32)
+                energia = float(np.sqrt(np.mean(muestras ** 2))) if len(muestras) else 0.0
+                cruces = float(np.mean(np.signbit(muestras[1:]) != np.signbit(muestras[:-1]))) if len(muestras) > 1 else 0.0
+                umbral = max(config_voz.UMBRAL_ENERGIA_MINIMO, ruido * config_voz.FACTOR_RUIDO)
+                es_voz = energia > umbral and (cruces < config_voz.MAX_CRUCES_CERO or energia > 2 * umbral)
+
+                if frase is None:
+                    preroll.append(bloque)
+                    if es_voz:
+                        voz_seguida += 1
+                    else:
+                        voz_seguida = 0
+                        # El ruido de fondo solo se actualiza cuando nadie habla
+                        ruido = 0.95 * ruido + 0.05 * energia
+                    if voz_seguida >= 2:
+                        frase = FraseAudio(frecuencia, ancho, time.time() - len(preroll) * duracion_bloque)
+                        for anterior in preroll:
+                            frase._anadir(anterior)
+                        preroll.clear()
+                        longitud = voz_seguida
+                        silencio = 0
+                        self.frases.put(frase)
+                    continue
+
+                frase._anadir(bloque)
+                longitud += 1
+                silencio = 0 if es_voz else silencio + 1
+                if silencio >= bloques_fin or longitud >= bloques_max:
+                    frase._terminar()
+                    frase = None
+                    voz_seguida = 0
+        finally:
+            # Una frase a medias se cierra con lo oído hasta ahora para no bloquear a quien la espera
+            if frase is not None:
+                frase._terminar()
+
+def crear_reconocedor(recognizer, motor=None):
+    """Crea el reconocedor configurado en config/voz.py (Google si Vosk no está disponible)"""
+    motor = motor or config_voz.MOTOR
+
+    if motor == "vosk":
+        if vosk is None:
+            print(" Paquete vosk no instalado, se usa el reconocimiento de Google")
+        elif not os.path.exists(config_voz.MODELO_VOSK):
+            print(f" No se encuentra el modelo Vosk ({config_voz.MODELO_VOSK}), se usa el reconocimiento de Google")
+        else:
+            return ReconocedorVosk(config_voz.MODELO_VOSK, config_voz.FRECUENCIA_VOSK)
+    elif motor != "google":
+        raise ValueError(f"Motor de reconocimiento de voz desconocido: {motor}")
+
+    return ReconocedorGoogle(recognizer)
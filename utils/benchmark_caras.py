@@ -0,0 +1,87 @@
+"""
+Compara latencia y recall de los detectores de caras sobre un vídeo grabado en el kiosko.
+
+La referencia es el detector Haar a resolución completa en todos los frames
+(el comportamiento original). Una caja de referencia cuenta como encontrada
+si algún detector candidato devuelve una caja con IoU >= 0.5.
+
+Uso: python -m utils.benchmark_caras grabacion.mp4 [--max-frames 600]
+"""
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+from modules.caras import DetectorHaar, crear_detector_caras
+import config.caras as config_caras
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    x1, y1 = max(ax, bx), max(ay, by)
+    x2, y2 = min(ax + aw, bx + bw), min(ay + ah, by + bh)
+    interseccion = max(0, x2 - x1) * max(0, y2 - y1)
+    union = aw * ah + bw * bh - interseccion
+    return interseccion / union if union > 0 else 0.0
+
+def leer_frames(ruta, max_frames):
+    video = cv2.VideoCapture(ruta)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = video.read()
+        if not ret:
+            break
+        frames.append(frame)
+    video.release()
+    return frames
+
+def medir(detector, frames, referencia):
+    tiempos = []
+    encontradas = 0
+    total = 0
+    for frame, cajas_ref in zip(frames, referencia):
+        inicio = time.perf_counter()
+        cajas = detector.detectar(frame)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        total += len(cajas_ref)
+        encontradas += sum(1 for ref in cajas_ref if any(iou(ref, c) >= 0.5 for c in cajas))
+    tiempos = np.array(tiempos)
+    recall = encontradas / total if total > 0 else 1.0
+    return tiempos.mean(), np.percentile(tiempos, 95), recall
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detectores de caras")
+    parser.add_argument("video", help="Vídeo grabado en el kiosko")
+    parser.add_argument("--max-frames", type=int, default=600)
+    args = parser.parse_args()
+
+    frames = leer_frames(args.video, args.max_frames)
+    if not frames:
+        print(f"No se pudo leer {args.video}")
+        return
+
+    referencia_detector = DetectorHaar()
+    referencia = [referencia_detector.detectar(frame) for frame in frames]
+
+    candidatos = {
+        "haar": crear_detector_caras("haar", seguimiento=False),
+        "haar + seguimiento": crear_detector_caras("haar"),
+        "haar_reducido": crear_detector_caras("haar_reducido", seguimiento=False),
+        "haar_reducido + seguimiento": crear_detector_caras("haar_reducido"),
+    }
+    # Sin el modelo crear_detector_caras("yunet") devuelve Haar reducido: no se mide con la etiqueta de YuNet
+    if os.path.exists(config_caras.MODELO_YUNET):
+        candidatos["yunet"] = crear_detector_caras("yunet", seguimiento=False)
+        candidatos["yunet + seguimiento"] = crear_detector_caras("yunet")
+    else:
+        print(f"No se encuentra {config_caras.MODELO_YUNET}: se omite YuNet (ver config/caras.py)")
+
+    print(f"{len(frames)} frames de {frames[0].shape[1]}x{frames[0].shape[0]}, "
+          f"{sum(len(r) for r in referencia)} caras de referencia")
+    print(f"{'detector':<30}{'media (ms)':>12}{'p95 (ms)':>12}{'recall':>10}")
+    for nombre, detector in candidatos.items():
+        media, p95, recall = medir(detector, frames, referencia)
+        print(f"{nombre:<30}{media:>12.2f}{p95:>12.2f}{recall:>10.3f}")
+
+if __name__ == "__main__":
+    main()
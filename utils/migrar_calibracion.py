@@ -0,0 +1,26 @@
+"""
+Guarda la calibración de config/camara.py como config/calibraciones/<camara>_<ancho>x<alto>.npz,
+el formato que lee config.calibracion.cargar_calibracion.
+
+Uso: python -m utils.migrar_calibracion [--camara default] [--ancho 1920] [--alto 1080]
+"""
+import argparse
+import config.camara as camara
+from config.calibracion import Calibracion, ruta_calibracion, CAMARA_POR_DEFECTO
+
+def main():
+    parser = argparse.ArgumentParser(description="Migración de config/camara.py al almacén de calibraciones")
+    parser.add_argument("--camara", default=CAMARA_POR_DEFECTO,
+                        help="nombre del dispositivo (el de /sys/class/video4linux/videoN/name en Linux)")
+    # config/camara.py se calibró con la captura a 1920x1080
+    parser.add_argument("--ancho", type=int, default=1920)
+    parser.add_argument("--alto", type=int, default=1080)
+    args = parser.parse_args()
+
+    calibracion = Calibracion(camara.cameraMatrix, camara.distCoeffs, args.ancho, args.alto)
+    ruta = ruta_calibracion(args.camara, args.ancho, args.alto)
+    calibracion.guardar(ruta)
+    print(f"{ruta}: {len(calibracion.distCoeffs)} coeficientes de distorsion, FOV {calibracion.fov:.1f} grados")
+
+if __name__ == "__main__":
+    main()
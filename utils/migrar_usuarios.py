@@ -0,0 +1,28 @@
+"""
+Migra data/usuarios.json para guardar los vectores faciales como blobs base64
+en lugar de listas de 128 floats en texto.
+
+Uso: python -m utils.migrar_usuarios [--formato float32|float16]
+"""
+import argparse
+import os
+import modules.usuarios as usuarios
+
+def main():
+    parser = argparse.ArgumentParser(description="Migración de vectores faciales a formato binario")
+    parser.add_argument("--formato", choices=sorted(usuarios.TIPOS_VECTOR), default=usuarios.FORMATO_VECTOR)
+    args = parser.parse_args()
+
+    if not os.path.exists(usuarios.DB_PATH):
+        print(f"No existe {usuarios.DB_PATH}")
+        return
+
+    tam_antes = os.path.getsize(usuarios.DB_PATH)
+    if usuarios.migrar_vectores_faciales(args.formato):
+        tam_despues = os.path.getsize(usuarios.DB_PATH)
+        print(f"{usuarios.DB_PATH}: {tam_antes} -> {tam_despues} bytes")
+        indice = usuarios.reconstruir_indice_facial()
+        print(f"{usuarios.EMBEDDINGS_PATH}: {len(indice['ids'])} vectores")
+
+if __name__ == "__main__":
+    main()